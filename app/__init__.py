@@ -1,35 +1,62 @@
 # app/__init__.py
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import Flask, Response, abort, make_response, render_template, request, redirect, url_for, flash, jsonify, session, stream_with_context
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from sqlalchemy import text
 from flask_login import login_user, logout_user, login_required, current_user
-from app.extensions import db, migrate, login_mgr
+from app.extensions import db, migrate, login_mgr, court_index, game_index, court_schedule, cache, fragments, identity_cache, hasher, instrumentation, db_router, jobs, events
+from app.hashing import HashingBusy
 
 # Load environment variables first
 load_dotenv()
 
-from config import DevelopmentConfig
-from app.models import User, Court, Game, GamePlayer, PlayerStats, PlayerRating
-from app.utils import haversine_distance
-
-def create_app():
+from config import get_config
+from app.models import User, Court, Game, GameSeries, GamePlayer, PlayerStats, PlayerRating, PlayerCareerTotals, ArchivedGame, ArchivedPlayerStats, ArchivedPlayerRating
+from app.api import api
+from app.commands import register_commands
+from app.events import publish_roster_change
+from app.leaderboards import METRICS, WINDOWS, board_key, entry_for, top_entries
+from app.loaders import load_game_detail, load_game_listing, load_court_catalog, invalidate_court_catalog
+from app.routing import read_replica, statement_timeout
+from app.pagination import apply_cursor, decode_cursor, merge_rows, page_size, split_page, stream_page
+from app.search import in_hours
+from app.series import STAMP_FORMAT, Recurrence, clash, expand_occurrences, materialize, page_occurrences
+from app.submissions import parse_box_score, parse_ratings, remove_box_score_line, rostered_user_ids, save_box_score, save_ratings
+
+def create_app(config_name=None):
     app = Flask(__name__)
-    app.config.from_object(DevelopmentConfig)
+    app.config.from_object(get_config(config_name))
+    if not app.config.get("SECRET_KEY"):
+        raise RuntimeError("SECRET_KEY must be set")
 
     # Init extensions
     db.init_app(app)
     migrate.init_app(app, db)
     login_mgr.init_app(app)
+    court_index.init_app(app)
+    game_index.init_app(app)
+    court_schedule.init_app(app)
+    cache.init_app(app)
+    fragments.init_app(app)
+    identity_cache.init_app(app)
+    hasher.init_app(app)
+    instrumentation.init_app(app)
+    db_router.init_app(app)
+    jobs.init_app(app)
+    events.init_app(app)
 
     #Flask-Login wiring
     @login_mgr.user_loader
     def load_user(user_id: str):
-        # Flask-Login passes a string; convert to int for PK lookup
-        return User.query.get(int(user_id))
+        # Flask-Login passes a string; convert to int for PK lookup.
+        # Served from the identity cache so most requests skip the users table
+        return identity_cache.load(int(user_id))
 
     login_mgr.login_view = "home"  # redirect here when @login_required fails
 
+    register_commands(app)
+    app.register_blueprint(api)
+
     #Routes
     @app.route("/")
     def home():
@@ -42,10 +69,23 @@ def create_app():
         username = request.form.get("username", "").strip()
         password = request.form.get("password", "")
         user = User.query.filter_by(username=username).first()
-        if user and user.check_password(password):
-            login_user(user)
-            return redirect(url_for("dashboard"))
-        return render_template("index.html", error="Invalid credentials.")
+        try:
+            valid = user is not None and user.check_password(password)
+        except HashingBusy:
+            return render_template("index.html", error="Server is busy, please try again."), 503
+        if not valid:
+            return render_template("index.html", error="Invalid credentials.")
+
+        # Upgrade hashes made with older cost parameters; when the pool is
+        # busy the upgrade waits for a later login
+        if hasher.needs_rehash(user.password_hash):
+            try:
+                user.set_password(password)
+                db.session.commit()
+            except HashingBusy:
+                pass
+        login_user(user)
+        return redirect(url_for("dashboard"))
 
     @app.route("/register", methods=["POST"])
     def register():
@@ -57,7 +97,10 @@ def create_app():
             return render_template("index.html", error="User already registered.")
         #add email field to the form later; using placeholder for now
         new_user = User(username=username, email=f"{username}@example.com")
-        new_user.set_password(password)
+        try:
+            new_user.set_password(password)
+        except HashingBusy:
+            return render_template("index.html", error="Server is busy, please try again."), 503
         db.session.add(new_user)
         db.session.commit()
         login_user(new_user)
@@ -71,16 +114,35 @@ def create_app():
     @app.route("/logout")
     @login_required
     def logout():
+        identity_cache.invalidate(current_user.id)
         logout_user()
         return redirect(url_for("home"))
 
     # Courts CRUD routes
     @app.route("/courts")
     @login_required
+    @read_replica
     def courts():
-        courts = Court.query.all()
+        courts = load_court_catalog()
         return render_template("courts.html", courts=courts)
 
+    # The k courts closest to a point: ?lat=&lng=&k=&radius=
+    @app.route("/courts/nearest")
+    @login_required
+    @read_replica
+    def nearest_courts():
+        lat = request.args.get("lat", type=float)
+        lng = request.args.get("lng", type=float)
+        k = max(1, min(request.args.get("k", default=5, type=int), 50))
+        radius = request.args.get("radius", default=25, type=float)
+        if lat is None or lng is None:
+            return jsonify({"error": "Latitude and longitude are required"}), 400
+
+        catalog = {court["id"]: court for court in load_court_catalog()}
+        nearest = [dict(catalog[court_id], distance_km=round(distance, 2))
+                   for court_id, distance in court_index.nearest(lat, lng, k, radius) if court_id in catalog]
+        return jsonify({"courts": nearest, "count": len(nearest)})
+
     @app.route("/courts/create", methods=["GET", "POST"])
     @login_required
     def create_court():
@@ -110,19 +172,58 @@ def create_app():
             )
             db.session.add(court)
             db.session.commit()
+            court_index.add(court.id, court.lat, court.lng)
+            invalidate_court_catalog()
             flash("Court created successfully!")
             return redirect(url_for("courts"))
 
         return render_template("create_court.html")
 
+    # Open time at one court on one day: ?date=YYYY-MM-DD&min_minutes=
+    @app.route("/courts/<int:court_id>/free-slots")
+    @login_required
+    @read_replica
+    def court_free_slots(court_id):
+        if not any(court["id"] == court_id for court in load_court_catalog()):
+            abort(404)
+        date = request.args.get("date")
+        try:
+            day = datetime.strptime(date, "%Y-%m-%d") if date else datetime.combine(datetime.now().date(), datetime.min.time())
+        except ValueError:
+            return jsonify({"error": "Invalid date"}), 400
+        min_minutes = max(request.args.get("min_minutes", default=30, type=int), 0)
+
+        # Only the rest of today is bookable, and nothing before it
+        start, end = max(day, datetime.now().replace(second=0, microsecond=0)), day + timedelta(days=1)
+        if start >= end:
+            return jsonify({"error": "Date is in the past"}), 400
+
+        def slot_json(slot_start, slot_end):
+            return {"start": slot_start.isoformat(), "end": slot_end.isoformat(),
+                    "minutes": int((slot_end - slot_start).total_seconds() // 60)}
+
+        # Series occurrences without a game row yet are booked too
+        occurrences = [(occurrence.time, occurrence.ends_at) for occurrence in expand_occurrences(
+            start - timedelta(minutes=court_schedule.max_minutes), end, [court_id]
+        )]
+        return jsonify({
+            "court_id": court_id,
+            "date": day.date().isoformat(),
+            "free": [slot_json(*slot) for slot in court_schedule.free_slots(court_id, start, end, min_minutes, occurrences)],
+            "booked": [slot_json(*slot) for slot in court_schedule.busy(court_id, start, end, occurrences)],
+        })
+
     # Games CRUD routes
     @app.route("/games")
     @login_required
+    @read_replica
+    @statement_timeout(2000)
     def games():
-        court_id = request.args.get("court_id")
+        court_id = request.args.get("court_id", type=int)
         date = request.args.get("date")
 
         query = Game.query
+        start, end = datetime.now(), None  # Where series occurrences are expanded
         if court_id:
             query = query.filter_by(court_id=court_id)
         if date:
@@ -130,16 +231,32 @@ def create_app():
                 date_obj = datetime.strptime(date, "%Y-%m-%d").date()
                 query = query.filter(Game.time >= date_obj)
                 query = query.filter(Game.time < datetime.combine(date_obj, datetime.min.time()) + timedelta(days=1))
+                start = datetime.combine(date_obj, datetime.min.time())
+                end = start + timedelta(days=1)
             except ValueError:
                 pass
 
-        games = query.order_by(Game.time).all()
-        courts = Court.query.all()
-        return render_template("games.html", games=games, courts=courts)
+        # Keyset pagination on (time, id)
+        limit = page_size(request.args)
+        try:
+            after = decode_cursor(request.args["cursor"]) if request.args.get("cursor") else None
+            query = apply_cursor(query, request.args.get("cursor"))
+        except ValueError:
+            abort(400)
+
+        rows = load_game_listing(query.limit(limit + 1), current_user.id)
+        occurrences = page_occurrences(rows, limit, start, end, [court_id] if court_id else None, after,
+                                       game_of=lambda row: row[0])
+        rows = merge_rows(rows, [(occurrence, False) for occurrence in occurrences], game_of=lambda row: row[0])
+        games, next_cursor = split_page(rows, limit, game_of=lambda row: row[0])
+        courts = load_court_catalog()
+        return render_template("games.html", games=games, courts=courts, next_cursor=next_cursor)
 
     # Nearby games search endpoint
     @app.route("/games/nearby")
     @login_required
+    @read_replica
+    @statement_timeout(2000)
     def nearby_games():
         lat = request.args.get("lat", type=float)
         lng = request.args.get("lng", type=float)
@@ -149,80 +266,328 @@ def create_app():
         if not lat or not lng:
             return jsonify({"error": "Latitude and longitude are required"}), 400
 
-        # Get all upcoming games with their court info
+        # Courts within the radius, from the in-process spatial index
+        court_distances = court_index.within(lat, lng, radius)
+        if not court_distances:
+            return jsonify({"games": [], "count": 0, "next_cursor": None})
+
+        # Only fetch games at those courts
         query = db.session.query(Game, Court).join(Court, Game.court_id == Court.id)
+        query = query.filter(Court.id.in_(court_distances.keys()))
 
         # Filter by date if provided
+        start, end = datetime.now(), None  # Where series occurrences are expanded
         if date:
             try:
                 date_obj = datetime.strptime(date, "%Y-%m-%d").date()
                 query = query.filter(Game.time >= date_obj)
                 query = query.filter(Game.time < datetime.combine(date_obj, datetime.min.time()) + timedelta(days=1))
+                start = datetime.combine(date_obj, datetime.min.time())
+                end = start + timedelta(days=1)
             except ValueError:
                 pass
         else:
             # Default: only show future games
             query = query.filter(Game.time >= datetime.now())
 
-        games_with_courts = query.order_by(Game.time).all()
-
-        # Calculate distance for each game and filter by radius
-        nearby = []
-        for game, court in games_with_courts:
-            distance = haversine_distance(lat, lng, court.lat, court.lng)
-            if distance <= radius:
-                nearby.append({
-                    "id": game.id,
-                    "court_id": court.id,
-                    "court_name": court.name,
-                    "court_address": court.address,
-                    "court_lat": court.lat,
-                    "court_lng": court.lng,
-                    "time": game.time.isoformat(),
-                    "max_players": game.max_players,
-                    "current_players": game.current_players,
-                    "spots_available": game.spots_available,
-                    "distance_km": round(distance, 2),
-                    "host_id": game.host_id
-                })
-
-        # Sort by distance
-        nearby.sort(key=lambda x: x["distance_km"])
-
-        return jsonify({"games": nearby, "count": len(nearby)})
+        # ?cursor= or ?limit= switches to keyset pages ordered by (time, id);
+        # without them the whole listing comes back sorted by distance
+        paginated = "cursor" in request.args or "limit" in request.args
+        limit = page_size(request.args) if paginated else None
+        try:
+            after = decode_cursor(request.args["cursor"]) if request.args.get("cursor") else None
+            query = apply_cursor(query, request.args.get("cursor"))
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+
+        def game_json(row):
+            game, court = row
+            return {
+                "id": game.id,
+                "court_id": court.id,
+                "court_name": court.name,
+                "court_address": court.address,
+                "court_lat": court.lat,
+                "court_lng": court.lng,
+                "time": game.time.isoformat(),
+                "max_players": game.max_players,
+                "current_players": game.current_players,
+                "spots_available": game.spots_available,
+                "distance_km": round(court_distances[court.id], 2),
+                "host_id": game.host_id,
+                "series_id": game.series_id
+            }
+
+        def occurrence_rows(rows=None):
+            # Series occurrences at the nearby courts, shaped like (game, court) rows
+            if rows is None:
+                occurrences = expand_occurrences(start, end, court_distances.keys(), after)
+            else:
+                occurrences = page_occurrences(rows, limit, start, end, court_distances.keys(), after,
+                                               game_of=lambda row: row[0])
+            return [(occurrence, occurrence.court) for occurrence in occurrences]
+
+        # ?stream=1 writes rows out as they are fetched instead of building the list
+        if request.args.get("stream") == "1":
+            body = stream_page(query, game_json, limit, game_of=lambda row: row[0], extra=occurrence_rows())
+            return Response(stream_with_context(body), mimetype="application/json")
+
+        if not paginated:
+            nearby = [game_json(row) for row in query.all() + occurrence_rows()]
+            # Sort by distance
+            nearby.sort(key=lambda x: x["distance_km"])
+            return jsonify({"games": nearby, "count": len(nearby), "next_cursor": None})
+
+        rows = query.limit(limit + 1).all()
+        rows = merge_rows(rows, occurrence_rows(rows), game_of=lambda row: row[0])
+        rows, next_cursor = split_page(rows, limit, game_of=lambda row: row[0])
+        nearby = [game_json(row) for row in rows]
+        return jsonify({"games": nearby, "count": len(nearby), "next_cursor": next_cursor})
+
+    # Upcoming games matching several filters at once, from the in-memory index:
+    # ?min_spots=&lat=&lng=&radius=&date=&days=&start_hour=&end_hour=&court_id=
+    @app.route("/games/search")
+    @login_required
+    @read_replica
+    @statement_timeout(2000)
+    def search_games():
+        args = request.args
+        lat = args.get("lat", type=float)
+        lng = args.get("lng", type=float)
+        radius = args.get("radius", default=10, type=float)  # default 10km
+        min_spots = args.get("min_spots", default=1, type=int)
+        days = args.get("days", default=7, type=int)
+        start_hour = args.get("start_hour", type=int)
+        end_hour = args.get("end_hour", type=int)
+
+        if (lat is None) != (lng is None):
+            return jsonify({"error": "Latitude and longitude must be given together"}), 400
+        if not 1 <= days <= game_index.horizon_days:
+            return jsonify({"error": f"days must be between 1 and {game_index.horizon_days}"}), 400
+        if (start_hour is None) != (end_hour is None) or not all(
+                0 <= hour <= 24 for hour in (start_hour, end_hour) if hour is not None):
+            return jsonify({"error": "start_hour and end_hour must be given together, between 0 and 24"}), 400
+        try:
+            start = datetime.strptime(args["date"], "%Y-%m-%d") if args.get("date") else datetime.now()
+            after = decode_cursor(args["cursor"]) if args.get("cursor") else None
+        except ValueError:
+            return jsonify({"error": "Invalid date or cursor"}), 400
+
+        # The index only holds games from now to the end of its horizon
+        end = start.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=days)
+        now = datetime.now()
+        if not now < end <= now + timedelta(days=game_index.horizon_days):
+            return jsonify({"error": f"date and days must fall within the next {game_index.horizon_days} days"}), 400
+
+        limit = page_size(args)
+        court_id = args.get("court_id", type=int)
+        hours = (start_hour, end_hour) if start_hour is not None else None
+        matches = game_index.search(
+            start, end,
+            min_spots=max(min_spots, 0), lat=lat, lng=lng, radius_km=radius if lat is not None else None,
+            hours=hours, court_id=court_id, after=after, limit=limit + 1,
+        )
+
+        # Series occurrences without a game row yet, through the same filters
+        distances = court_index.within(lat, lng, radius) if lat is not None else None
+        court_ids = list(distances) if distances is not None else None
+        if court_id:
+            court_ids = [court_id] if court_ids is None or court_id in court_ids else []
+        occurrences = [
+            (occurrence, distances[occurrence.court_id] if distances is not None else None)
+            for occurrence in page_occurrences(matches, limit, start, end, court_ids, after,
+                                               game_of=lambda match: match[0])
+            if occurrence.spots_available >= min_spots and (hours is None or in_hours(occurrence.time.hour, hours))
+        ]
+        matches = merge_rows(matches, occurrences, game_of=lambda match: match[0])
+        matches, next_cursor = split_page(matches, limit, game_of=lambda match: match[0])
+
+        # The index may lag other workers' joins, so recheck spots on the rows
+        rows = {}
+        game_ids = [entry.id for entry, _ in matches if entry.id is not None]
+        if game_ids:
+            rows = {game.id: (game, court) for game, court in db.session.query(Game, Court).join(
+                Court, Game.court_id == Court.id
+            ).filter(Game.id.in_(game_ids))}
+        games = []
+        for entry, distance in matches:
+            if entry.id is None:
+                game, court = entry, entry.court  # An occurrence
+            else:
+                game, court = rows.get(entry.id, (None, None))
+            if game is None or game.spots_available < min_spots:
+                continue
+            game_json = {
+                "id": game.id,
+                "court_id": court.id,
+                "court_name": court.name,
+                "court_address": court.address,
+                "court_lat": court.lat,
+                "court_lng": court.lng,
+                "time": game.time.isoformat(),
+                "max_players": game.max_players,
+                "current_players": game.current_players,
+                "spots_available": game.spots_available,
+                "host_id": game.host_id,
+                "series_id": game.series_id
+            }
+            if distance is not None:
+                game_json["distance_km"] = round(distance, 2)
+            games.append(game_json)
+        return jsonify({"games": games, "count": len(games), "next_cursor": next_cursor})
 
     @app.route("/games/create", methods=["GET", "POST"])
     @login_required
     def create_game():
+        def form():
+            return render_template("create_game.html", courts=load_court_catalog(),
+                                   max_minutes=court_schedule.max_minutes)
+
         if request.method == "POST":
             court_id = request.form.get("court_id")
             time = request.form.get("time")
             max_players = request.form.get("max_players", 10)
+            duration = request.form.get("duration_minutes", 90)
 
             if not all([court_id, time]):
                 flash("Court and time are required.")
-                return render_template("create_game.html", courts=Court.query.all())
+                return form()
 
             try:
+                court_id = int(court_id)
                 time_obj = datetime.strptime(time, "%Y-%m-%dT%H:%M")
                 max_players = int(max_players)
+                duration = int(duration)
             except ValueError:
-                flash("Invalid time or player count.")
-                return render_template("create_game.html", courts=Court.query.all())
+                flash("Invalid court, time, duration or player count.")
+                return form()
+
+            if time_obj < datetime.now():
+                flash("Game time must be in the future.")
+                return form()
+            if not 1 <= duration <= court_schedule.max_minutes:
+                flash(f"Duration must be between 1 and {court_schedule.max_minutes} minutes.")
+                return form()
+
+            # Locking the court serialises bookings for it, so the conflict
+            # check below still holds when this transaction commits
+            court = db.session.get(Court, court_id, with_for_update=True)
+            if court is None:
+                flash("Unknown court.")
+                return form()
+            booking = clash(court_id, [time_obj], duration)
+            if booking:
+                db.session.rollback()
+                start, end = booking
+                flash(f"That court is already booked from {start:%Y-%m-%d %H:%M} to {end:%H:%M}.")
+                return form()
 
             game = Game(
                 court_id=court_id,
                 host_id=current_user.id,
                 time=time_obj,
+                duration_minutes=duration,
                 max_players=max_players
             )
+            lat, lng = court.lat, court.lng
             db.session.add(game)
             db.session.commit()
+            court_schedule.add(game)
+            game_index.add(game, lat, lng)
             flash("Game created successfully!")
             return redirect(url_for("games"))
 
-        courts = Court.query.all()
-        return render_template("create_game.html", courts=courts)
+        return form()
+
+    # Recurring series; their games are created when first opened or joined
+    @app.route("/series/create", methods=["GET", "POST"])
+    @login_required
+    def create_series():
+        def form():
+            return render_template("create_series.html", courts=load_court_catalog(),
+                                   max_minutes=court_schedule.max_minutes)
+
+        if request.method == "POST":
+            court_id = request.form.get("court_id")
+            time = request.form.get("time")
+            rule = request.form.get("rule", "").strip()
+            max_players = request.form.get("max_players", 10)
+            duration = request.form.get("duration_minutes", 90)
+
+            if not all([court_id, time, rule]):
+                flash("Court, first game and repeat rule are required.")
+                return form()
+
+            try:
+                court_id = int(court_id)
+                time_obj = datetime.strptime(time, "%Y-%m-%dT%H:%M")
+                max_players = int(max_players)
+                duration = int(duration)
+            except ValueError:
+                flash("Invalid court, time, duration or player count.")
+                return form()
+            try:
+                recurrence = Recurrence.parse(rule)
+            except ValueError as exc:
+                flash(f"Invalid repeat rule: {exc}")
+                return form()
+
+            if time_obj < datetime.now():
+                flash("The first game must be in the future.")
+                return form()
+            if not 1 <= duration <= court_schedule.max_minutes:
+                flash(f"Duration must be between 1 and {court_schedule.max_minutes} minutes.")
+                return form()
+
+            # Check every occurrence over the conflict horizon under the court lock,
+            # as create_game does for one game
+            court = db.session.get(Court, court_id, with_for_update=True)
+            if court is None:
+                flash("Unknown court.")
+                return form()
+            horizon = time_obj + timedelta(days=app.config.get("SERIES_CONFLICT_DAYS", 365))
+            booking = clash(court_id, list(recurrence.between(time_obj, time_obj, horizon)), duration)
+            if booking:
+                db.session.rollback()
+                start, end = booking
+                flash(f"That court is already booked from {start:%Y-%m-%d %H:%M} to {end:%H:%M}.")
+                return form()
+
+            db.session.add(GameSeries(
+                court_id=court_id,
+                host_id=current_user.id,
+                starts_at=time_obj,
+                rule=str(recurrence),
+                duration_minutes=duration,
+                max_players=max_players
+            ))
+            db.session.commit()
+            flash("Series created successfully!")
+            return redirect(url_for("games"))
+
+        return form()
+
+    def load_occurrence(series_id, stamp):
+        # The game for one occurrence, created on first use
+        series = db.session.get(GameSeries, series_id)
+        try:
+            time_obj = datetime.strptime(stamp, STAMP_FORMAT)
+        except ValueError:
+            abort(404)
+        game = materialize(series, time_obj) if series is not None else None
+        if game is None:
+            abort(404)
+        return game
+
+    @app.route("/series/<int:series_id>/<stamp>")
+    @login_required
+    def series_occurrence(series_id, stamp):
+        return redirect(url_for("game_detail", game_id=load_occurrence(series_id, stamp).id))
+
+    @app.route("/series/<int:series_id>/<stamp>/join", methods=["POST"])
+    @login_required
+    def join_occurrence(series_id, stamp):
+        return join_game(load_occurrence(series_id, stamp).id)
 
     # Join/Leave game routes
     @app.route("/games/<int:game_id>/join", methods=["POST"])
@@ -230,13 +595,13 @@ def create_app():
     def join_game(game_id):
         game = Game.query.get_or_404(game_id)
 
-        if not game.can_join(current_user):
+        if not game.add_player(current_user.id):
             flash("Cannot join this game (full or already joined).")
             return redirect(url_for("games"))
 
-        game_player = GamePlayer(game_id=game_id, user_id=current_user.id)
-        db.session.add(game_player)
+        player_count = publish_roster_change(game_id, current_user, joined=True)
         db.session.commit()
+        game_index.set_player_count(game_id, player_count)
         flash("Successfully joined the game!")
         return redirect(url_for("games"))
 
@@ -245,54 +610,57 @@ def create_app():
     def leave_game(game_id):
         game = Game.query.get_or_404(game_id)
 
-        game_player = GamePlayer.query.filter_by(
-            game_id=game_id,
-            user_id=current_user.id
-        ).first()
-
-        if not game_player:
+        if not game.remove_player(current_user.id):
             flash("You are not in this game.")
             return redirect(url_for("games"))
+        # Box scores only hold rostered players, so the player's line goes too
+        remove_box_score_line(game_id, current_user.id)
 
-        db.session.delete(game_player)
+        player_count = publish_roster_change(game_id, current_user, joined=False)
         db.session.commit()
+        game_index.set_player_count(game_id, player_count)
         flash("Successfully left the game!")
         return redirect(url_for("games"))
 
     # Game details with stats and ratings
     @app.route("/games/<int:game_id>")
     @login_required
+    @read_replica
     def game_detail(game_id):
-        game = Game.query.get_or_404(game_id)
-        is_rostered = current_user in game.players
-
-        # Get current stats for this game
-        player_stats = PlayerStats.query.filter_by(game_id=game_id).all()
-        stats_dict = {stat.user_id: stat for stat in player_stats}
-
-        # Get current ratings for this game (that current user has given)
-        my_ratings = PlayerRating.query.filter_by(
-            game_id=game_id,
-            from_user_id=current_user.id
-        ).all()
-        ratings_dict = {rating.to_user_id: rating for rating in my_ratings}
-
-        return render_template("game_detail.html",
-                             game=game,
-                             is_rostered=is_rostered,
-                             stats_dict=stats_dict,
-                             ratings_dict=ratings_dict)
+        detail = load_game_detail(game_id, current_user)
+        if detail is None:
+            abort(404)
+
+        # Repeat views answer 304 without rendering, unless a flash message
+        # is waiting to be shown
+        if request.if_none_match.contains(detail["etag"]) and not session.get("_flashes"):
+            response = Response(status=304)
+        else:
+            response = make_response(render_template("game_detail.html",
+                                                     game=detail["game"],
+                                                     roster=detail["roster"],
+                                                     is_rostered=detail["is_rostered"],
+                                                     version=detail["version"]))
+        response.set_etag(detail["etag"])
+        response.last_modified = detail["last_modified"]
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
+
+    # Live roster and box-score changes for an open game page
+    @app.route("/games/<int:game_id>/events")
+    @login_required
+    @read_replica
+    def game_events(game_id):
+        if db.session.get(Game, game_id) is None:
+            abort(404)
+        return events.stream(game_id)
 
     # Submit/update stats for a player in a game
     @app.route("/games/<int:game_id>/stats", methods=["POST"])
     @login_required
     def submit_stats(game_id):
-        game = Game.query.get_or_404(game_id)
-
-        # Only rostered players can submit stats
-        if current_user not in game.players:
-            flash("Only rostered players can submit stats.")
-            return redirect(url_for("game_detail", game_id=game_id))
+        Game.query.get_or_404(game_id)
 
         user_id = request.form.get("user_id")
         points = request.form.get("points", 0)
@@ -308,31 +676,45 @@ def create_app():
             flash("Invalid stats values.")
             return redirect(url_for("game_detail", game_id=game_id))
 
-        # Check if stats already exist
-        existing_stats = PlayerStats.query.filter_by(
-            game_id=game_id,
-            user_id=user_id
-        ).first()
-
-        if existing_stats:
-            existing_stats.points = points
-            existing_stats.rebounds = rebounds
-            existing_stats.assists = assists
-            existing_stats.updated_at = datetime.now()
-        else:
-            new_stats = PlayerStats(
-                game_id=game_id,
-                user_id=user_id,
-                points=points,
-                rebounds=rebounds,
-                assists=assists
-            )
-            db.session.add(new_stats)
+        # Only rostered players can submit stats, and only for rostered players
+        rostered = rostered_user_ids(game_id, {user_id, current_user.id})
+        if current_user.id not in rostered:
+            flash("Only rostered players can submit stats.")
+            return redirect(url_for("game_detail", game_id=game_id))
+        if user_id not in rostered:
+            flash("That player is not on the roster.")
+            return redirect(url_for("game_detail", game_id=game_id))
+
+        save_box_score(game_id, [(user_id, points, rebounds, assists)])
 
         db.session.commit()
         flash("Stats updated successfully!")
         return redirect(url_for("game_detail", game_id=game_id))
 
+    # Submit a whole game's box score in one request
+    @app.route("/games/<int:game_id>/stats/bulk", methods=["POST"])
+    @login_required
+    def submit_stats_bulk(game_id):
+        Game.query.get_or_404(game_id)
+
+        try:
+            lines = parse_box_score(request.get_json(silent=True))
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+
+        # One roster query covers the submitter and every listed player
+        user_ids = {line[0] for line in lines}
+        rostered = rostered_user_ids(game_id, user_ids | {current_user.id})
+        if current_user.id not in rostered:
+            return jsonify({"error": "Only rostered players can submit stats"}), 403
+        missing = sorted(user_ids - rostered)
+        if missing:
+            return jsonify({"error": "Players not on the roster", "user_ids": missing}), 400
+
+        updated = save_box_score(game_id, lines)
+        db.session.commit()
+        return jsonify({"updated": updated})
+
     # Submit/update rating for a player in a game
     @app.route("/games/<int:game_id>/rate", methods=["POST"])
     @login_required
@@ -340,7 +722,7 @@ def create_app():
         game = Game.query.get_or_404(game_id)
 
         # Only rostered players can rate
-        if current_user not in game.players:
+        if not game.has_player(current_user.id):
             flash("Only rostered players can rate others.")
             return redirect(url_for("game_detail", game_id=game_id))
 
@@ -365,74 +747,119 @@ def create_app():
             flash("Rating must be between 1 and 5.")
             return redirect(url_for("game_detail", game_id=game_id))
 
-        # Check if rating already exists
-        existing_rating = PlayerRating.query.filter_by(
-            game_id=game_id,
-            from_user_id=current_user.id,
-            to_user_id=to_user_id
-        ).first()
-
-        if existing_rating:
-            existing_rating.rating = rating
-            existing_rating.comment = comment
-        else:
-            new_rating = PlayerRating(
-                game_id=game_id,
-                from_user_id=current_user.id,
-                to_user_id=to_user_id,
-                rating=rating,
-                comment=comment
-            )
-            db.session.add(new_rating)
+        save_ratings(game_id, current_user.id, [(to_user_id, rating, comment)])
 
         db.session.commit()
         flash("Rating submitted successfully!")
         return redirect(url_for("game_detail", game_id=game_id))
 
+    # Rate several players from a game in one request
+    @app.route("/games/<int:game_id>/rate/bulk", methods=["POST"])
+    @login_required
+    def submit_rating_bulk(game_id):
+        game = Game.query.get_or_404(game_id)
+
+        if not game.has_player(current_user.id):
+            return jsonify({"error": "Only rostered players can rate others"}), 403
+
+        try:
+            lines = parse_ratings(request.get_json(silent=True), current_user.id)
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+
+        to_user_ids = {line[0] for line in lines}
+        missing = sorted(to_user_ids - rostered_user_ids(game_id, to_user_ids))
+        if missing:
+            return jsonify({"error": "Players not on the roster", "user_ids": missing}), 400
+
+        updated = save_ratings(game_id, current_user.id, lines)
+        db.session.commit()
+        return jsonify({"updated": updated})
+
     # User profile with lifetime stats and ratings
     @app.route("/users/<int:user_id>")
     @login_required
+    @read_replica
+    @statement_timeout(2000)
     def user_profile(user_id):
         user = User.query.get_or_404(user_id)
 
-        # Calculate lifetime stats aggregations
-        stats_query = db.session.query(
-            db.func.count(PlayerStats.id).label('games_played'),
-            db.func.sum(PlayerStats.points).label('total_points'),
-            db.func.sum(PlayerStats.rebounds).label('total_rebounds'),
-            db.func.sum(PlayerStats.assists).label('total_assists'),
-            db.func.avg(PlayerStats.points).label('avg_points'),
-            db.func.avg(PlayerStats.rebounds).label('avg_rebounds'),
-            db.func.avg(PlayerStats.assists).label('avg_assists')
-        ).filter(PlayerStats.user_id == user_id).first()
-
-        # Calculate average rating received
-        rating_query = db.session.query(
-            db.func.count(PlayerRating.id).label('total_ratings'),
-            db.func.avg(PlayerRating.rating).label('avg_rating')
-        ).filter(PlayerRating.to_user_id == user_id).first()
+        # Lifetime stats and ratings, maintained incrementally on submit
+        totals = PlayerCareerTotals.for_user(user_id)
 
         # Get recent games with stats
         recent_games = db.session.query(Game, PlayerStats).join(
             PlayerStats, PlayerStats.game_id == Game.id
         ).filter(PlayerStats.user_id == user_id).order_by(
-            Game.time.desc()
-        ).limit(10).all()
-
-        # Get recent ratings received
-        recent_ratings = db.session.query(PlayerRating, User).join(
-            User, User.id == PlayerRating.from_user_id
-        ).filter(PlayerRating.to_user_id == user_id).order_by(
-            PlayerRating.created_at.desc()
+            Game.time.desc(), PlayerStats.id.desc()
         ).limit(10).all()
+        # Archived games are almost always older than hot ones, so with a full
+        # page this only probes the archive index past the 10th game's time
+        archived = db.session.query(ArchivedGame, ArchivedPlayerStats).join(
+            ArchivedPlayerStats, db.and_(ArchivedPlayerStats.game_id == ArchivedGame.id,
+                                         ArchivedPlayerStats.game_time == ArchivedGame.game_time)
+        ).filter(ArchivedPlayerStats.user_id == user_id)
+        if len(recent_games) == 10:
+            archived = archived.filter(ArchivedPlayerStats.game_time >= recent_games[-1][0].time)
+        recent_games = sorted(
+            recent_games + archived.order_by(
+                ArchivedPlayerStats.game_time.desc(), ArchivedPlayerStats.id.desc()
+            ).limit(10).all(),
+            key=lambda row: (row[0].time, row[1].id), reverse=True
+        )[:10]
+
+        # Get recent ratings received; games are archived by age, not their
+        # ratings, so an archived rating can be newer than a hot one
+        recent_ratings = sorted(
+            db.session.query(PlayerRating, User).join(
+                User, User.id == PlayerRating.from_user_id
+            ).filter(PlayerRating.to_user_id == user_id).order_by(
+                PlayerRating.created_at.desc(), PlayerRating.id.desc()
+            ).limit(10).all() +
+            db.session.query(ArchivedPlayerRating, User).join(
+                User, User.id == ArchivedPlayerRating.from_user_id
+            ).filter(ArchivedPlayerRating.to_user_id == user_id).order_by(
+                ArchivedPlayerRating.created_at.desc(), ArchivedPlayerRating.id.desc()
+            ).limit(10).all(),
+            key=lambda row: (row[0].created_at, row[0].id), reverse=True
+        )[:10]
 
         return render_template("user_profile.html",
                              user=user,
-                             stats=stats_query,
-                             ratings=rating_query,
+                             stats=totals,
+                             ratings=totals,
                              recent_games=recent_games,
                              recent_ratings=recent_ratings)
 
+    # Leaderboard for one metric: top N plus the current user's standing
+    @app.route("/leaderboards/<metric>")
+    @login_required
+    @read_replica
+    @statement_timeout(1000)
+    def leaderboard(metric):
+        if metric not in METRICS:
+            abort(404)
+        window = request.args.get("window", "30d")
+        if window not in WINDOWS:
+            return jsonify({"error": f"window must be one of {', '.join(WINDOWS)}"}), 400
+        court_id = request.args.get("court_id", type=int)
+        limit = max(1, min(request.args.get("limit", 10, type=int), 100))
+
+        board = board_key(metric, window, court_id)
+        entries = top_entries(board, limit)
+        mine = entry_for(board, current_user.id)
+
+        def serialize(entry, username):
+            return {"rank": entry.rank, "user_id": entry.user_id, "username": username,
+                    "value": entry.value, "sample_size": entry.sample_size}
+
+        return jsonify({
+            "board": board,
+            "refreshed_at": entries[0][0].refreshed_at.isoformat() if entries else None,
+            "entries": [serialize(entry, username) for entry, username in entries],
+            "me": serialize(mine, current_user.username) if mine else None,
+        })
+
     # Ensure models are imported so Alembic sees them
     from app import models
 
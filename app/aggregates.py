@@ -0,0 +1,115 @@
+from datetime import datetime
+
+from app.extensions import db
+from app.models import ArchivedPlayerRating, ArchivedPlayerStats, PlayerCareerTotals, PlayerRating, PlayerStats
+from app.upsert import upsert
+
+TOTALS_COLUMNS = (
+    "games_played", "total_points", "total_rebounds",
+    "total_assists", "total_ratings", "rating_sum",
+)
+
+
+def _apply_deltas(changes):
+    """Add column deltas to career totals rows in a single upsert.
+
+    ``changes`` is an iterable of ``(user_id, {column: delta})``. New
+    players get a row holding the deltas; existing rows are updated with
+    ``col = col + delta``, so concurrent writers never lose each other's
+    changes. Rows are written in user_id order to keep lock order stable.
+    """
+    merged = {}
+    for user_id, deltas in changes:
+        row = merged.setdefault(user_id, dict.fromkeys(TOTALS_COLUMNS, 0))
+        for name, delta in deltas.items():
+            row[name] += delta
+
+    now = datetime.now()
+    rows = [
+        dict(row, user_id=user_id, updated_at=now)
+        for user_id, row in sorted(merged.items()) if any(row.values())
+    ]
+    if rows:
+        upsert(PlayerCareerTotals, rows, ["user_id"],
+               update_columns=["updated_at"], increment_columns=TOTALS_COLUMNS)
+
+
+def _stats_deltas(old, new):
+    # old/new are (points, rebounds, assists); old is None for a first
+    # entry, new is None for a removed one
+    games = (old is None) - (new is None)
+    old, new = old or (0, 0, 0), new or (0, 0, 0)
+    return {
+        "games_played": games,
+        "total_points": new[0] - (old[0] or 0),
+        "total_rebounds": new[1] - (old[1] or 0),
+        "total_assists": new[2] - (old[2] or 0),
+    }
+
+
+def _rating_deltas(old, new):
+    # old is the previous rating value, or None for a first rating
+    return {"total_ratings": 0 if old is not None else 1, "rating_sum": new - (old or 0)}
+
+
+def record_stats(user_id, old, new):
+    record_stats_many([(user_id, old, new)])
+
+
+def record_stats_many(changes):
+    # changes: (user_id, old, new) for each box-score line written
+    _apply_deltas((user_id, _stats_deltas(old, new)) for user_id, old, new in changes)
+
+
+def record_rating(user_id, old, new):
+    record_ratings_many([(user_id, old, new)])
+
+
+def record_ratings_many(changes):
+    # changes: (to_user_id, old, new) for each rating written
+    _apply_deltas((user_id, _rating_deltas(old, new)) for user_id, old, new in changes)
+
+
+def rebuild_career_totals():
+    """Recompute every player's career totals from the raw rows.
+
+    Reads both the hot tables and the archive (see ``app.archive``). Used
+    to backfill the table and to repair drift; returns the number of
+    players written.
+    """
+    totals = {}
+
+    for model in (PlayerStats, ArchivedPlayerStats):
+        stats = db.session.query(
+            model.user_id,
+            db.func.count(model.id),
+            db.func.coalesce(db.func.sum(model.points), 0),
+            db.func.coalesce(db.func.sum(model.rebounds), 0),
+            db.func.coalesce(db.func.sum(model.assists), 0),
+        ).group_by(model.user_id)
+        for user_id, games, points, rebounds, assists in stats:
+            row = totals.setdefault(user_id, dict.fromkeys(TOTALS_COLUMNS, 0))
+            row["games_played"] += games
+            row["total_points"] += points
+            row["total_rebounds"] += rebounds
+            row["total_assists"] += assists
+
+    for model in (PlayerRating, ArchivedPlayerRating):
+        ratings = db.session.query(
+            model.to_user_id,
+            db.func.count(model.id),
+            db.func.sum(model.rating),
+        ).group_by(model.to_user_id)
+        for user_id, count, rating_sum in ratings:
+            row = totals.setdefault(user_id, dict.fromkeys(TOTALS_COLUMNS, 0))
+            row["total_ratings"] += count
+            row["rating_sum"] += rating_sum
+
+    db.session.execute(db.delete(PlayerCareerTotals))
+    if totals:
+        db.session.execute(
+            db.insert(PlayerCareerTotals),
+            [dict(row, user_id=user_id) for user_id, row in totals.items()]
+        )
+    db.session.commit()
+    return len(totals)
@@ -0,0 +1,171 @@
+import gzip
+import json
+
+from flask import Blueprint, Response, abort, current_app, request
+from flask_login import current_user
+from sqlalchemy.orm import joinedload
+
+from app.extensions import db
+from app.loaders import load_court_catalog
+from app.models import User, Game, GamePlayer, PlayerStats, PlayerCareerTotals
+from app.pagination import apply_cursor, page_size, split_page
+from app.routing import use_replica
+from app.schemas import (
+    BoxScoreLineSchema, CourtSchema, GameSchema, ProfileSchema, RosterEntrySchema, get_schema,
+)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+api = Blueprint("api", __name__, url_prefix="/api/v1")
+
+
+def dumps(payload):
+    # orjson when installed, else compact stdlib output
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def api_response(payload, status=200):
+    return Response(dumps(payload), status=status, mimetype="application/json")
+
+
+def api_error(message, status):
+    return api_response({"error": message}, status)
+
+
+def requested_fields():
+    # ?fields=id,time,court_name -> ("court_name", "id", "time"), or None for all
+    names = {name.strip() for name in request.args.get("fields", "").split(",") if name.strip()}
+    return tuple(sorted(names)) or None
+
+
+def dump(schema_class, obj, many=False):
+    try:
+        schema = get_schema(schema_class, requested_fields(), many)
+    except ValueError:
+        # marshmallow rejects unknown names in ?fields=
+        abort(api_error(f"Unknown field in ?fields={request.args['fields']}", 400))
+    return schema.dump(obj)
+
+
+@api.errorhandler(404)
+def not_found(exc):
+    return api_error("Not found", 404)
+
+
+@api.before_request
+def require_login():
+    if not current_user.is_authenticated:
+        return api_error("Authentication required", 401)
+
+
+# The API is read-only, so all of it can be served by a replica
+api.before_request(use_replica)
+
+
+@api.after_request
+def compress(response):
+    """Brotli- or gzip-encode JSON bodies the client accepts.
+
+    Bodies under ``API_COMPRESS_MIN_SIZE`` bytes (default 500) go out as
+    is, since the encoding overhead outweighs the saving. Brotli is used
+    only when the ``brotli`` package is installed.
+    """
+    if response.direct_passthrough or response.status_code != 200 or response.content_encoding:
+        return response
+    data = response.get_data()
+    if len(data) < current_app.config.get("API_COMPRESS_MIN_SIZE", 500):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    if brotli is not None and request.accept_encodings["br"]:
+        response.set_data(brotli.compress(data, quality=4))
+        response.content_encoding = "br"
+    elif request.accept_encodings["gzip"]:
+        response.set_data(gzip.compress(data, compresslevel=5))
+        response.content_encoding = "gzip"
+    return response
+
+
+@api.route("/courts")
+def courts():
+    catalog = load_court_catalog()
+    return api_response({"courts": dump(CourtSchema, catalog, many=True), "count": len(catalog)})
+
+
+@api.route("/courts/<int:court_id>")
+def court(court_id):
+    found = next((court for court in load_court_catalog() if court["id"] == court_id), None)
+    if found is None:
+        return api_error("Not found", 404)
+    return api_response(dump(CourtSchema, found))
+
+
+@api.route("/games")
+def games():
+    query = Game.query.options(joinedload(Game.court), joinedload(Game.host))
+    court_id = request.args.get("court_id", type=int)
+    if court_id:
+        query = query.filter(Game.court_id == court_id)
+
+    # Keyset pagination on (time, id), same cursors as the HTML listing
+    limit = page_size(request.args)
+    try:
+        query = apply_cursor(query, request.args.get("cursor"))
+    except ValueError:
+        return api_error("Invalid cursor", 400)
+
+    rows, next_cursor = split_page(query.limit(limit + 1).all(), limit)
+    return api_response({"games": dump(GameSchema, rows, many=True), "count": len(rows),
+                         "next_cursor": next_cursor})
+
+
+@api.route("/games/<int:game_id>")
+def game(game_id):
+    found = Game.query.options(
+        joinedload(Game.court), joinedload(Game.host)
+    ).filter(Game.id == game_id).first_or_404()
+    return api_response(dump(GameSchema, found))
+
+
+@api.route("/games/<int:game_id>/roster")
+def roster(game_id):
+    if db.session.get(Game, game_id) is None:
+        abort(404)
+    rows = db.session.query(
+        GamePlayer.user_id, User.username, GamePlayer.joined_at
+    ).join(User, User.id == GamePlayer.user_id).filter(
+        GamePlayer.game_id == game_id
+    ).order_by(GamePlayer.joined_at, GamePlayer.user_id).all()
+    players = [row._asdict() for row in rows]
+    return api_response({"players": dump(RosterEntrySchema, players, many=True), "count": len(players)})
+
+
+@api.route("/games/<int:game_id>/stats")
+def box_score(game_id):
+    if db.session.get(Game, game_id) is None:
+        abort(404)
+    rows = db.session.query(
+        PlayerStats.user_id, User.username, PlayerStats.points, PlayerStats.rebounds,
+        PlayerStats.assists, PlayerStats.updated_at
+    ).join(User, User.id == PlayerStats.user_id).filter(
+        PlayerStats.game_id == game_id
+    ).order_by(PlayerStats.user_id).all()
+    lines = [row._asdict() for row in rows]
+    return api_response({"stats": dump(BoxScoreLineSchema, lines, many=True), "count": len(lines)})
+
+
+@api.route("/users/<int:user_id>")
+def profile(user_id):
+    user = User.query.get_or_404(user_id)
+    totals = PlayerCareerTotals.for_user(user_id)
+    return api_response(dump(ProfileSchema, {"user": user, "totals": totals}))
@@ -0,0 +1,101 @@
+from datetime import datetime
+
+from app.extensions import db
+from app.models import (
+    ArchivedGame, ArchivedGamePlayer, ArchivedPlayerRating, ArchivedPlayerStats,
+    Game, GamePlayer, PlayerRating, PlayerStats,
+)
+
+# Hot table -> its archive, children first so deletes respect foreign keys
+TIERS = (
+    (PlayerRating, ArchivedPlayerRating),
+    (PlayerStats, ArchivedPlayerStats),
+    (GamePlayer, ArchivedGamePlayer),
+    (Game, ArchivedGame),
+)
+
+
+def ensure_partitions(first, last):
+    """Create the yearly archive partitions covering ``first`` to ``last`` on Postgres.
+
+    Each archive table is ``PARTITION BY RANGE (game_time)`` there, with
+    one ``<table>_<year>`` partition per year, so old years can be
+    detached or dropped without touching the rest. Other databases keep
+    each archive in one plain table and this does nothing.
+    """
+    if db.session.get_bind(mapper=Game.__mapper__).dialect.name != "postgresql":
+        return
+    for year in range(first.year, last.year + 1):
+        for _, archive in TIERS:
+            table = archive.__tablename__
+            db.session.execute(db.text(
+                f"CREATE TABLE IF NOT EXISTS {table}_{year} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+            ))
+
+
+def _copy(hot, archive, game_ids, now):
+    # INSERT ... SELECT of the hot rows for these games, adding game_time
+    if hot is Game:
+        columns = [column.name for column in Game.__table__.columns if column.name != "time"]
+        select = db.select(*(Game.__table__.c[name] for name in columns), Game.time, db.literal(now))
+        select = select.where(Game.id.in_(game_ids))
+        columns += ["game_time", "archived_at"]
+    else:
+        columns = [column.name for column in hot.__table__.columns]
+        select = db.select(*hot.__table__.columns, Game.time).join(Game, Game.id == hot.game_id)
+        select = select.where(hot.game_id.in_(game_ids))
+        columns.append("game_time")
+    db.session.execute(db.insert(archive).from_select(columns, select))
+
+
+def archive_batch(before, batch_size):
+    """Move up to ``batch_size`` games that started before ``before`` to the archive.
+
+    The oldest games go first, so every archived game is at least as old
+    as every game still in the hot tables. The games are locked ``FOR
+    UPDATE`` on Postgres, which holds off stats and rating writes for them
+    (their foreign key checks need a share lock) until the move commits;
+    after that those writes fail as for an unknown game. Career totals
+    don't change, as no stats or ratings are added or removed. Returns
+    the number of games moved; the batch is its own transaction.
+
+    SQLite hands out the highest deleted rowid again, so there the games
+    holding the highest game, stats and rating ids stay hot to keep ids
+    unique across both tiers.
+    """
+    query = db.session.query(Game.id, Game.time).filter(Game.time < before)
+    if db.session.get_bind(mapper=Game.__mapper__).dialect.name == "sqlite":
+        newest = {
+            db.session.query(db.func.max(Game.id)).scalar(),
+            db.session.query(PlayerStats.game_id).order_by(PlayerStats.id.desc()).limit(1).scalar(),
+            db.session.query(PlayerRating.game_id).order_by(PlayerRating.id.desc()).limit(1).scalar(),
+        }
+        # Empty tables give None, and NOT IN with a NULL matches nothing
+        newest.discard(None)
+        query = query.filter(Game.id.notin_(newest))
+    rows = query.order_by(Game.time, Game.id).limit(batch_size).with_for_update().all()
+    if not rows:
+        db.session.rollback()
+        return 0
+
+    game_ids = [game_id for game_id, _ in rows]
+    ensure_partitions(rows[0][1], rows[-1][1])
+    now = datetime.now()
+    for hot, archive in reversed(TIERS):
+        _copy(hot, archive, game_ids, now)
+    for hot, _ in TIERS:
+        key = hot.id if hot is Game else hot.game_id
+        db.session.execute(db.delete(hot).where(key.in_(game_ids)))
+    db.session.commit()
+    return len(game_ids)
+
+
+def archive_games(before, batch_size=500):
+    # Archive every game that started before `before`, one batch per transaction
+    total = 0
+    while True:
+        moved = archive_batch(before, batch_size)
+        total += moved
+        if moved < batch_size:
+            return total
@@ -0,0 +1,378 @@
+import itertools
+import json
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from flask import current_app
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import User, Court, Game, GamePlayer, GameSeries, PlayerStats, SeedRun
+from app.pagination import encode_cursor
+from app.series import STAMP_FORMAT, materialize
+
+# Volumes for `flask seed --preset` / `flask benchmark --preset`
+PRESETS = {
+    "small": {"users": 1000, "courts": 200, "games": 5000},
+    "medium": {"users": 10000, "courts": 2000, "games": 100000},
+    "large": {"users": 50000, "courts": 10000, "games": 500000},
+}
+
+# Endpoints deliberately left out of the default run; game_events is a
+# stream that stays open until the client goes away
+SKIPPED_ENDPOINTS = {"static", "game_events"}
+
+
+@dataclass
+class Scenario:
+    """One timed request, repeated for every iteration.
+
+    ``reset`` runs untimed before each request with the scenario's client,
+    for requests that change state the next iteration depends on (join
+    needs the player off the roster, logout needs a session). ``data`` may
+    be a callable returning a fresh form per request.
+    """
+    name: str
+    endpoint: str
+    url: str
+    method: str = "GET"
+    data: Optional[dict | Callable] = None
+    json: Optional[dict] = None
+    headers: dict = field(default_factory=dict)
+    expect: tuple = (200,)
+    reset: Optional[Callable] = None
+
+
+def _require_seeded_data():
+    # The scenarios write: box scores and ratings are resubmitted, and
+    # courts, games and series are created on every run
+    if db.session.query(SeedRun.id).first() is None:
+        raise RuntimeError("Refusing to benchmark a database that wasn't filled by `flask seed`; "
+                           "point DATABASE_URL at an empty or seeded database")
+
+
+def prepare_database(preset):
+    """Create missing tables and seed an empty database with ``preset``.
+
+    Returns True when data was seeded. Leaderboards are refreshed after
+    seeding so their routes have boards to read. A database that already
+    has users must have been seeded too (see ``SeedRun``), or this raises
+    ``RuntimeError`` rather than let the benchmark change real data.
+    """
+    from app.leaderboards import refresh_leaderboards
+    from app.seed import seed_database
+
+    db.create_all()
+    if db.session.query(User.id).first() is not None:
+        _require_seeded_data()
+        return False
+    seed_database(**PRESETS[preset])
+    refresh_leaderboards()
+    return True
+
+
+def build_scenarios():
+    """Pick ids from the loaded data and return ``(user_id, scenarios)``.
+
+    The benchmark user is a player on a game that already has a box score,
+    so the stats, rating and game-detail routes take their rostered paths.
+    The user also hosts a one-off upcoming series, created on first use in
+    a free slot, so listings expand an occurrence. Only seeded databases
+    are accepted, as for ``prepare_database``.
+    """
+    _require_seeded_data()
+    stats = PlayerStats.query.join(Game).filter(Game.player_count > 1).order_by(PlayerStats.id).first()
+    if stats is None:
+        raise RuntimeError("No games with rosters and stats; seed the database first")
+    game = db.session.get(Game, stats.game_id)
+    user = db.session.get(User, stats.user_id)
+    court = db.session.get(Court, game.court_id)
+    teammate_id = db.session.query(GamePlayer.user_id).filter(
+        GamePlayer.game_id == game.id, GamePlayer.user_id != user.id
+    ).limit(1).scalar()
+    open_game = Game.query.filter(
+        Game.time > datetime.now(), Game.player_count < Game.max_players,
+        ~Game.players.any(User.id == user.id)
+    ).order_by(Game.id).first()
+    if open_game is None:
+        raise RuntimeError("No upcoming game with a free spot to join")
+
+    near = f"lat={court.lat}&lng={court.lng}"
+    cursor = encode_cursor(game)
+    join_url, leave_url = f"/games/{open_game.id}/join", f"/games/{open_game.id}/leave"
+    box_score = {"user_id": user.id, "points": stats.points or 0,
+                 "rebounds": stats.rebounds or 0, "assists": stats.assists or 0}
+    slots = itertools.count()
+    # Past every game already at the court, including earlier runs' creates
+    latest = db.session.query(db.func.max(Game.time)).filter(Game.court_id == court.id).scalar()
+    first_slot = max(latest or datetime.now(), datetime.now() + timedelta(days=400)).replace(second=0, microsecond=0)
+
+    series = GameSeries.query.filter(
+        GameSeries.host_id == user.id, GameSeries.starts_at > datetime.now() + timedelta(hours=1)
+    ).order_by(GameSeries.id).first()
+    if series is None:
+        from app.extensions import court_schedule
+
+        day = (datetime.now() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        free = court_schedule.free_slots(court.id, day, day + timedelta(days=7), 90)
+        if not free:
+            raise RuntimeError("No free slot at the benchmark court for a series")
+        series = GameSeries(court_id=court.id, host_id=user.id, starts_at=free[0][0],
+                            rule="FREQ=DAILY;COUNT=1", duration_minutes=90, max_players=10)
+        db.session.add(series)
+        db.session.commit()
+    # Join needs a game id to leave again, so the occurrence is opened up front
+    occurrence_url = f"/series/{series.id}/{series.starts_at:{STAMP_FORMAT}}"
+    occurrence_game = materialize(series, series.starts_at)
+    if occurrence_game is None:
+        raise RuntimeError("The benchmark series occurrence could not be opened")
+    occurrence_leave_url = f"/games/{occurrence_game.id}/leave"
+
+    def new_game():
+        # A distinct future slot per request so repeated creates don't conflict
+        start = first_slot + timedelta(hours=3 * (next(slots) + 1))
+        return {"court_id": court.id, "time": f"{start:%Y-%m-%dT%H:%M}", "max_players": 10,
+                "duration_minutes": 90}
+
+    def new_series():
+        # A single-occurrence series in its own slot, so creates don't conflict
+        return dict(new_game(), rule="FREQ=WEEKLY;COUNT=1")
+
+    # /metrics is a 404 without a token outside debug and testing
+    token = current_app.config.get("METRICS_TOKEN")
+    metrics_auth = {"Authorization": f"Bearer {token}"} if token else {}
+    metrics_expect = (200,) if token or current_app.debug or current_app.testing else (404,)
+
+    def log_back_in(client):
+        with client.session_transaction() as sess:
+            sess["_user_id"] = str(user.id)
+            sess["_fresh"] = True
+
+    scenarios = [
+        Scenario("home", "home", "/", expect=(302,)),
+        Scenario("login", "login", "/login", "POST",
+                 data={"username": user.username, "password": "password"}, expect=(302,)),
+        Scenario("register (duplicate name)", "register", "/register", "POST",
+                 data={"username": user.username, "password": "password"}),
+        Scenario("logout", "logout", "/logout", expect=(302,), reset=log_back_in),
+        Scenario("dashboard", "dashboard", "/dashboard"),
+        Scenario("courts", "courts", "/courts"),
+        Scenario("nearest courts", "nearest_courts", f"/courts/nearest?{near}"),
+        Scenario("court free slots", "court_free_slots",
+                 f"/courts/{court.id}/free-slots?date={datetime.now() + timedelta(days=1):%Y-%m-%d}"),
+        Scenario("create court form", "create_court", "/courts/create"),
+        Scenario("create court", "create_court", "/courts/create", "POST",
+                 data={"name": "Bench Court", "address": "1 Bench St",
+                       "lat": str(court.lat), "lng": str(court.lng)}, expect=(302,)),
+        Scenario("games", "games", "/games"),
+        Scenario("games by court", "games", f"/games?court_id={court.id}"),
+        Scenario("games next page", "games", f"/games?cursor={cursor}"),
+        Scenario("nearby games", "nearby_games", f"/games/nearby?{near}"),
+        Scenario("nearby games page", "nearby_games", f"/games/nearby?{near}&limit=50"),
+        Scenario("nearby games stream", "nearby_games", f"/games/nearby?{near}&stream=1"),
+        Scenario("search games", "search_games", f"/games/search?{near}&min_spots=2&start_hour=17&end_hour=22"),
+        Scenario("create game form", "create_game", "/games/create"),
+        Scenario("create game", "create_game", "/games/create", "POST",
+                 data=new_game, expect=(302,)),
+        Scenario("create series form", "create_series", "/series/create"),
+        Scenario("create series", "create_series", "/series/create", "POST",
+                 data=new_series, expect=(302,)),
+        Scenario("series occurrence", "series_occurrence", occurrence_url, expect=(302,)),
+        Scenario("join series occurrence", "join_occurrence", f"{occurrence_url}/join", "POST", expect=(302,),
+                 reset=lambda client: client.post(occurrence_leave_url)),
+        Scenario("join game", "join_game", join_url, "POST", expect=(302,),
+                 reset=lambda client: client.post(leave_url)),
+        Scenario("leave game", "leave_game", leave_url, "POST", expect=(302,),
+                 reset=lambda client: client.post(join_url)),
+        Scenario("game detail", "game_detail", f"/games/{game.id}"),
+        Scenario("submit stats", "submit_stats", f"/games/{game.id}/stats", "POST",
+                 data=box_score, expect=(302,)),
+        Scenario("submit stats bulk", "submit_stats_bulk", f"/games/{game.id}/stats/bulk", "POST",
+                 json={"stats": [box_score]}),
+        Scenario("submit rating", "submit_rating", f"/games/{game.id}/rate", "POST",
+                 data={"to_user_id": teammate_id, "rating": 4}, expect=(302,)),
+        Scenario("submit rating bulk", "submit_rating_bulk", f"/games/{game.id}/rate/bulk", "POST",
+                 json={"ratings": [{"to_user_id": teammate_id, "rating": 4}]}),
+        Scenario("user profile", "user_profile", f"/users/{user.id}"),
+        Scenario("leaderboard", "leaderboard", "/leaderboards/points?window=all"),
+        Scenario("leaderboard by court", "leaderboard", f"/leaderboards/rating?court_id={court.id}"),
+        Scenario("api courts", "api.courts", "/api/v1/courts"),
+        Scenario("api court", "api.court", f"/api/v1/courts/{court.id}"),
+        Scenario("api games", "api.games", "/api/v1/games?fields=id,time,spots_available"),
+        Scenario("api game", "api.game", f"/api/v1/games/{game.id}"),
+        Scenario("api roster", "api.roster", f"/api/v1/games/{game.id}/roster"),
+        Scenario("api box score", "api.box_score", f"/api/v1/games/{game.id}/stats"),
+        Scenario("api profile", "api.profile", f"/api/v1/users/{user.id}"),
+        Scenario("metrics", "metrics", "/metrics", headers=metrics_auth, expect=metrics_expect),
+    ]
+    return user.id, scenarios
+
+
+def uncovered_endpoints(app, scenarios):
+    # Endpoints registered on the app that no scenario exercises
+    covered = {scenario.endpoint for scenario in scenarios}
+    return sorted({rule.endpoint for rule in app.url_map.iter_rules()} - covered - SKIPPED_ENDPOINTS)
+
+
+def percentile(sorted_values, pct):
+    # Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)]
+
+
+class _StatementCounter:
+    # Per-thread count of statements sent to the database
+    def __init__(self, engine):
+        self.engine = engine
+        self.local = threading.local()
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.local.count = getattr(self.local, "count", 0) + 1
+
+    def reset(self):
+        self.local.count = 0
+
+    @property
+    def count(self):
+        return getattr(self.local, "count", 0)
+
+
+def _run_scenario(app, user_id, scenario, iterations, warmup, concurrency, counter):
+    latencies = []
+    queries = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker(count):
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess["_user_id"] = str(user_id)
+            sess["_fresh"] = True
+        mine, my_queries = [], []
+        for i in range(warmup + count):
+            if scenario.reset:
+                scenario.reset(client)
+            counter.reset()
+            start = time.perf_counter()
+            data = scenario.data() if callable(scenario.data) else scenario.data
+            response = client.open(scenario.url, method=scenario.method, data=data,
+                                   json=scenario.json, headers=scenario.headers)
+            response.get_data()
+            elapsed = time.perf_counter() - start
+            if response.status_code not in scenario.expect:
+                with lock:
+                    errors.append(response.status_code)
+            if i >= warmup:
+                mine.append(elapsed)
+                my_queries.append(counter.count)
+        with lock:
+            latencies.extend(mine)
+            queries.extend(my_queries)
+
+    shares = [iterations // concurrency + (i < iterations % concurrency) for i in range(concurrency)]
+    threads = [threading.Thread(target=worker, args=(share,)) for share in shares if share]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "endpoint": scenario.endpoint,
+        "method": scenario.method,
+        "url": scenario.url,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        # Wall time includes warmup and resets, so this is a lower bound
+        "throughput_rps": round(len(latencies) / wall, 1) if wall else None,
+        "queries": round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+def run_benchmark(app, iterations=100, warmup=5, concurrency=1, only=()):
+    """Drive every scenario through the test client and collect timings.
+
+    Each scenario runs ``warmup`` untimed and ``iterations`` timed
+    requests, split across ``concurrency`` threads with a client each.
+    Returns a report dict ready to be written as a JSON baseline.
+    """
+    with app.app_context():
+        user_id, scenarios = build_scenarios()
+        engine = db.engine
+        dialect = engine.dialect.name
+        volumes = {model.__tablename__: db.session.query(model).count()
+                   for model in (User, Court, Game, GamePlayer, PlayerStats)}
+    missing = uncovered_endpoints(app, scenarios)
+    if only:
+        scenarios = [scenario for scenario in scenarios if scenario.name in only]
+
+    results = {}
+    with _StatementCounter(engine) as counter:
+        for scenario in scenarios:
+            results[scenario.name] = _run_scenario(
+                app, user_id, scenario, iterations, warmup, concurrency, counter
+            )
+
+    return {
+        "meta": {"created_at": datetime.now().isoformat(timespec="seconds"), "dialect": dialect,
+                 "iterations": iterations, "concurrency": concurrency, "volumes": volumes,
+                 "uncovered_endpoints": missing},
+        "routes": results,
+    }
+
+
+def compare_to_baseline(report, baseline, tolerance=0.25, min_delta_ms=1.0):
+    """List regressions of ``report`` against an earlier report.
+
+    A route regresses when its p95 grows by more than ``tolerance`` (and by
+    at least ``min_delta_ms``, so sub-millisecond noise is ignored) or when
+    it issues more queries per request than before.
+    """
+    regressions = []
+    for name, current in report["routes"].items():
+        previous = baseline.get("routes", {}).get(name)
+        if previous is None:
+            continue
+        if (current["p95_ms"] > previous["p95_ms"] * (1 + tolerance)
+                and current["p95_ms"] - previous["p95_ms"] >= min_delta_ms):
+            regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if (current["queries"] or 0) > (previous["queries"] or 0):
+            regressions.append(f"{name}: queries {previous['queries']} -> {current['queries']}")
+    return regressions
+
+
+def format_report(report):
+    lines = [f"{'route':<28} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8} {'queries':>8} {'errors':>6}"]
+    for name, row in report["routes"].items():
+        lines.append(f"{name:<28} {row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9} "
+                     f"{row['throughput_rps']:>8} {row['queries']:>8} {row['errors']:>6}")
+    return "\n".join(lines)
+
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_report(report, path):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from threading import Lock
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Bounded in-process cache with per-entry TTL and LRU eviction.
+
+    Entries live in this worker's memory only, so it is the fastest backend
+    but invalidations don't reach other processes; pair it with a short TTL
+    when running several workers.
+    """
+
+    def __init__(self, max_entries=1024, default_ttl=None):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires, value = entry
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class FileCache:
+    """Cache stored as JSON files in a local directory.
+
+    Every worker on the host reads and writes the same directory, so an
+    invalidation in one process is seen by all of them. Writes go through a
+    temporary file and ``os.replace`` so readers never see a partial entry.
+    Values must be JSON-serializable (tuples come back as lists). The
+    directory is created private to this user, and one owned by anyone
+    else or writable by others is refused.
+    """
+
+    def __init__(self, directory, default_ttl=None):
+        self.directory = directory
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        info = os.stat(directory)
+        if info.st_uid != os.getuid() or info.st_mode & 0o022:
+            raise ValueError(f"Cache directory {directory!r} must be owned by this user and not writable by others")
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest())
+
+    def get(self, key, default=None):
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                expires, value = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return default
+        if expires is not None and expires <= time.time():
+            self.delete(key)
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        expires = time.time() + ttl if ttl else None
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump([expires, value], f)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+
+class Cache:
+    """Application cache, backed by ``LRUCache`` or ``FileCache``.
+
+    ``CACHE_BACKEND`` selects ``"memory"`` (default) or ``"filesystem"``;
+    the latter stores entries under ``CACHE_DIR``, which must be set, and
+    is shared by every worker on the host.
+    """
+
+    def __init__(self):
+        self.backend = LRUCache()
+
+    def init_app(self, app):
+        backend = app.config.get("CACHE_BACKEND", "memory")
+        default_ttl = app.config.get("CACHE_DEFAULT_TTL", 300)
+        if backend == "memory":
+            self.backend = LRUCache(app.config.get("CACHE_MAX_ENTRIES", 1024), default_ttl)
+        elif backend == "filesystem":
+            directory = app.config.get("CACHE_DIR")
+            if not directory:
+                raise ValueError("CACHE_BACKEND 'filesystem' needs CACHE_DIR")
+            self.backend = FileCache(directory, default_ttl)
+        else:
+            raise ValueError(f"Unknown CACHE_BACKEND: {backend!r}")
+
+    def get(self, key, default=None):
+        return self.backend.get(key, default)
+
+    def set(self, key, value, ttl=None):
+        self.backend.set(key, value, ttl)
+
+    def delete(self, key):
+        self.backend.delete(key)
+
+    def clear(self):
+        self.backend.clear()
+
+    def get_or_set(self, key, compute, ttl=None):
+        # Return the cached value, computing and storing it on a miss
+        value = self.backend.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.backend.set(key, value, ttl)
+        return value
@@ -0,0 +1,119 @@
+import click
+
+
+def register_commands(app):
+    # Maintenance commands, run as `flask --app manage.py <command>`
+
+    @app.cli.command("rebuild-career-totals")
+    def rebuild_career_totals_command():
+        """Recompute player_career_totals from stats and ratings."""
+        from app.aggregates import rebuild_career_totals
+
+        count = rebuild_career_totals()
+        click.echo(f"Rebuilt career totals for {count} players.")
+
+    @app.cli.command("archive-games")
+    @click.option("--older-than-days", type=click.IntRange(min=1),
+                  help="Archive games that started at least this many days ago (default: ARCHIVE_AFTER_DAYS, 90).")
+    @click.option("--batch-size", default=500, show_default=True, help="Games moved per transaction.")
+    def archive_games_command(older_than_days, batch_size):
+        """Move finished games and their rosters, stats and ratings to the archive tables."""
+        from datetime import datetime, timedelta
+
+        from app.archive import archive_games
+
+        days = older_than_days or app.config.get("ARCHIVE_AFTER_DAYS", 90)
+        count = archive_games(datetime.now() - timedelta(days=days), batch_size)
+        click.echo(f"Archived {count} games older than {days} days.")
+
+    @app.cli.command("refresh-leaderboards")
+    def refresh_leaderboards_command():
+        """Rebuild the leaderboard tables; run from cron or a scheduler."""
+        from app.leaderboards import refresh_leaderboards
+
+        count = refresh_leaderboards()
+        click.echo(f"Wrote {count} leaderboard entries.")
+
+    @app.cli.command("run-worker")
+    @click.option("--batch-size", default=100, show_default=True, help="Jobs claimed per round.")
+    @click.option("--poll-interval", default=1.0, show_default=True, help="Seconds to sleep when idle.")
+    @click.option("--once", is_flag=True, help="Exit once no jobs are due instead of polling.")
+    def run_worker_command(batch_size, poll_interval, once):
+        """Run queued background jobs."""
+        from app.extensions import jobs
+
+        click.echo("Worker started.")
+        try:
+            jobs.work(batch_size, poll_interval, once)
+        except KeyboardInterrupt:
+            pass
+        click.echo("Worker stopped.")
+
+    @app.cli.command("seed")
+    @click.option("--users", default=1000, show_default=True)
+    @click.option("--courts", default=200, show_default=True)
+    @click.option("--games", default=5000, show_default=True)
+    @click.option("--preset", type=click.Choice(["small", "medium", "large"]),
+                  help="Use a benchmark volume preset instead of the counts above.")
+    def seed_command(users, courts, games, preset):
+        """Fill an empty database with synthetic data."""
+        from app.benchmark import PRESETS
+        from app.seed import seed_database
+
+        if preset:
+            users, courts, games = (PRESETS[preset][key] for key in ("users", "courts", "games"))
+        seed_database(users=users, courts=courts, games=games)
+        click.echo(f"Seeded {users} users, {courts} courts and {games} games.")
+
+    @app.cli.command("check-query-plans")
+    def check_query_plans_command():
+        """EXPLAIN each read route's queries and fail on full table scans."""
+        from app.query_plans import check_query_plans
+
+        failures = check_query_plans(app)
+        for url, table, statement in failures:
+            click.echo(f"FULL SCAN on {table} for GET {url}:\n    {' '.join(statement.split())}")
+        if failures:
+            raise SystemExit(1)
+        click.echo("No full table scans.")
+
+    @app.cli.command("benchmark")
+    @click.option("--preset", type=click.Choice(["small", "medium", "large"]), default="small",
+                  show_default=True, help="Volumes to seed if the database is empty.")
+    @click.option("--iterations", default=100, show_default=True, help="Timed requests per route.")
+    @click.option("--warmup", default=5, show_default=True, help="Untimed requests per route.")
+    @click.option("--concurrency", default=1, show_default=True, help="Client threads per route.")
+    @click.option("--route", "routes", multiple=True, help="Only run the named scenario(s).")
+    @click.option("--output", type=click.Path(dir_okay=False), help="Write the report as JSON.")
+    @click.option("--baseline", type=click.Path(exists=True, dir_okay=False),
+                  help="Fail if any route regressed against this JSON report.")
+    @click.option("--tolerance", default=0.25, show_default=True, help="Allowed p95 growth vs baseline.")
+    def benchmark_command(preset, iterations, warmup, concurrency, routes, output, baseline, tolerance):
+        """Time every route and report p50/p95/p99, req/s and queries."""
+        from app.benchmark import (
+            compare_to_baseline, format_report, load_report, prepare_database, run_benchmark, save_report,
+        )
+
+        with app.app_context():
+            if prepare_database(preset):
+                click.echo(f"Seeded the {preset} preset.")
+
+        report = run_benchmark(app, iterations, warmup, concurrency, routes)
+        click.echo(format_report(report))
+        if report["meta"]["uncovered_endpoints"]:
+            click.echo("No scenario for: " + ", ".join(report["meta"]["uncovered_endpoints"]))
+        if output:
+            save_report(report, output)
+            click.echo(f"Wrote {output}")
+
+        if baseline:
+            previous = load_report(baseline)
+            for key in ("dialect", "concurrency"):
+                if previous["meta"].get(key) != report["meta"][key]:
+                    click.echo(f"Warning: baseline {key} was {previous['meta'].get(key)}, "
+                               f"this run has {report['meta'][key]}")
+            regressions = compare_to_baseline(report, previous, tolerance)
+            for regression in regressions:
+                click.echo(f"REGRESSION {regression}")
+            if regressions:
+                raise SystemExit(1)
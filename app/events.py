@@ -0,0 +1,216 @@
+import json
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from flask import Response
+from sqlalchemy import event
+
+PG_CHANNEL = "game_events"
+RETRY_MS = 3000  # How long browsers wait before reconnecting a dropped stream
+
+
+def _encode(payload):
+    return json.dumps(payload, separators=(",", ":"))
+
+
+class Subscription:
+    # One open stream: pending messages, plus a flag set when some were dropped
+    def __init__(self, size):
+        self.queue = queue.Queue(size)
+        self.overflowed = False
+
+
+class LocalBus:
+    """Fans messages out to the subscribers in this process.
+
+    A subscriber whose queue fills up is marked overflowed instead of
+    blocking the publisher; its stream then tells the browser to resync.
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = Subscription(self.queue_size)
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, channel, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+    def dispatch(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(message)
+            except queue.Full:
+                subscription.overflowed = True
+
+    def resync_all(self):
+        with self._lock:
+            for subscribers in self._subscribers.values():
+                for subscription in subscribers:
+                    subscription.overflowed = True
+
+
+class PostgresBus(LocalBus):
+    """``LocalBus`` fed by Postgres LISTEN/NOTIFY.
+
+    Every process runs one listener thread on its own connection, started
+    by the first subscriber, so a commit in any worker reaches the streams
+    open in all of them. If the listener loses its connection, every open
+    stream is told to resync once it reconnects.
+    """
+
+    def __init__(self, queue_size=100, logger=None):
+        super().__init__(queue_size)
+        self.logger = logger
+        self._listener = None
+
+    def start(self, engine):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, args=(engine,),
+                                                  name="game-events-listener", daemon=True)
+                self._listener.start()
+
+    def _listen(self, engine):
+        # Connect outside the pool: this connection is held for the process lifetime
+        cargs, cparams = engine.dialect.create_connect_args(engine.url)
+        reconnecting = False
+        while True:
+            try:
+                conn = engine.dialect.connect(*cargs, **cparams)
+                try:
+                    conn.autocommit = True
+                    conn.execute(f"LISTEN {PG_CHANNEL}")
+                    if reconnecting:
+                        self.resync_all()
+                    for notify in conn.notifies():
+                        message = json.loads(notify.payload)
+                        self.dispatch(message["game_id"], message)
+                finally:
+                    conn.close()
+            except Exception as exc:
+                if self.logger is not None:
+                    self.logger.warning("Game event listener lost its connection: %s", exc)
+            reconnecting = True
+            time.sleep(1)
+
+
+class EventBroker:
+    """Per-game pub/sub behind the ``/games/<id>/events`` SSE streams.
+
+    Write paths call ``publish`` before committing. Subscribers see the
+    message only if that transaction commits, so a rolled-back join never
+    reaches a browser.
+
+    ``EVENTS_BACKEND`` picks the transport. ``"memory"`` (the default)
+    hands messages to streams in the same process on commit, which is
+    enough for a single worker or local development. ``"postgres"`` sends
+    them with NOTIFY inside the transaction and listens in every process,
+    so it works with any number of workers. ``EVENTS_HEARTBEAT_SECONDS``
+    (default 15) spaces the keep-alive comments that detect closed
+    connections. ``EVENTS_QUEUE_SIZE`` (default 100) is how far a stream
+    may fall behind before it is told to resync.
+
+    Each open stream holds a server thread, so run the app with enough
+    threads (e.g. gunicorn ``--threads``) for the expected viewers.
+    """
+
+    def __init__(self):
+        self.backend = "memory"
+        self.heartbeat = 15
+        self.bus = LocalBus()
+
+    def init_app(self, app):
+        from app.extensions import db
+
+        self.backend = app.config.get("EVENTS_BACKEND", "memory")
+        self.heartbeat = app.config.get("EVENTS_HEARTBEAT_SECONDS", self.heartbeat)
+        queue_size = app.config.get("EVENTS_QUEUE_SIZE", 100)
+        if self.backend == "memory":
+            self.bus = LocalBus(queue_size)
+        elif self.backend == "postgres":
+            self.bus = PostgresBus(queue_size, app.logger)
+        else:
+            raise ValueError(f"Unknown EVENTS_BACKEND: {self.backend!r}")
+        if not event.contains(db.session, "after_commit", _deliver_pending):
+            event.listen(db.session, "after_commit", _deliver_pending)
+            event.listen(db.session, "after_rollback", _discard_pending)
+
+    def publish(self, game_id, name, data):
+        """Queue event ``name`` for the game's streams; sent when the session commits."""
+        from app.extensions import db
+
+        message = {"game_id": game_id, "event": name, "data": data}
+        if self.backend == "postgres":
+            # NOTIFY is transactional: delivered on commit, dropped on rollback
+            db.session.execute(db.select(db.func.pg_notify(PG_CHANNEL, _encode(message))))
+        else:
+            # Rollback only fires after_rollback inside a transaction, so open
+            # one if nothing has touched the database yet
+            if not db.session().in_transaction():
+                db.session.begin()
+            db.session.info.setdefault("pending_events", []).append((self.bus, message))
+
+    def stream(self, game_id):
+        """Return a ``text/event-stream`` response of the game's events."""
+        if isinstance(self.bus, PostgresBus):
+            from app.extensions import db
+            self.bus.start(db.engine)
+
+        bus, heartbeat = self.bus, self.heartbeat
+        subscription = bus.subscribe(game_id)
+
+        def generate():
+            try:
+                yield f"retry: {RETRY_MS}\n\n"
+                while True:
+                    try:
+                        message = subscription.queue.get(timeout=heartbeat)
+                    except queue.Empty:
+                        message = None
+                    if subscription.overflowed:
+                        yield "event: resync\ndata: {}\n\n"
+                        return
+                    if message is None:
+                        yield ": keep-alive\n\n"
+                    else:
+                        yield f"event: {message['event']}\ndata: {_encode(message['data'])}\n\n"
+            finally:
+                bus.unsubscribe(game_id, subscription)
+
+        return Response(generate(), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def _deliver_pending(db_session):
+    for bus, message in db_session.info.pop("pending_events", ()):
+        bus.dispatch(message["game_id"], message)
+
+
+def _discard_pending(db_session):
+    db_session.info.pop("pending_events", None)
+
+
+def publish_roster_change(game_id, user, joined):
+    # Called by join/leave before they commit; sends and returns the new head count
+    from app.extensions import db, events
+    from app.models import Game
+
+    player_count = db.session.scalar(db.select(Game.player_count).where(Game.id == game_id))
+    events.publish(game_id, "roster", {"user_id": user.id, "username": user.username,
+                                       "joined": joined, "player_count": player_count})
+    return player_count
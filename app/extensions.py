@@ -1,7 +1,29 @@
-from flask_sqlalchemy import SQLAlchemy
-from flask_migrate    import Migrate
-from flask_login      import LoginManager
+from flask_sqlalchemy    import SQLAlchemy
+from flask_migrate       import Migrate
+from flask_login         import LoginManager
+from app.spatial         import CourtIndex
+from app.cache           import Cache
+from app.events          import EventBroker
+from app.fragments       import FragmentCache
+from app.identity        import IdentityCache
+from app.hashing         import PasswordHasher
+from app.instrumentation import Instrumentation
+from app.jobs            import JobQueue
+from app.routing         import DatabaseRouter, RoutingSession
+from app.schedule        import CourtSchedule
+from app.search          import GameIndex
 
-db          = SQLAlchemy()     # ORM
-migrate     = Migrate()        # Alembic migrations
-login_mgr   = LoginManager()   # User session management
+db              = SQLAlchemy(session_options={"class_": RoutingSession})  # ORM
+migrate         = Migrate()          # Alembic migrations
+login_mgr       = LoginManager()     # User session management
+court_index     = CourtIndex()       # Grid index for nearby-court lookups
+game_index      = GameIndex()        # Upcoming games by hour and grid cell, for search
+court_schedule  = CourtSchedule()    # Per-court game intervals for conflicts and free slots
+cache           = Cache()            # Shared cache for rarely-changing data
+fragments       = FragmentCache()    # Rendered template fragments, stored in cache
+identity_cache  = IdentityCache()    # Snapshots of logged-in users for load_user
+hasher          = PasswordHasher()   # Password hashing off the request thread
+instrumentation = Instrumentation()  # Request timing, SQL counters and /metrics
+db_router       = DatabaseRouter()   # Replica reads and per-route statement timeouts
+jobs            = JobQueue()         # Database-backed background jobs
+events          = EventBroker()      # Per-game pub/sub behind the SSE streams
\ No newline at end of file
@@ -0,0 +1,62 @@
+import hashlib
+import time
+
+from markupsafe import Markup
+
+
+class FragmentCache:
+    """Caches rendered pieces of templates in the app cache.
+
+    Templates wrap a block in ``{% call cache_fragment(name, *key) %}``;
+    the block is rendered once per distinct key and served from ``cache``
+    afterwards. Keys should name the entities shown plus something that
+    moves when they change (a row's ``updated_at``, a content hash, or
+    ``fragment_version(name)`` for collections bumped with ``touch``).
+    Cached blocks must not read ``current_user`` or anything else that
+    differs between viewers; render those parts outside the call.
+
+    ``FRAGMENT_CACHE`` (default on) switches it off, and
+    ``FRAGMENT_CACHE_TTL`` (default 600) bounds how long an entry lives,
+    which also bounds staleness after a template change on a shared
+    cache backend.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.ttl = 600
+
+    def init_app(self, app):
+        self.enabled = app.config.get("FRAGMENT_CACHE", self.enabled)
+        self.ttl = app.config.get("FRAGMENT_CACHE_TTL", self.ttl)
+        app.add_template_global(self.cache_fragment, "cache_fragment")
+        app.add_template_global(self.version, "fragment_version")
+
+    def cache_fragment(self, name, *key, caller):
+        if not self.enabled:
+            return caller()
+        from app.extensions import cache
+
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        cache_key = f"fragment:{name}:{digest}"
+        html = cache.get(cache_key)
+        if html is None:
+            html = str(caller())
+            cache.set(cache_key, html, self.ttl)
+        return Markup(html)
+
+    def version(self, name):
+        """Return the current stamp for ``name``, for use in fragment keys."""
+        from app.extensions import cache
+
+        stamp = cache.get(f"fragment-version:{name}")
+        if stamp is None:
+            stamp = self.touch(name)
+        return stamp
+
+    def touch(self, name):
+        # Start a new version; fragments keyed on the old one are never read again
+        from app.extensions import cache
+
+        stamp = time.time_ns()
+        cache.set(f"fragment-version:{name}", stamp, 0)
+        return stamp
@@ -0,0 +1,98 @@
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from threading import BoundedSemaphore, Lock
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing pool's queue is full or a job times out."""
+
+
+class PasswordHasher:
+    """Password hashing on a bounded process pool.
+
+    scrypt/pbkdf2 are deliberately slow, so running them on the request
+    thread lets a burst of logins tie up every worker. Here they run in
+    ``PASSWORD_HASH_WORKERS`` separate processes; at most
+    ``PASSWORD_HASH_QUEUE_DEPTH`` jobs may wait for them, and anything
+    beyond that fails fast with ``HashingBusy`` instead of queueing. A job
+    keeps its slot until it finishes, even after its caller timed out. If
+    a pool process dies, the pool is replaced on the next call.
+    With ``PASSWORD_HASH_WORKERS = 0`` hashing runs inline.
+
+    ``PASSWORD_HASH_METHOD`` is any Werkzeug method string, e.g.
+    ``"scrypt:32768:8:1"`` or ``"pbkdf2:sha256:600000"``; hashes made with
+    other parameters report ``needs_rehash``.
+    """
+
+    def __init__(self):
+        self.method = "scrypt"
+        self.salt_length = 16
+        self.workers = 2
+        self.timeout = 10
+        self._slots = None
+        self._pool = None
+        self._prefix = None
+        self._lock = Lock()
+
+    def init_app(self, app):
+        self.method = app.config.get("PASSWORD_HASH_METHOD", self.method)
+        self.salt_length = app.config.get("PASSWORD_HASH_SALT_LENGTH", self.salt_length)
+        self.workers = app.config.get("PASSWORD_HASH_WORKERS", self.workers)
+        self.timeout = app.config.get("PASSWORD_HASH_TIMEOUT", self.timeout)
+        queue_depth = app.config.get("PASSWORD_HASH_QUEUE_DEPTH", 16)
+        self._slots = BoundedSemaphore(self.workers + queue_depth) if self.workers else None
+        self._prefix = None
+
+    def _get_pool(self):
+        # Created on first use so each server worker process gets its own pool
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def _discard_pool(self, pool):
+        # Drop a broken pool; its queued jobs fail and give back their slots
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise HashingBusy("Too many password hashes in flight")
+        pool = self._get_pool()
+        try:
+            future = pool.submit(fn, *args)
+        except BaseException as exc:
+            slots.release()
+            if isinstance(exc, BrokenProcessPool):
+                self._discard_pool(pool)
+                raise HashingBusy("Password hashing pool crashed") from exc
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError as exc:
+            future.cancel()  # Frees the slot now if the job hasn't started
+            raise HashingBusy("Password hashing timed out") from exc
+        except BrokenProcessPool as exc:
+            self._discard_pool(pool)
+            raise HashingBusy("Password hashing pool crashed") from exc
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        # Compare against the "method:params" prefix Werkzeug writes for the
+        # configured method, which also fills in its default parameters
+        if self._prefix is None:
+            self._prefix = generate_password_hash("", self.method, 1).split("$", 1)[0]
+        return password_hash.split("$", 1)[0] != self._prefix
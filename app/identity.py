@@ -0,0 +1,81 @@
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+
+from app.cache import LRUCache
+
+
+class UserSnapshot(UserMixin):
+    """Detached, read-only stand-in for ``User`` used as ``current_user``.
+
+    Carries only the columns request handlers read. ``UserMixin`` compares
+    by id, so ``current_user in game.players`` still works against real
+    ``User`` rows.
+    """
+
+    def __init__(self, id, username, email):
+        self.id = id
+        self.username = username
+        self.email = email
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.username, user.email)
+
+    def __repr__(self):
+        return f"<UserSnapshot {self.id} {self.username!r}>"
+
+
+class IdentityCache:
+    """Bounded TTL cache of ``UserSnapshot`` objects for the user_loader.
+
+    Saves the users-table lookup Flask-Login otherwise runs on every
+    authenticated request. Entries are dropped on logout and after any
+    commit that updates or deletes the user; other workers pick up such
+    changes when ``IDENTITY_CACHE_TTL`` expires.
+    """
+
+    def __init__(self, max_entries=10000, ttl=60):
+        self._cache = LRUCache(max_entries, ttl)
+
+    def init_app(self, app):
+        from app.extensions import db
+        from app.models import User
+
+        self._cache = LRUCache(
+            app.config.get("IDENTITY_CACHE_SIZE", self._cache.max_entries),
+            app.config.get("IDENTITY_CACHE_TTL", self._cache.default_ttl)
+        )
+        if not event.contains(User, "after_update", _mark_stale):
+            event.listen(User, "after_update", _mark_stale)
+            event.listen(User, "after_delete", _mark_stale)
+            event.listen(db.session, "after_commit", self._flush_stale)
+
+    def load(self, user_id):
+        from app.extensions import db
+        from app.models import User
+
+        snapshot = self._cache.get(user_id)
+        if snapshot is None:
+            user = db.session.get(User, user_id)
+            if user is None:
+                return None
+            snapshot = UserSnapshot.from_user(user)
+            self._cache.set(user_id, snapshot)
+        return snapshot
+
+    def invalidate(self, user_id):
+        self._cache.delete(user_id)
+
+    def stats(self):
+        return {"hits": self._cache.hits, "misses": self._cache.misses, "size": len(self._cache)}
+
+    def _flush_stale(self, session):
+        for user_id in session.info.pop("stale_user_ids", ()):
+            self.invalidate(user_id)
+
+
+def _mark_stale(mapper, connection, target):
+    # Invalidate only once the change is committed, so a concurrent request
+    # can't re-cache the old row between flush and commit
+    object_session(target).info.setdefault("stale_user_ids", set()).add(target.id)
@@ -0,0 +1,224 @@
+import heapq
+import random
+import time
+from collections import defaultdict
+from threading import Lock
+
+from flask import Response, abort, current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Upper bounds, in seconds, of the request duration histogram
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class RequestStats:
+    # SQL activity of one request, filled in by the engine event hooks
+
+    def __init__(self, keep_slowest):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.keep_slowest = keep_slowest
+        self.slowest = []  # min-heap of (seconds, seq, statement, parameters)
+        self.explain = []  # (engine, statement, parameters) picked for EXPLAIN
+
+    def record(self, elapsed, statement, parameters, rows):
+        self.queries += 1
+        self.db_time += elapsed
+        if rows > 0:
+            self.rows += rows
+        entry = (elapsed, self.queries, statement, parameters)
+        if len(self.slowest) < self.keep_slowest:
+            heapq.heappush(self.slowest, entry)
+        elif self.slowest and elapsed > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+
+class Instrumentation:
+    """Per-request timing and SQL counters, exported for Prometheus.
+
+    SQLAlchemy cursor events attribute every statement to the request that
+    ran it; Flask request hooks fold each request into per-endpoint totals
+    served as text at ``/metrics`` and, with ``SERVER_TIMING`` (default
+    on), summarised in a ``Server-Timing`` response header. Counters are
+    kept per process, so scrape every worker.
+
+    ``SLOW_QUERY_MS`` logs statements slower than that many milliseconds;
+    a ``SLOW_QUERY_EXPLAIN_RATE`` fraction of the slow SELECTs is also
+    EXPLAINed once the response has been sent. ``SLOW_REQUEST_MS`` logs
+    requests over that time with their slowest statements.
+    ``/metrics`` requires ``Authorization: Bearer <METRICS_TOKEN>``;
+    without a token it is only served in debug and testing, and is a 404
+    everywhere else.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._requests = defaultdict(int)       # (endpoint, method, status) -> count
+        self._durations = defaultdict(lambda: [0] * (len(DURATION_BUCKETS) + 1))
+        self._duration_sum = defaultdict(float)  # endpoint -> seconds
+        self._queries = defaultdict(int)         # endpoint -> statements
+        self._db_time = defaultdict(float)       # endpoint -> seconds
+        self._rows = defaultdict(int)            # endpoint -> rows reported by the driver
+
+    def init_app(self, app):
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.add_url_rule("/metrics", "metrics", self._metrics_view)
+        if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+            event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+            event.listen(Engine, "handle_error", _handle_error)
+
+    def _start_request(self):
+        g.request_stats = RequestStats(current_app.config.get("SLOW_REQUEST_STATEMENTS", 3))
+
+    def _finish_request(self, response):
+        stats = g.pop("request_stats", None)
+        if stats is None:
+            return response
+        total = time.perf_counter() - stats.started
+        endpoint = request.endpoint or "unmatched"
+        self._observe(endpoint, request.method, response.status_code, total, stats)
+
+        config = current_app.config
+        if config.get("SERVER_TIMING", True):
+            response.headers.add(
+                "Server-Timing",
+                f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries", '
+                f"app;dur={(total - stats.db_time) * 1000:.1f}, total;dur={total * 1000:.1f}"
+            )
+
+        slow_request_ms = config.get("SLOW_REQUEST_MS")
+        if slow_request_ms is not None and total * 1000 >= slow_request_ms:
+            slowest = "".join(
+                f"\n    {elapsed * 1000:.1f}ms {' '.join(statement.split())}"
+                for elapsed, _, statement, _ in sorted(stats.slowest, reverse=True)
+            )
+            current_app.logger.warning("Slow request %s %s: %.1fms, %d queries, %.1fms in db%s",
+                                       request.method, request.path, total * 1000,
+                                       stats.queries, stats.db_time * 1000, slowest)
+
+        if stats.explain:
+            # Run after the body is sent so the client doesn't wait for it
+            logger = current_app.logger
+            response.call_on_close(lambda: _explain(logger, stats.explain))
+        return response
+
+    def _observe(self, endpoint, method, status, total, stats):
+        with self._lock:
+            self._requests[endpoint, method, status] += 1
+            buckets = self._durations[endpoint]
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if total <= bound:
+                    buckets[i] += 1
+                    break
+            else:
+                buckets[-1] += 1
+            self._duration_sum[endpoint] += total
+            self._queries[endpoint] += stats.queries
+            self._db_time[endpoint] += stats.db_time
+            self._rows[endpoint] += stats.rows
+
+    def render(self):
+        """Return every counter in the Prometheus text exposition format."""
+        from app.extensions import cache, identity_cache
+
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        with self._lock:
+            metric("http_requests_total", "counter", "Requests handled, by endpoint, method and status.",
+                   [({"endpoint": e, "method": m, "status": s}, n)
+                    for (e, m, s), n in sorted(self._requests.items())])
+
+            lines.append("# HELP http_request_duration_seconds Request handling time.")
+            lines.append("# TYPE http_request_duration_seconds histogram")
+            for endpoint, buckets in sorted(self._durations.items()):
+                cumulative = 0
+                for bound, count in zip(DURATION_BUCKETS + ("+Inf",), buckets):
+                    cumulative += count
+                    lines.append(f'http_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} '
+                                 f'{cumulative}')
+                lines.append(f'http_request_duration_seconds_sum{{endpoint="{endpoint}"}} '
+                             f'{self._duration_sum[endpoint]:.6f}')
+                lines.append(f'http_request_duration_seconds_count{{endpoint="{endpoint}"}} {cumulative}')
+
+            metric("db_queries_total", "counter", "SQL statements run while handling requests.",
+                   [({"endpoint": e}, n) for e, n in sorted(self._queries.items())])
+            metric("db_query_seconds_total", "counter", "Time spent in SQL statements.",
+                   [({"endpoint": e}, f"{t:.6f}") for e, t in sorted(self._db_time.items())])
+            metric("db_rows_total", "counter", "Rows returned or affected, where the driver reports it.",
+                   [({"endpoint": e}, n) for e, n in sorted(self._rows.items())])
+
+        identity = identity_cache.stats()
+        metric("identity_cache_hits_total", "counter", "user_loader lookups served from cache.",
+               [({}, identity["hits"])])
+        metric("identity_cache_misses_total", "counter", "user_loader lookups that hit the database.",
+               [({}, identity["misses"])])
+        metric("identity_cache_entries", "gauge", "Users held in the identity cache.",
+               [({}, identity["size"])])
+        metric("app_cache_hits_total", "counter", "Application cache hits.", [({}, cache.backend.hits)])
+        metric("app_cache_misses_total", "counter", "Application cache misses.", [({}, cache.backend.misses)])
+        return "\n".join(lines) + "\n"
+
+    def _metrics_view(self):
+        token = current_app.config.get("METRICS_TOKEN")
+        if not token:
+            if not (current_app.debug or current_app.testing):
+                abort(404)
+        elif request.headers.get("Authorization") != f"Bearer {token}":
+            abort(403)
+        return Response(self.render(), mimetype="text/plain; version=0.0.4")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    stats = g.get("request_stats") if has_app_context() else None
+    if stats is None:
+        return
+    stats.record(elapsed, statement, parameters, cursor.rowcount)
+
+    config = current_app.config
+    threshold = config.get("SLOW_QUERY_MS")
+    if threshold is None or elapsed * 1000 < threshold:
+        return
+    current_app.logger.warning("Slow query (%.1fms) on %s: %s",
+                               elapsed * 1000, request.endpoint, " ".join(statement.split()))
+    if (not executemany and statement.lstrip().upper().startswith("SELECT")
+            and random.random() < config.get("SLOW_QUERY_EXPLAIN_RATE", 0.1)):
+        stats.explain.append((conn.engine, statement, parameters))
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    started = context.connection.info.get("query_started") if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+def _explain(logger, statements):
+    # EXPLAIN on a separate connection; failures are logged, never raised
+    for engine, statement, parameters in statements:
+        prefix = "EXPLAIN " if engine.dialect.name == "postgresql" else "EXPLAIN QUERY PLAN "
+        try:
+            with engine.connect() as conn:
+                plan = conn.exec_driver_sql(prefix + statement, parameters).fetchall()
+                conn.rollback()
+        except Exception as exc:
+            logger.warning("EXPLAIN failed for slow query: %s", exc)
+            continue
+        logger.warning("Plan for slow query %s\n    %s", " ".join(statement.split()),
+                       "\n    ".join(" ".join(str(col) for col in row) for row in plan))
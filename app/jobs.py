@@ -0,0 +1,149 @@
+import os
+import socket
+import time
+import traceback
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+
+class JobQueue:
+    """Database-backed queue for work that shouldn't hold up a response.
+
+    Routes call ``enqueue`` inside their own transaction, so a job exists
+    exactly when the write that needed it was committed; ``flask
+    run-worker`` then claims due jobs and runs the handler registered for
+    each name. Jobs enqueued with the same ``key`` while one is still
+    pending are coalesced into it. Failures are retried with exponential
+    backoff (``JOB_RETRY_BASE_SECONDS``, default 5) up to the job's
+    ``max_attempts``, then left with status ``failed``. Jobs claimed by a
+    worker that died are picked up again after ``JOB_LOCK_TIMEOUT``
+    seconds (default 300).
+
+    Jobs suit work that may run late and in any process, such as the
+    leaderboard rebuild. The write routes' other follow-ups stay inline:
+    game index and court schedule updates touch this process's memory,
+    which a worker can't reach (other processes catch up on their own
+    syncs), and events and career totals ride in the write's transaction
+    so they commit or roll back with it.
+    """
+
+    def __init__(self):
+        self.handlers = {}
+        self.retry_base = 5
+        self.lock_timeout = 300
+
+    def init_app(self, app):
+        self.retry_base = app.config.get("JOB_RETRY_BASE_SECONDS", self.retry_base)
+        self.lock_timeout = app.config.get("JOB_LOCK_TIMEOUT", self.lock_timeout)
+
+    def handler(self, name, batch=False):
+        """Register the function that runs jobs called ``name``.
+
+        Batch handlers receive a list with the payloads of every due job of
+        that name claimed together; others are called once per payload.
+        """
+        def decorator(fn):
+            self.handlers[name] = (fn, batch)
+            return fn
+        return decorator
+
+    def enqueue(self, name, payload=None, key=None, delay=0, max_attempts=5):
+        """Add a job to the current transaction; the caller commits.
+
+        With ``key``, nothing is added if a job with that key is still
+        waiting to run, so a burst of writes produces one job.
+        """
+        from app.extensions import db
+        from app.models import Job
+        from app.upsert import upsert
+
+        now = datetime.now()
+        row = {"name": name, "payload": payload or {}, "dedupe_key": key, "status": "queued",
+               "attempts": 0, "max_attempts": max_attempts,
+               "run_at": now + timedelta(seconds=delay), "created_at": now}
+        if key is None:
+            db.session.execute(db.insert(Job), [row])
+        else:
+            upsert(Job, [row], ["dedupe_key"])
+
+    def claim(self, worker_id, limit):
+        # Lock up to `limit` due jobs; SKIP LOCKED lets workers run side by side
+        from app.extensions import db
+        from app.models import Job
+
+        now = datetime.now()
+        stale = now - timedelta(seconds=self.lock_timeout)
+        jobs = Job.query.filter(db.or_(
+            db.and_(Job.status == "queued", Job.run_at <= now),
+            db.and_(Job.status == "running", Job.locked_at < stale),
+        )).order_by(Job.run_at, Job.id).limit(limit).with_for_update(skip_locked=True).all()
+
+        for job in jobs:
+            job.status = "running"
+            job.locked_at = now
+            job.locked_by = worker_id
+            job.attempts += 1
+            # Later enqueues with the same key need a fresh job: this one
+            # may already have read the state they are about to change
+            job.dedupe_key = None
+        db.session.commit()
+        return jobs
+
+    def run_pending(self, worker_id, limit=100):
+        """Claim and run one round of due jobs; returns how many were claimed."""
+        jobs = self.claim(worker_id, limit)
+
+        groups = {}
+        for job in jobs:
+            groups.setdefault(job.name, []).append(job)
+        for name, group in groups.items():
+            fn, batch = self.handlers.get(name, (None, False))
+            if fn is None:
+                self._failed(group, f"No handler registered for {name!r}", retry=False)
+            elif batch:
+                self._run(group, lambda: fn([job.payload for job in group]))
+            else:
+                for job in group:
+                    self._run([job], lambda job=job: fn(job.payload))
+        return len(jobs)
+
+    def _run(self, group, call):
+        from app.extensions import db
+        from app.models import Job
+
+        ids = [job.id for job in group]
+        try:
+            call()
+        except Exception:
+            db.session.rollback()
+            self._failed(db.session.query(Job).filter(Job.id.in_(ids)).all(), traceback.format_exc())
+            return
+        db.session.execute(db.delete(Job).where(Job.id.in_(ids)))
+        db.session.commit()
+
+    def _failed(self, group, error, retry=True):
+        from app.extensions import db
+
+        now = datetime.now()
+        for job in group:
+            job.last_error = error
+            job.locked_at = job.locked_by = None
+            if retry and job.attempts < job.max_attempts:
+                job.status = "queued"
+                job.run_at = now + timedelta(seconds=self.retry_base * 2 ** (job.attempts - 1))
+            else:
+                job.status = "failed"
+            current_app.logger.warning("Job %s (%s) attempt %d failed: %s",
+                                       job.id, job.name, job.attempts, error.strip().splitlines()[-1])
+        db.session.commit()
+
+    def work(self, limit=100, poll_interval=1.0, once=False):
+        """Run jobs until interrupted, or until the queue is drained if ``once``."""
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        while True:
+            claimed = self.run_pending(worker_id, limit)
+            if not claimed:
+                if once:
+                    return
+                time.sleep(poll_interval)
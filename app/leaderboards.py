@@ -0,0 +1,157 @@
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app.extensions import db, jobs
+from app.models import (
+    ArchivedGame, ArchivedPlayerRating, ArchivedPlayerStats, Game, LeaderboardEntry,
+    PlayerRating, PlayerStats, User,
+)
+
+METRICS = ("points", "rebounds", "assists", "rating")
+WINDOWS = {"30d": timedelta(days=30), "all": None}
+
+# (game, stats, ratings) models per storage tier; see app.archive
+TIERS = (
+    (Game, PlayerStats, PlayerRating),
+    (ArchivedGame, ArchivedPlayerStats, ArchivedPlayerRating),
+)
+
+
+def _game_join(game, row):
+    # Archive rows also match on game_time, so Postgres can pair partitions
+    if game is ArchivedGame:
+        return db.and_(game.id == row.game_id, game.game_time == row.game_time)
+    return game.id == row.game_id
+
+
+def _game_time(game):
+    return game.game_time if game is ArchivedGame else game.time
+
+
+def board_key(metric, window, court_id=None):
+    # e.g. "points:30d:global" or "rating:all:court:12"
+    scope = "global" if court_id is None else f"court:{court_id}"
+    return f"{metric}:{window}:{scope}"
+
+
+def _ranked(board, scores, now):
+    # scores: {user_id: (value, sample_size)}; ties share a rank ("1224")
+    ordered = sorted(scores.items(), key=lambda item: (-item[1][0], item[0]))
+    rows = []
+    rank, previous = 0, None
+    for position, (user_id, (value, sample_size)) in enumerate(ordered, 1):
+        if value != previous:
+            rank, previous = position, value
+        rows.append({"board": board, "user_id": user_id, "rank": rank, "value": value,
+                     "sample_size": sample_size, "refreshed_at": now})
+    return rows
+
+
+def _stat_rows(game, stats, cutoff):
+    # (court_id, user_id, games, points, rebounds, assists) from one tier
+    query = db.session.query(
+        game.court_id,
+        stats.user_id,
+        db.func.count(stats.id),
+        db.func.coalesce(db.func.sum(stats.points), 0),
+        db.func.coalesce(db.func.sum(stats.rebounds), 0),
+        db.func.coalesce(db.func.sum(stats.assists), 0),
+    ).join(game, _game_join(game, stats)).group_by(game.court_id, stats.user_id)
+    if cutoff is not None:
+        query = query.filter(_game_time(game) >= cutoff)
+    return query
+
+
+def _stat_boards(window, cutoff):
+    # {board: {user_id: (value, games)}} for points/rebounds/assists
+    boards = {}
+    rows = (row for game, stats, _ in TIERS for row in _stat_rows(game, stats, cutoff))
+    for court_id, user_id, games, *totals in rows:
+        for metric, total in zip(("points", "rebounds", "assists"), totals):
+            for scope in (court_id, None):
+                scores = boards.setdefault(board_key(metric, window, scope), {})
+                value, count = scores.get(user_id, (0, 0))
+                scores[user_id] = (value + total, count + games)
+    return boards
+
+
+def _rating_rows(game, ratings, cutoff):
+    # (court_id, user_id, ratings, rating_sum) from one tier
+    query = db.session.query(
+        game.court_id,
+        ratings.to_user_id,
+        db.func.count(ratings.id),
+        db.func.sum(ratings.rating),
+    ).join(game, _game_join(game, ratings)).group_by(game.court_id, ratings.to_user_id)
+    if cutoff is not None:
+        query = query.filter(_game_time(game) >= cutoff)
+    return query
+
+
+def _rating_boards(window, cutoff, min_ratings):
+    # {board: {user_id: (average, ratings)}}, skipping thinly rated players
+    sums = {}
+    rows = (row for game, _, ratings in TIERS for row in _rating_rows(game, ratings, cutoff))
+    for court_id, user_id, count, rating_sum in rows:
+        for scope in (court_id, None):
+            scores = sums.setdefault(board_key("rating", window, scope), {})
+            total, n = scores.get(user_id, (0, 0))
+            scores[user_id] = (total + rating_sum, n + count)
+
+    return {
+        board: {user_id: (total / n, n) for user_id, (total, n) in scores.items() if n >= min_ratings}
+        for board, scores in sums.items()
+    }
+
+
+def refresh_leaderboards(now=None):
+    """Rebuild every leaderboard from the raw stats and ratings.
+
+    Computes global and per-court boards for each metric and window from
+    grouped queries over the hot and archive tables, then swaps them in with one transaction so
+    readers never see a half-written board. Meant to run on a schedule
+    (``flask refresh-leaderboards``); returns the number of rows written.
+    """
+    now = now or datetime.now()
+    min_ratings = current_app.config.get("LEADERBOARD_MIN_RATINGS", 3)
+
+    rows = []
+    for window, span in WINDOWS.items():
+        cutoff = now - span if span else None
+        boards = _stat_boards(window, cutoff)
+        boards.update(_rating_boards(window, cutoff, min_ratings))
+        for board, scores in boards.items():
+            rows.extend(_ranked(board, scores, now))
+
+    db.session.execute(db.delete(LeaderboardEntry))
+    for start in range(0, len(rows), 5000):
+        db.session.execute(db.insert(LeaderboardEntry), rows[start:start + 5000])
+    db.session.commit()
+    return len(rows)
+
+
+def top_entries(board, limit):
+    # Walks ix_leaderboard_entries_board_rank; usernames come from the users PK
+    return db.session.query(LeaderboardEntry, User.username).join(
+        User, User.id == LeaderboardEntry.user_id
+    ).filter(LeaderboardEntry.board == board).order_by(
+        LeaderboardEntry.rank, LeaderboardEntry.user_id
+    ).limit(limit).all()
+
+
+def entry_for(board, user_id):
+    # Primary-key lookup of one player's standing
+    return db.session.get(LeaderboardEntry, (board, user_id))
+
+
+@jobs.handler("refresh_leaderboards", batch=True)
+def _refresh_leaderboards_job(payloads):
+    # Any number of queued refreshes collapse into one rebuild
+    refresh_leaderboards()
+
+
+def schedule_leaderboard_refresh():
+    # Coalesced: a burst of submissions within the delay triggers one rebuild
+    jobs.enqueue("refresh_leaderboards", key="refresh_leaderboards",
+                 delay=current_app.config.get("LEADERBOARD_REFRESH_DELAY", 60))
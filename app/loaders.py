@@ -0,0 +1,128 @@
+import hashlib
+
+from flask import current_app, g
+from sqlalchemy.orm import aliased, joinedload
+
+from app.extensions import db, cache, fragments
+from app.models import User, Court, Game, GamePlayer, PlayerStats, PlayerRating
+
+COURT_CATALOG_KEY = "courts:catalog"
+
+
+def load_game_listing(query, user_id):
+    """Run a ``Game`` listing query without per-row lazy loads.
+
+    Court and host are joined into the main query and the viewer's
+    memberships come from one lookup, so rendering a page costs a fixed
+    number of statements however many games it shows.
+
+    Returns ``(game, is_member)`` pairs in query order.
+    """
+    games = query.options(joinedload(Game.court), joinedload(Game.host)).all()
+    if not games:
+        return []
+
+    game_ids = [game.id for game in games]
+    my_game_ids = {
+        game_id for (game_id,) in db.session.query(GamePlayer.game_id).filter(
+            GamePlayer.user_id == user_id,
+            GamePlayer.game_id.in_(game_ids)
+        )
+    }
+
+    return [(game, game.id in my_game_ids) for game in games]
+
+
+def load_game_detail(game_id, viewer):
+    """Build the game detail page's view model in two queries.
+
+    The first reads the game with its court and host; the second reads the
+    roster joined to each player's box score and to the rating ``viewer``
+    gave them. Returns ``None`` for an unknown game, else a dict with
+    ``game``, ``roster`` (one dict per player), ``is_rostered``, a
+    ``version`` hash of the parts every viewer sees, and an
+    ``etag``/``last_modified`` pair covering everything the page shows to
+    this viewer.
+    """
+    game = Game.query.options(
+        joinedload(Game.court), joinedload(Game.host)
+    ).filter(Game.id == game_id).first()
+    if game is None:
+        return None
+
+    my_rating = aliased(PlayerRating)
+    rows = db.session.query(
+        User.id, User.username, GamePlayer.joined_at,
+        PlayerStats.points, PlayerStats.rebounds, PlayerStats.assists, PlayerStats.updated_at,
+        my_rating.rating, my_rating.comment, my_rating.created_at,
+    ).select_from(GamePlayer).join(
+        User, User.id == GamePlayer.user_id
+    ).outerjoin(
+        PlayerStats, (PlayerStats.game_id == GamePlayer.game_id) & (PlayerStats.user_id == GamePlayer.user_id)
+    ).outerjoin(
+        my_rating, (my_rating.game_id == GamePlayer.game_id) & (my_rating.to_user_id == GamePlayer.user_id)
+                   & (my_rating.from_user_id == viewer.id)
+    ).filter(GamePlayer.game_id == game_id).order_by(GamePlayer.joined_at, User.id).all()
+
+    roster = [
+        {"id": user_id, "username": username, "points": points or 0, "rebounds": rebounds or 0,
+         "assists": assists or 0, "rating": rating, "comment": comment or ""}
+        for user_id, username, _, points, rebounds, assists, _, rating, comment, _ in rows
+    ]
+
+    # Timestamps only move forward on inserts, so the etag also hashes the
+    # visible values to catch in-place edits and removals. ``version``
+    # covers what every viewer sees and keys the page's cached fragments
+    stamps = [game.created_at] + [stamp for row in rows for stamp in (row[2], row[6], row[9])]
+    last_modified = max((stamp for stamp in stamps if stamp), default=None)
+    shared = repr((
+        game.court.name, game.court.address, game.time, game.host.username,
+        game.player_count, game.max_players,
+        [(p["id"], p["username"], p["points"], p["rebounds"], p["assists"]) for p in roster],
+    ))
+    version = hashlib.sha1(shared.encode()).hexdigest()
+    personal = repr((viewer.id, viewer.username, version, [(p["rating"], p["comment"]) for p in roster]))
+
+    return {
+        "game": game,
+        "roster": roster,
+        "is_rostered": any(player["id"] == viewer.id for player in roster),
+        "version": version,
+        "etag": hashlib.sha1(personal.encode()).hexdigest(),
+        "last_modified": last_modified,
+    }
+
+
+def _query_court_catalog():
+    # Reads every court on purpose, so app.query_plans doesn't flag the scan
+    rows = db.session.query(Court, User.username).join(
+        User, User.id == Court.created_by
+    ).order_by(Court.id).execution_options(whole_table_read=True)
+    return [
+        {"id": court.id, "name": court.name, "address": court.address,
+         "lat": court.lat, "lng": court.lng, "creator_username": username}
+        for court, username in rows
+    ]
+
+
+def load_court_catalog():
+    """Return every court as a plain dict, cached across requests.
+
+    The list changes only when a court is created, so it is kept in the
+    app cache for ``COURT_CATALOG_TTL`` seconds and dropped by
+    ``invalidate_court_catalog``. Within a request it is also memoised on
+    ``g`` so repeated calls don't even hit the cache backend.
+    """
+    catalog = g.get("court_catalog")
+    if catalog is None:
+        catalog = g.court_catalog = cache.get_or_set(
+            COURT_CATALOG_KEY, _query_court_catalog,
+            ttl=current_app.config.get("COURT_CATALOG_TTL", 300)
+        )
+    return catalog
+
+
+def invalidate_court_catalog():
+    cache.delete(COURT_CATALOG_KEY)
+    g.pop("court_catalog", None)
+    fragments.touch("courts")
@@ -1,6 +1,6 @@
-from datetime import datetime
-from app.extensions import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db, hasher
 from flask_login import UserMixin
 
 class User(UserMixin, db.Model):
@@ -16,10 +16,10 @@ class User(UserMixin, db.Model):
     games = db.relationship('Game', secondary='game_players', back_populates='players')
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return hasher.verify(self.password_hash, password)
 
 class Court(db.Model):
     __tablename__ = "courts"
@@ -39,22 +39,98 @@ class Game(db.Model):
     court_id = db.Column(db.Integer, db.ForeignKey("courts.id"), nullable = False)
     host_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable = False)
     time = db.Column(db.DateTime, nullable = False)
+    duration_minutes = db.Column(db.Integer, nullable = False, default = 90, server_default = "90")
     max_players = db.Column(db.Integer, default = 10)
+    # Denormalized roster size, maintained by add_player/remove_player
+    player_count = db.Column(db.Integer, nullable = False, default = 0, server_default = "0")
+    # Set on games materialized from a recurring series
+    series_id = db.Column(db.Integer, db.ForeignKey("game_series.id"))
     created_at = db.Column(db.DateTime, default = datetime.now)
 
     players = db.relationship('User', secondary='game_players', back_populates='games')
 
+    __table_args__ = (
+        # Listing and keyset pagination order by (time, id)
+        db.Index('ix_games_time_id', 'time', 'id'),
+        # Per-court listings and nearby searches filter by court, then time
+        db.Index('ix_games_court_id_time_id', 'court_id', 'time', 'id'),
+        # One game per series occurrence, however many requests materialize it
+        db.UniqueConstraint('series_id', 'time', name='unique_series_occurrence'),
+    )
+
+    @property
+    def ends_at(self):
+        return self.time + timedelta(minutes = self.duration_minutes)
+
     @property
     def current_players(self):
-        return len(self.players)
+        return self.player_count
 
     @property
     def spots_available(self):
         return self.max_players - self.current_players
 
+    def has_player(self, user_id):
+        return db.session.query(
+            db.exists().where(GamePlayer.game_id == self.id, GamePlayer.user_id == user_id)
+        ).scalar()
+
     def can_join(self, user):
         return (self.current_players < self.max_players and
-                user not in self.players)
+                not self.has_player(user.id))
+
+    def add_player(self, user_id):
+        # The conditional UPDATE checks capacity and locks the game row in one
+        # statement, so concurrent joins cannot oversubscribe the game. Both
+        # writes sit in a savepoint: a duplicate join undoes just them and
+        # releases the claimed spot, leaving the caller's transaction intact
+        try:
+            with db.session.begin_nested():
+                claimed = db.session.execute(
+                    db.update(Game)
+                    .where(Game.id == self.id, Game.player_count < Game.max_players)
+                    .values(player_count = Game.player_count + 1)
+                ).rowcount
+                if not claimed:
+                    return False
+                db.session.add(GamePlayer(game_id = self.id, user_id = user_id))
+                db.session.flush()
+        except IntegrityError:
+            return False
+        return True
+
+    def remove_player(self, user_id):
+        removed = db.session.execute(
+            db.delete(GamePlayer)
+            .where(GamePlayer.game_id == self.id, GamePlayer.user_id == user_id)
+        ).rowcount
+        if not removed:
+            return False
+
+        db.session.execute(
+            db.update(Game)
+            .where(Game.id == self.id)
+            .values(player_count = Game.player_count - 1)
+        )
+        return True
+
+# A regular run ("every Tuesday 7pm"); games are created from it on demand by
+# app.series instead of being stored up front
+class GameSeries(db.Model):
+    __tablename__ = "game_series"
+    id = db.Column(db.Integer, primary_key = True)
+    court_id = db.Column(db.Integer, db.ForeignKey("courts.id"), nullable = False)
+    host_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable = False)
+    starts_at = db.Column(db.DateTime, nullable = False)
+    rule = db.Column(db.String(200), nullable = False)  # RRULE subset, see app.series.Recurrence
+    duration_minutes = db.Column(db.Integer, nullable = False, default = 90)
+    max_players = db.Column(db.Integer, nullable = False, default = 10)
+    created_at = db.Column(db.DateTime, default = datetime.now)
+
+    court = db.relationship('Court')
+    host = db.relationship('User')
+
+    __table_args__ = (db.Index('ix_game_series_court_id', 'court_id'),)
 
 class GamePlayer(db.Model):
     __tablename__ = "game_players"
@@ -62,6 +138,9 @@ class GamePlayer(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key = True)
     joined_at = db.Column(db.DateTime, default = datetime.now)
 
+    # "Which of these games am I in?" lookups go by user first
+    __table_args__ = (db.Index('ix_game_players_user_id_game_id', 'user_id', 'game_id'),)
+
 class PlayerStats(db.Model):
     __tablename__ = "player_stats"
     id = db.Column(db.Integer, primary_key = True)
@@ -76,7 +155,11 @@ class PlayerStats(db.Model):
     game = db.relationship('Game', backref='player_stats')
     user = db.relationship('User', backref='player_stats')
 
-    __table_args__ = (db.UniqueConstraint('game_id', 'user_id', name='unique_game_user_stats'),)
+    __table_args__ = (
+        db.UniqueConstraint('game_id', 'user_id', name='unique_game_user_stats'),
+        # Profile history: a player's stats joined to their games
+        db.Index('ix_player_stats_user_id_game_id', 'user_id', 'game_id'),
+    )
 
 class PlayerRating(db.Model):
     __tablename__ = "player_ratings"
@@ -95,5 +178,170 @@ class PlayerRating(db.Model):
     __table_args__ = (
         db.UniqueConstraint('from_user_id', 'to_user_id', 'game_id', name='unique_game_user_rating'),
         db.CheckConstraint('rating >= 1 AND rating <= 5', name='rating_range'),
-        db.CheckConstraint('from_user_id != to_user_id', name='no_self_rating')
+        db.CheckConstraint('from_user_id != to_user_id', name='no_self_rating'),
+        # Profile: latest ratings received
+        db.Index('ix_player_ratings_to_user_id_created_at', 'to_user_id', 'created_at'),
+        # Game detail: ratings I gave in this game
+        db.Index('ix_player_ratings_game_id_from_user_id', 'game_id', 'from_user_id'),
+    )
+
+class PlayerCareerTotals(db.Model):
+    # Lifetime aggregates per player, kept current by app.aggregates so
+    # profile pages read one row instead of scanning stats and ratings
+    __tablename__ = "player_career_totals"
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key = True)
+    games_played = db.Column(db.Integer, nullable = False, default = 0)
+    total_points = db.Column(db.Integer, nullable = False, default = 0)
+    total_rebounds = db.Column(db.Integer, nullable = False, default = 0)
+    total_assists = db.Column(db.Integer, nullable = False, default = 0)
+    total_ratings = db.Column(db.Integer, nullable = False, default = 0)
+    rating_sum = db.Column(db.Integer, nullable = False, default = 0)
+    updated_at = db.Column(db.DateTime, default = datetime.now, onupdate = datetime.now)
+
+    @classmethod
+    def for_user(cls, user_id):
+        # Primary-key read; players with no history get an unsaved zero row
+        return db.session.get(cls, user_id) or cls(
+            user_id = user_id, games_played = 0, total_points = 0, total_rebounds = 0,
+            total_assists = 0, total_ratings = 0, rating_sum = 0
+        )
+
+    def _per_game(self, total):
+        return total / self.games_played if self.games_played else None
+
+    @property
+    def avg_points(self):
+        return self._per_game(self.total_points)
+
+    @property
+    def avg_rebounds(self):
+        return self._per_game(self.total_rebounds)
+
+    @property
+    def avg_assists(self):
+        return self._per_game(self.total_assists)
+
+    @property
+    def avg_rating(self):
+        return self.rating_sum / self.total_ratings if self.total_ratings else None
+
+class LeaderboardEntry(db.Model):
+    # One ranked row per player per board, rebuilt by app.leaderboards so
+    # leaderboard reads are index lookups instead of GROUP BYs over stats
+    __tablename__ = "leaderboard_entries"
+    board = db.Column(db.String(64), primary_key = True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key = True)
+    rank = db.Column(db.Integer, nullable = False)
+    value = db.Column(db.Float, nullable = False)
+    sample_size = db.Column(db.Integer, nullable = False)
+    refreshed_at = db.Column(db.DateTime, nullable = False)
+
+    user = db.relationship('User')
+
+    __table_args__ = (
+        # Top-N: first rows of a board in rank order
+        db.Index('ix_leaderboard_entries_board_rank', 'board', 'rank'),
+    )
+
+class Job(db.Model):
+    # Background work queued by app.jobs and run by `flask run-worker`
+    __tablename__ = "jobs"
+    id = db.Column(db.Integer, primary_key = True)
+    name = db.Column(db.String(64), nullable = False)
+    payload = db.Column(db.JSON, nullable = False, default = dict)
+    dedupe_key = db.Column(db.String(128))
+    status = db.Column(db.String(16), nullable = False, default = "queued")
+    attempts = db.Column(db.Integer, nullable = False, default = 0)
+    max_attempts = db.Column(db.Integer, nullable = False, default = 5)
+    run_at = db.Column(db.DateTime, nullable = False, default = datetime.now)
+    locked_at = db.Column(db.DateTime)
+    locked_by = db.Column(db.String(128))
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default = datetime.now)
+
+    __table_args__ = (
+        # At most one pending job per key; cleared when a worker claims it
+        db.UniqueConstraint('dedupe_key', name='unique_job_dedupe_key'),
+        # Worker polling: due jobs in run_at order
+        db.Index('ix_jobs_status_run_at', 'status', 'run_at'),
+    )
+
+class SeedRun(db.Model):
+    # Written by app.seed; marks the data as synthetic, which `flask benchmark`
+    # requires before it overwrites stats and ratings and adds games
+    __tablename__ = "seed_runs"
+    id = db.Column(db.Integer, primary_key = True)
+    users = db.Column(db.Integer, nullable = False)
+    courts = db.Column(db.Integer, nullable = False)
+    games = db.Column(db.Integer, nullable = False)
+    seeded_at = db.Column(db.DateTime, default = datetime.now)
+
+# Cold tier: finished games and their rosters, stats and ratings, moved out of
+# the hot tables by app.archive. Ids are kept, and every row carries its
+# game's start time, which on Postgres range-partitions each table by year
+ARCHIVE_PARTITIONING = {'postgresql_partition_by': 'RANGE (game_time)'}
+
+class ArchivedGame(db.Model):
+    __tablename__ = "games_archive"
+    id = db.Column(db.Integer, primary_key = True, autoincrement = False)
+    game_time = db.Column(db.DateTime, primary_key = True)
+    court_id = db.Column(db.Integer, db.ForeignKey("courts.id"), nullable = False)
+    host_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable = False)
+    duration_minutes = db.Column(db.Integer, nullable = False)
+    max_players = db.Column(db.Integer)
+    player_count = db.Column(db.Integer, nullable = False)
+    series_id = db.Column(db.Integer, db.ForeignKey("game_series.id"))
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, nullable = False)
+
+    court = db.relationship('Court')
+
+    __table_args__ = (ARCHIVE_PARTITIONING,)
+
+    @property
+    def time(self):
+        return self.game_time
+
+class ArchivedGamePlayer(db.Model):
+    __tablename__ = "game_players_archive"
+    game_id = db.Column(db.Integer, primary_key = True, autoincrement = False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key = True, autoincrement = False)
+    game_time = db.Column(db.DateTime, primary_key = True)
+    joined_at = db.Column(db.DateTime)
+
+    __table_args__ = (ARCHIVE_PARTITIONING,)
+
+class ArchivedPlayerStats(db.Model):
+    __tablename__ = "player_stats_archive"
+    id = db.Column(db.Integer, primary_key = True, autoincrement = False)
+    game_time = db.Column(db.DateTime, primary_key = True)
+    game_id = db.Column(db.Integer, nullable = False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable = False)
+    points = db.Column(db.Integer)
+    rebounds = db.Column(db.Integer)
+    assists = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        # Profile history once a player's hot games run out
+        db.Index('ix_player_stats_archive_user_id_game_time', 'user_id', 'game_time'),
+        ARCHIVE_PARTITIONING,
+    )
+
+class ArchivedPlayerRating(db.Model):
+    __tablename__ = "player_ratings_archive"
+    id = db.Column(db.Integer, primary_key = True, autoincrement = False)
+    game_time = db.Column(db.DateTime, primary_key = True)
+    game_id = db.Column(db.Integer, nullable = False)
+    from_user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable = False)
+    to_user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable = False)
+    rating = db.Column(db.Integer, nullable = False)
+    comment = db.Column(db.Text)
+    created_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        # Profile: latest ratings received, merged with the hot table's
+        db.Index('ix_player_ratings_archive_to_user_id_created_at', 'to_user_id', 'created_at'),
+        ARCHIVE_PARTITIONING,
     )
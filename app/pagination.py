@@ -0,0 +1,95 @@
+import base64
+import binascii
+import heapq
+from datetime import datetime
+
+from flask import json
+
+from app.extensions import db
+from app.models import Game
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+STREAM_BATCH_SIZE = 500
+
+
+def position(game):
+    # Where a row sorts in (time, id) order. Series occurrences without a game
+    # row (id None, see app.series) take -series_id, ahead of games at that time
+    return game.time, game.id if game.id is not None else -game.series_id
+
+
+def encode_cursor(game):
+    # Opaque cursor pointing just after `game` in (time, id) order
+    time, game_id = position(game)
+    raw = f"{time.isoformat()}|{game_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    # Inverse of encode_cursor; raises ValueError for anything malformed
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        time, game_id = raw.split("|")
+        return datetime.fromisoformat(time), int(game_id)
+    except (binascii.Error, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def page_size(args, default=DEFAULT_PAGE_SIZE):
+    # ?limit= clamped to [1, MAX_PAGE_SIZE]
+    limit = args.get("limit", default, type=int)
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def apply_cursor(query, cursor):
+    """Order a query over ``Game`` by (time, id) and seek past ``cursor``.
+
+    The row-value comparison lets the database walk an index on
+    (time, id) straight to the start of the page, so every page costs the
+    same no matter how deep it is.
+    """
+    if cursor:
+        after_time, after_id = decode_cursor(cursor)
+        query = query.filter(db.tuple_(Game.time, Game.id) > db.tuple_(after_time, after_id))
+    return query.order_by(Game.time, Game.id)
+
+
+def merge_rows(rows, extra, game_of=lambda row: row):
+    # Merge two listings that are each already in (time, id) order
+    return list(heapq.merge(rows, extra, key=lambda row: position(game_of(row))))
+
+
+def split_page(rows, limit, game_of=lambda row: row):
+    # Callers fetch limit + 1 rows; the extra one only signals another page.
+    # Returns (rows, next_cursor)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(game_of(rows[-1]))
+
+
+def stream_page(query, serialize, limit=None, key="games", game_of=lambda row: row, extra=()):
+    """Yield a listing as JSON text without materialising the result set.
+
+    Rows are pulled from the database in batches of ``STREAM_BATCH_SIZE``
+    and written out one at a time, so memory use and time to first byte
+    don't depend on how many rows match. ``extra`` rows, in the same
+    order, are merged in as they come due. The closing object carries the
+    row count and, when ``limit`` cut the listing short, ``next_cursor``.
+    """
+    yield '{"%s": [' % key
+    count = 0
+    next_cursor = None
+    last = None
+    rows = query.yield_per(STREAM_BATCH_SIZE)
+    if extra:
+        rows = heapq.merge(rows, extra, key=lambda row: position(game_of(row)))
+    for row in rows:
+        if limit is not None and count == limit:
+            next_cursor = encode_cursor(game_of(last))
+            break
+        yield ("," if count else "") + json.dumps(serialize(row))
+        count += 1
+        last = row
+    yield '], "count": %d, "next_cursor": %s}' % (count, json.dumps(next_cursor))
@@ -0,0 +1,154 @@
+import json
+import re
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import Court, Game, GamePlayer, GameSeries, PlayerStats
+from app.pagination import encode_cursor
+from app.series import STAMP_FORMAT
+
+SQLITE_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+# Execution option for statements that read a whole table on purpose (the
+# court catalog, the spatial index); the check leaves their plans alone
+WHOLE_TABLE = "whole_table_read"
+
+
+@contextmanager
+def capture_selects(engine):
+    # Collect (statement, parameters) for every SELECT run on the engine,
+    # apart from those marked WHOLE_TABLE
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and context.execution_options.get(WHOLE_TABLE):
+            return
+        if not executemany and statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield captured
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _postgres_scans(plan):
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", ()):
+        yield from _postgres_scans(child)
+
+
+def full_scans(conn, statement, parameters):
+    """Return the tables ``statement`` would read with a full table scan.
+
+    On Postgres sequential scans are disabled for the check, so the planner
+    only falls back to one when no index can serve the query; that keeps
+    the result independent of how much data happens to be loaded. On
+    SQLite a bare ``SCAN <table>`` (no ``USING INDEX``) is a table scan.
+    """
+    tables = set(db.metadata.tables)
+    if conn.dialect.name == "postgresql":
+        conn.exec_driver_sql("SET enable_seqscan = off")
+        (plan,), = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters)
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return sorted(t for t in set(_postgres_scans(plan[0]["Plan"])) if t in tables)
+
+    rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+    scans = set()
+    for row in rows:
+        match = SQLITE_SCAN.match(row[-1])
+        if match and match.group(1) in tables:
+            scans.add(match.group(1))
+    return sorted(scans)
+
+
+def sample_urls():
+    # GET routes to drive, filled in with ids from whatever data is loaded
+    game = Game.query.filter(Game.player_count > 0).order_by(Game.id).first()
+    stats = PlayerStats.query.order_by(PlayerStats.id).first()
+    if game is None or stats is None:
+        raise RuntimeError("No games with rosters and stats; seed the database first")
+    court = db.session.get(Court, game.court_id)
+    player_id = db.session.query(GamePlayer.user_id).filter_by(game_id=game.id).limit(1).scalar()
+    near = f"lat={court.lat}&lng={court.lng}"
+    tomorrow = datetime.now() + timedelta(days=1)
+
+    urls = [
+        "/dashboard",
+        "/courts",
+        "/games",
+        f"/games?court_id={court.id}",
+        f"/games?date={game.time:%Y-%m-%d}",
+        f"/games?cursor={encode_cursor(game)}",
+        f"/courts/nearest?{near}",
+        f"/games/nearby?{near}",
+        f"/games/nearby?{near}&limit=20&cursor={encode_cursor(game)}",
+        f"/games/search?{near}&min_spots=2&start_hour=17&end_hour=22",
+        f"/games/search?court_id={court.id}&days=30",
+        f"/courts/{court.id}/free-slots?date={tomorrow:%Y-%m-%d}",
+        f"/games/{game.id}",
+        f"/users/{stats.user_id}",
+        "/leaderboards/points?window=all",
+        f"/leaderboards/rating?court_id={court.id}",
+        "/courts/create",
+        "/games/create",
+        "/series/create",
+        "/api/v1/courts",
+        f"/api/v1/courts/{court.id}",
+        "/api/v1/games",
+        f"/api/v1/games?court_id={court.id}&cursor={encode_cursor(game)}",
+        f"/api/v1/games/{game.id}",
+        f"/api/v1/games/{game.id}/roster",
+        f"/api/v1/games/{stats.game_id}/stats",
+        f"/api/v1/users/{stats.user_id}",
+    ]
+    # Opening an occurrence creates its game, so only when a series exists
+    series = GameSeries.query.order_by(GameSeries.id).first()
+    if series is not None:
+        from app.series import Recurrence
+
+        start = next(Recurrence.parse(series.rule).between(
+            series.starts_at, datetime.now(), datetime.now() + timedelta(days=28)
+        ), None)
+        if start is not None:
+            urls.append(f"/series/{series.id}/{start:{STAMP_FORMAT}}")
+    return player_id, urls
+
+
+def check_query_plans(app):
+    """EXPLAIN every SELECT issued by the app's read routes.
+
+    Each URL from ``sample_urls`` is requested through the test client as
+    a rostered player and must answer 200 or redirect. Every plan is
+    checked, including top-N and join-only reads; only statements run
+    with the ``WHOLE_TABLE`` execution option are skipped. Returns a list
+    of ``(url, table, statement)`` for each full table scan found.
+    """
+    failures = []
+    with app.app_context():
+        user_id, urls = sample_urls()
+        engine = db.engine
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(user_id)
+        sess["_fresh"] = True
+
+    for url in urls:
+        with capture_selects(engine) as captured:
+            response = client.get(url)
+        if response.status_code not in (200, 302):
+            raise RuntimeError(f"GET {url} returned {response.status_code}")
+
+        with engine.connect() as conn:
+            for statement, parameters in captured:
+                for table in full_scans(conn, statement, parameters):
+                    failures.append((url, table, statement))
+            conn.rollback()
+    return failures
@@ -0,0 +1,114 @@
+import time
+from functools import wraps
+
+from flask import current_app, g, has_request_context, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+REPLICA_BIND = "replica"
+QUERY_CANCELED = "57014"  # Postgres SQLSTATE raised when statement_timeout fires
+
+
+def _reads_from_replica():
+    # Replica routes read from the replica unless this request or client wrote recently
+    return (has_request_context() and g.get("use_replica", False) and not g.get("committed", False)
+            and session.get("_primary_until", 0) <= time.time())
+
+
+class RoutingSession(Session):
+    """``db.session`` class that can send a request's reads to a replica.
+
+    Inside views marked ``@read_replica``, statements go to the
+    ``replica`` entry of ``SQLALCHEMY_BINDS`` when one is configured;
+    flushes, reads after the request has committed, and everything else
+    use the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and _reads_from_replica():
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def use_replica():
+    # Route the rest of this request's reads to the replica; usable as a
+    # blueprint before_request hook
+    g.use_replica = True
+
+
+def read_replica(view):
+    """Serve the view's queries from the read replica, if configured."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        use_replica()
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def statement_timeout(ms):
+    """Cancel any of the view's statements that run longer than ``ms``.
+
+    Applied with ``SET LOCAL`` to each transaction the request opens, so
+    the limit never outlives the request. Postgres only; a no-op elsewhere.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            from app.extensions import db
+
+            g.statement_timeout_ms = ms
+            # A transaction opened before the view ran (say by the user
+            # loader) missed after_begin, so set it there directly
+            if db.session().in_transaction():
+                _set_statement_timeout(db.session.connection(), ms)
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _set_statement_timeout(connection, ms):
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(ms)}")
+
+
+class DatabaseRouter:
+    """Wires up replica reads and per-route statement timeouts.
+
+    After a request commits, the client is pinned to the primary for
+    ``REPLICA_STICKY_SECONDS`` (default 5) so it reads its own writes
+    despite replication lag. A statement cancelled by its timeout turns
+    into a 503 instead of a 500.
+    """
+
+    def init_app(self, app):
+        from app.extensions import db
+
+        app.after_request(self._pin_writers)
+        app.register_error_handler(OperationalError, self._statement_cancelled)
+        if not event.contains(db.session, "after_begin", _after_begin):
+            event.listen(db.session, "after_begin", _after_begin)
+            event.listen(db.session, "after_commit", _after_commit)
+
+    def _pin_writers(self, response):
+        if g.get("committed") and REPLICA_BIND in current_app.config.get("SQLALCHEMY_BINDS", {}):
+            session["_primary_until"] = time.time() + current_app.config.get("REPLICA_STICKY_SECONDS", 5)
+        return response
+
+    def _statement_cancelled(self, exc):
+        if getattr(exc.orig, "sqlstate", None) != QUERY_CANCELED:
+            raise exc
+        return "The server is busy, please try again.", 503
+
+
+def _after_begin(db_session, transaction, connection):
+    ms = g.get("statement_timeout_ms") if has_request_context() else None
+    if ms:
+        _set_statement_timeout(connection, ms)
+
+
+def _after_commit(db_session):
+    if has_request_context():
+        g.committed = True
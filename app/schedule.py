@@ -0,0 +1,151 @@
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from threading import Lock
+
+
+class _CourtIntervals:
+    """One court's games as intervals sorted by start.
+
+    ``max_ends[i]`` is the latest end among the first ``i + 1`` intervals,
+    so it never decreases and both ends of an overlap search are binary
+    searches, even when older data holds overlapping games.
+    """
+
+    __slots__ = ("intervals", "starts", "max_ends", "max_id", "synced_at")
+
+    def __init__(self):
+        self.intervals = []  # (start, end, game_id)
+        self.starts = []
+        self.max_ends = []
+        self.max_id = 0
+        self.synced_at = None
+
+    def _rebuild_max_ends(self, start_at=0):
+        latest = self.max_ends[start_at - 1] if start_at else None
+        del self.max_ends[start_at:]
+        for _, end, _ in self.intervals[start_at:]:
+            latest = end if latest is None or end > latest else latest
+            self.max_ends.append(latest)
+
+    def add(self, start, end, game_id):
+        # A game already here (added locally, then fetched by a top-up) is skipped
+        position = bisect_right(self.starts, start)
+        if any(interval[2] == game_id for interval in self.intervals[bisect_left(self.starts, start):position]):
+            return
+        self.starts.insert(position, start)
+        self.intervals.insert(position, (start, end, game_id))
+        self._rebuild_max_ends(position)
+        self.max_id = max(self.max_id, game_id)
+
+    def overlapping(self, start, end):
+        # Intervals that end after `start` and begin before `end`
+        first = bisect_right(self.max_ends, start)
+        last = bisect_left(self.starts, end)
+        return [interval for interval in self.intervals[first:last] if interval[1] > start]
+
+    def prune(self, before):
+        # Forget games that ended before `before`; they can't conflict any more
+        cut = bisect_right(self.max_ends, before)
+        if cut:
+            del self.intervals[:cut]
+            del self.starts[:cut]
+            self._rebuild_max_ends()
+
+
+class CourtSchedule:
+    """Per-court interval index of games, for conflict checks and free slots.
+
+    Each court's games from ``MAX_GAME_MINUTES`` ago onwards are loaded the
+    first time the court is asked about. Later lookups only fetch games
+    with a higher id than the court has seen, so a lookup costs two binary
+    searches plus, at most every ``sync_interval`` seconds, one small
+    top-up query. Games are never moved or deleted, so the top-up is
+    enough to see other workers' inserts. ``create_game`` forces the
+    top-up while holding the court's row lock, so two workers can't book
+    the same slot.
+    """
+
+    def __init__(self, max_minutes=240, sync_interval=5):
+        self.max_minutes = max_minutes
+        self.sync_interval = sync_interval
+        self._lock = Lock()
+        self._courts = {}
+
+    def init_app(self, app):
+        self.max_minutes = app.config.get("MAX_GAME_MINUTES", self.max_minutes)
+        self.sync_interval = app.config.get("COURT_SCHEDULE_SYNC_SECONDS", self.sync_interval)
+        self._courts = {}
+
+    def _sync(self, court_id, force=False):
+        from app.extensions import db
+        from app.models import Game
+
+        now = time.monotonic()
+        with self._lock:
+            court = self._courts.get(court_id)
+            if court is None:
+                court = self._courts[court_id] = _CourtIntervals()
+            elif not force and court.synced_at is not None and now - court.synced_at < self.sync_interval:
+                return court
+            max_id = court.max_id
+
+        horizon = datetime.now() - timedelta(minutes=self.max_minutes)
+        rows = db.session.query(Game.id, Game.time, Game.duration_minutes).filter(
+            Game.court_id == court_id, Game.time >= horizon, Game.id > max_id
+        ).all()
+
+        with self._lock:
+            # Ids don't follow start times, so every fetched row goes in
+            for game_id, start, minutes in rows:
+                court.add(start, start + timedelta(minutes=minutes), game_id)
+            court.prune(horizon)
+            court.synced_at = now
+        return court
+
+    def add(self, game):
+        # Record a game this worker just committed
+        with self._lock:
+            court = self._courts.get(game.court_id)
+            if court is not None:
+                court.add(game.time, game.ends_at, game.id)
+
+    def conflicts(self, court_id, start, minutes):
+        """Return ``(start, end, game_id)`` for games overlapping the slot.
+
+        Always reads the latest games first. Call it while holding the
+        court's row lock, so the answer still holds at commit.
+        """
+        court = self._sync(court_id, force=True)
+        with self._lock:
+            return court.overlapping(start, start + timedelta(minutes=minutes))
+
+    def busy(self, court_id, start, end, extra=()):
+        # Booked intervals between start and end, plus any `extra` (start, end)
+        # pairs, merged where they touch
+        court = self._sync(court_id)
+        with self._lock:
+            intervals = [interval[:2] for interval in court.overlapping(start, end)]
+        if extra:
+            intervals = sorted(intervals + [interval for interval in extra if interval[1] > start and interval[0] < end])
+        merged = []
+        for game_start, game_end in intervals:
+            if merged and game_start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], game_end)
+            else:
+                merged.append([game_start, game_end])
+        return merged
+
+    def free_slots(self, court_id, start, end, min_minutes=0, extra=()):
+        """Return the ``(start, end)`` gaps between games from ``start`` to ``end``.
+
+        ``extra`` is as for ``busy``: other bookings, such as series
+        occurrences that have no game row yet.
+        """
+        slots = []
+        cursor = start
+        for busy_start, busy_end in self.busy(court_id, start, end, extra) + [[end, end]]:
+            if busy_start - cursor >= timedelta(minutes=min_minutes) and busy_start > cursor:
+                slots.append((cursor, min(busy_start, end)))
+            cursor = max(cursor, busy_end)
+        return slots
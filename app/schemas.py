@@ -0,0 +1,70 @@
+from functools import lru_cache
+
+from marshmallow import Schema, fields
+
+
+class CourtSchema(Schema):
+    # Dumps the dicts from load_court_catalog
+    id = fields.Integer()
+    name = fields.String()
+    address = fields.String()
+    lat = fields.Float()
+    lng = fields.Float()
+    creator_username = fields.String()
+
+
+class GameSchema(Schema):
+    id = fields.Integer()
+    court_id = fields.Integer()
+    court_name = fields.String(attribute="court.name")
+    host_id = fields.Integer()
+    host_username = fields.String(attribute="host.username")
+    time = fields.DateTime()
+    duration_minutes = fields.Integer()
+    max_players = fields.Integer()
+    player_count = fields.Integer()
+    spots_available = fields.Integer()
+
+
+class RosterEntrySchema(Schema):
+    # Dumps (user_id, username, joined_at) rows
+    user_id = fields.Integer()
+    username = fields.String()
+    joined_at = fields.DateTime()
+
+
+class BoxScoreLineSchema(Schema):
+    user_id = fields.Integer()
+    username = fields.String()
+    points = fields.Integer()
+    rebounds = fields.Integer()
+    assists = fields.Integer()
+    updated_at = fields.DateTime()
+
+
+class ProfileSchema(Schema):
+    # Dumps {"user": User, "totals": PlayerCareerTotals}
+    id = fields.Integer(attribute="user.id")
+    username = fields.String(attribute="user.username")
+    created_at = fields.DateTime(attribute="user.created_at")
+    games_played = fields.Integer(attribute="totals.games_played")
+    total_points = fields.Integer(attribute="totals.total_points")
+    total_rebounds = fields.Integer(attribute="totals.total_rebounds")
+    total_assists = fields.Integer(attribute="totals.total_assists")
+    avg_points = fields.Float(attribute="totals.avg_points")
+    avg_rebounds = fields.Float(attribute="totals.avg_rebounds")
+    avg_assists = fields.Float(attribute="totals.avg_assists")
+    total_ratings = fields.Integer(attribute="totals.total_ratings")
+    avg_rating = fields.Float(attribute="totals.avg_rating")
+
+
+@lru_cache(maxsize=256)
+def get_schema(schema_class, only=None, many=False):
+    """Return a shared schema instance for this class and field selection.
+
+    Building a marshmallow schema resolves and binds every field, which
+    costs more than dumping a small object, so instances are made once
+    per ``(class, only, many)`` and reused. ``only`` must be a hashable
+    tuple; unknown names raise ``ValueError``.
+    """
+    return schema_class(only=only, many=many)
@@ -0,0 +1,241 @@
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from threading import Lock
+
+from app.spatial import grid_cell, grid_cells_in_box
+from app.utils import bounding_box, haversine_distance
+
+BUCKET_SECONDS = 3600  # Games are bucketed by the hour they start in
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _hour_bucket(when):
+    # Whole hours since the epoch, on the same naive clock as Game.time
+    return math.floor((when - _EPOCH).total_seconds() / BUCKET_SECONDS)
+
+
+def in_hours(hour_of_day, hours):
+    # `hours` is a (first, last) pair, last exclusive, that may wrap past midnight
+    first, last = hours
+    return first <= hour_of_day < last if first <= last else hour_of_day >= first or hour_of_day < last
+
+
+class _Entry:
+    # What the index needs to filter one upcoming game
+    __slots__ = ("id", "court_id", "time", "lat", "lng", "max_players", "player_count")
+
+    def __init__(self, id, court_id, time, lat, lng, max_players, player_count):
+        self.id = id
+        self.court_id = court_id
+        self.time = time
+        self.lat = lat
+        self.lng = lng
+        self.max_players = max_players
+        self.player_count = player_count
+
+    @property
+    def spots_available(self):
+        return self.max_players - self.player_count
+
+
+class GameIndex:
+    """In-process index of upcoming games for combined searches.
+
+    Games starting within ``horizon_days`` are bucketed by start hour, then
+    by the same lat/lng grid as ``CourtIndex``, and carry their roster
+    counts. A search visits only the hour buckets in its time window (and
+    within its hours of the day) and the cells overlapping its radius, so
+    it never touches the database. Hour buckets in the past are dropped
+    as the clock passes them.
+
+    This worker's create/join/leave routes update the index directly. Games
+    created elsewhere are picked up every ``sync_interval`` seconds, and
+    the whole index is reloaded every ``refresh_interval`` seconds so roster
+    changes made by other workers show up too. Callers re-check spots
+    against the database when they load the matching games.
+
+    The first search loads the index; after that a background thread per
+    process does the top-ups and reloads, so searches only read memory.
+    With ``GAME_INDEX_BACKGROUND_REFRESH = False`` searches sync inline
+    when due instead.
+    """
+
+    def __init__(self, cell_deg=0.1, horizon_days=30, sync_interval=5, refresh_interval=60):
+        self.cell_deg = cell_deg
+        self.horizon_days = horizon_days
+        self.sync_interval = sync_interval
+        self.refresh_interval = refresh_interval
+        self.background = True
+        self._lock = Lock()
+        self._refresher = None  # (pid, thread)
+        self._reset()
+
+    def init_app(self, app):
+        self.cell_deg = app.config.get("GAME_INDEX_CELL_DEG", self.cell_deg)
+        self.horizon_days = app.config.get("GAME_INDEX_HORIZON_DAYS", self.horizon_days)
+        self.sync_interval = app.config.get("GAME_INDEX_SYNC_SECONDS", self.sync_interval)
+        self.refresh_interval = app.config.get("GAME_INDEX_REFRESH_SECONDS", self.refresh_interval)
+        self.background = app.config.get("GAME_INDEX_BACKGROUND_REFRESH", self.background)
+        self._refresher = None  # A running refresher sees this and exits
+        self._reset()
+
+    def _reset(self):
+        self._buckets = {}  # hour -> {cell: [entry]}
+        self._entries = {}  # game id -> entry
+        self._max_id = 0
+        self._synced_at = None
+        self._refreshed_at = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _add(self, entry):
+        if entry.id in self._entries:
+            self._remove(entry.id)
+        cells = self._buckets.setdefault(_hour_bucket(entry.time), {})
+        cells.setdefault(grid_cell(entry.lat, entry.lng, self.cell_deg), []).append(entry)
+        self._entries[entry.id] = entry
+        self._max_id = max(self._max_id, entry.id)
+
+    def _remove(self, game_id):
+        entry = self._entries.pop(game_id, None)
+        if entry is None:
+            return
+        cells = self._buckets.get(_hour_bucket(entry.time), {})
+        cell = cells.get(grid_cell(entry.lat, entry.lng, self.cell_deg), [])
+        if entry in cell:
+            cell.remove(entry)
+
+    def _evict(self, now):
+        # Drop whole hour buckets once the clock has moved past them
+        current = _hour_bucket(now)
+        for hour in [hour for hour in self._buckets if hour < current]:
+            for cell in self._buckets.pop(hour).values():
+                for entry in cell:
+                    self._entries.pop(entry.id, None)
+
+    def _load(self, *criteria):
+        from app.extensions import db
+        from app.models import Court, Game
+
+        now = datetime.now()
+        rows = db.session.query(
+            Game.id, Game.court_id, Game.time, Court.lat, Court.lng, Game.max_players, Game.player_count
+        ).join(Court, Court.id == Game.court_id).filter(
+            Game.time >= now, Game.time < now + timedelta(days=self.horizon_days), *criteria
+        ).all()
+        return [_Entry(*row) for row in rows]
+
+    def sync(self, force=False):
+        """Bring the index up to date with the database, if it is due."""
+        from app.models import Game
+
+        now = time.monotonic()
+        if force or self._refreshed_at is None or now - self._refreshed_at >= self.refresh_interval:
+            entries = self._load()
+            with self._lock:
+                self._reset()
+                for entry in entries:
+                    self._add(entry)
+                self._synced_at = self._refreshed_at = now
+        elif now - self._synced_at >= self.sync_interval:
+            entries = self._load(Game.id > self._max_id)
+            with self._lock:
+                for entry in entries:
+                    self._add(entry)
+                self._synced_at = now
+
+    def _ensure_fresh(self):
+        if self._refreshed_at is None:
+            self.sync(force=True)
+        if not self.background:
+            self.sync()
+            return
+        # Threads don't survive a fork, so each server process starts its own
+        refresher = self._refresher
+        if refresher is None or refresher[0] != os.getpid():
+            from flask import current_app
+
+            thread = threading.Thread(target=self._refresh_loop, args=(current_app._get_current_object(),),
+                                      name="game-index-refresh", daemon=True)
+            self._refresher = (os.getpid(), thread)
+            thread.start()
+
+    def _refresh_loop(self, app):
+        me = threading.current_thread()
+        while True:
+            time.sleep(self.sync_interval)
+            if self._refresher is None or self._refresher[1] is not me:
+                return
+            with app.app_context():
+                try:
+                    self.sync()
+                except Exception:
+                    app.logger.exception("Game index refresh failed")
+
+    def add(self, game, lat, lng):
+        # A game just created by this worker; ignored outside the horizon
+        now = datetime.now()
+        if now <= game.time < now + timedelta(days=self.horizon_days):
+            with self._lock:
+                self._add(_Entry(game.id, game.court_id, game.time, lat, lng,
+                                 game.max_players, game.player_count or 0))
+
+    def set_player_count(self, game_id, player_count):
+        with self._lock:
+            entry = self._entries.get(game_id)
+            if entry is not None:
+                entry.player_count = player_count
+
+    def search(self, start, end, min_spots=1, lat=None, lng=None, radius_km=None,
+               hours=None, court_id=None, after=None, limit=50):
+        """Return upcoming games matching every given filter, in (time, id) order.
+
+        ``start``/``end`` bound the start time (end exclusive) and
+        ``hours`` is an optional ``(first, last)`` pair of hours of the day,
+        last exclusive, that may wrap past midnight. ``lat``/``lng``/
+        ``radius_km`` restrict to courts within that distance. ``after`` is
+        a ``(time, id)`` keyset position. Returns up to ``limit``
+        ``(entry, distance_km)`` pairs; the distance is ``None`` without a
+        location.
+        """
+        self._ensure_fresh()
+        now = datetime.now()
+        start = max(start, now)
+
+        geo = lat is not None and lng is not None and radius_km is not None
+        if geo:
+            cell_keys = list(grid_cells_in_box(*bounding_box(lat, lng, radius_km), self.cell_deg))
+
+        matches = []
+        with self._lock:
+            self._evict(now)
+            for hour in range(_hour_bucket(start), _hour_bucket(end) + 1):
+                cells = self._buckets.get(hour)
+                # Naive epoch hours line up with the clock, so hour % 24 is the hour of day
+                if not cells or (hours is not None and not in_hours(hour % 24, hours)):
+                    continue
+                if geo:
+                    candidates = (cells[key] for key in cell_keys if key in cells)
+                else:
+                    candidates = cells.values()
+
+                found = []
+                for cell in candidates:
+                    for entry in cell:
+                        if (entry.spots_available < min_spots or not start <= entry.time < end
+                                or (court_id is not None and entry.court_id != court_id)
+                                or (after is not None and (entry.time, entry.id) <= after)):
+                            continue
+                        distance = haversine_distance(lat, lng, entry.lat, entry.lng) if geo else None
+                        if distance is None or distance <= radius_km:
+                            found.append((entry, distance))
+                # Buckets are visited in time order, so only sort within one
+                found.sort(key=lambda match: (match[0].time, match[0].id))
+                matches.extend(found)
+                if len(matches) >= limit:
+                    break
+        return matches[:limit]
@@ -0,0 +1,107 @@
+import random
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from app.extensions import db
+from app.models import User, Court, Game, GamePlayer, PlayerStats, PlayerRating, SeedRun
+
+CHUNK_SIZE = 5000
+
+
+def _insert_chunks(model, rows):
+    # executemany in fixed-size chunks so large volumes never sit in memory
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == CHUNK_SIZE:
+            db.session.execute(db.insert(model), chunk)
+            chunk = []
+    if chunk:
+        db.session.execute(db.insert(model), chunk)
+
+
+def seed_database(users=1000, courts=200, games=5000, players_per_game=8,
+                  center=(40.73, -73.99), spread_deg=0.5, seed=0):
+    """Fill an empty database with synthetic but plausibly shaped data.
+
+    Courts are scattered around ``center``, games span the past year and
+    the next two months, past games get a box score for every rostered
+    player and a few ratings each. Every user's password is ``password``.
+    Career totals are rebuilt at the end so they match the raw rows. A
+    ``SeedRun`` row records that the database holds synthetic data.
+    """
+    from app.aggregates import rebuild_career_totals
+
+    if db.session.query(User.id).first() is not None:
+        raise RuntimeError("Refusing to seed a database that already has users")
+
+    rng = random.Random(seed)
+    now = datetime.now().replace(second=0, microsecond=0)
+    password_hash = generate_password_hash("password")
+
+    _insert_chunks(User, (
+        {"id": i, "username": f"player{i}", "email": f"player{i}@example.com",
+         "password_hash": password_hash, "created_at": now}
+        for i in range(1, users + 1)
+    ))
+    _insert_chunks(Court, (
+        {"id": i, "name": f"Court {i}", "address": f"{i} Main St",
+         "lat": center[0] + rng.uniform(-spread_deg, spread_deg),
+         "lng": center[1] + rng.uniform(-spread_deg, spread_deg),
+         "created_by": rng.randint(1, users), "created_at": now}
+        for i in range(1, courts + 1)
+    ))
+
+    rosters = {}
+    game_rows = []
+    for game_id in range(1, games + 1):
+        time = now + timedelta(minutes=30 * rng.randint(-365 * 48, 60 * 48))
+        max_players = rng.choice((6, 8, 10, 10, 12))
+        roster = rng.sample(range(1, users + 1), min(users, rng.randint(0, min(max_players, players_per_game))))
+        rosters[game_id] = (time, roster)
+        game_rows.append({
+            "id": game_id, "court_id": rng.randint(1, courts), "host_id": rng.randint(1, users),
+            "time": time, "max_players": max_players, "player_count": len(roster), "created_at": now,
+        })
+    _insert_chunks(Game, game_rows)
+    del game_rows
+
+    _insert_chunks(GamePlayer, (
+        {"game_id": game_id, "user_id": user_id, "joined_at": now}
+        for game_id, (time, roster) in rosters.items()
+        for user_id in roster
+    ))
+    _insert_chunks(PlayerStats, (
+        {"game_id": game_id, "user_id": user_id, "points": rng.randint(0, 30),
+         "rebounds": rng.randint(0, 12), "assists": rng.randint(0, 10),
+         "created_at": time, "updated_at": time}
+        for game_id, (time, roster) in rosters.items() if time < now
+        for user_id in roster
+    ))
+
+    def ratings():
+        for game_id, (time, roster) in rosters.items():
+            if time >= now or len(roster) < 2:
+                continue
+            for from_user_id in roster[:3]:
+                for to_user_id in rng.sample(roster, 2):
+                    if to_user_id != from_user_id:
+                        yield {"game_id": game_id, "from_user_id": from_user_id,
+                               "to_user_id": to_user_id, "rating": rng.randint(1, 5),
+                               "comment": None, "created_at": time}
+    _insert_chunks(PlayerRating, ratings())
+    db.session.add(SeedRun(users=users, courts=courts, games=games))
+
+    db.session.commit()
+
+    # Explicit ids bypass the Postgres sequences; move them past the seeded rows
+    if db.engine.dialect.name == "postgresql":
+        for table in ("users", "courts", "games", "player_stats", "player_ratings"):
+            db.session.execute(db.text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)"
+            ))
+        db.session.commit()
+
+    rebuild_career_totals()
@@ -0,0 +1,301 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from flask import current_app
+from sqlalchemy.orm import joinedload
+
+from app.extensions import db
+from app.models import Court, Game, GameSeries
+from app.upsert import upsert
+
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+STAMP_FORMAT = "%Y%m%dT%H%M"  # Occurrence start in URLs
+
+
+class Recurrence:
+    """The part of an iCalendar RRULE that regular runs need.
+
+    ``FREQ=DAILY`` or ``FREQ=WEEKLY``, with optional ``INTERVAL``,
+    ``BYDAY`` (weekly only, e.g. ``TU,TH``), and ``COUNT`` or ``UNTIL``
+    (``YYYYMMDD`` or ``YYYYMMDDTHHMMSS``). Occurrences keep the time of day
+    of the series' first start.
+    """
+
+    def __init__(self, freq, interval=1, byday=(), count=None, until=None):
+        self.freq = freq
+        self.interval = interval
+        self.byday = tuple(sorted(set(byday)))
+        self.count = count
+        self.until = until
+
+    @classmethod
+    def parse(cls, text):
+        """Parse ``text``; raises ``ValueError`` with a user-facing message."""
+        parts = {}
+        for part in text.strip().upper().split(";"):
+            name, sep, value = part.partition("=")
+            if not sep or name in parts:
+                raise ValueError(f"Malformed rule part {part!r}")
+            parts[name] = value
+
+        unknown = set(parts) - {"FREQ", "INTERVAL", "BYDAY", "COUNT", "UNTIL"}
+        if unknown:
+            raise ValueError(f"Unsupported rule parts: {', '.join(sorted(unknown))}")
+        freq = parts.get("FREQ")
+        if freq not in ("DAILY", "WEEKLY"):
+            raise ValueError("FREQ must be DAILY or WEEKLY")
+        try:
+            interval = int(parts.get("INTERVAL", 1))
+            count = int(parts["COUNT"]) if "COUNT" in parts else None
+        except ValueError:
+            raise ValueError("INTERVAL and COUNT must be whole numbers") from None
+        if interval < 1 or (count is not None and count < 1):
+            raise ValueError("INTERVAL and COUNT must be at least 1")
+
+        byday = ()
+        if "BYDAY" in parts:
+            if freq != "WEEKLY":
+                raise ValueError("BYDAY is only supported with FREQ=WEEKLY")
+            byday = tuple(WEEKDAYS.index(day) for day in parts["BYDAY"].split(",") if day in WEEKDAYS)
+            if len(byday) != len(parts["BYDAY"].split(",")):
+                raise ValueError(f"BYDAY takes days from {','.join(WEEKDAYS)}")
+
+        until = None
+        if "UNTIL" in parts:
+            if count is not None:
+                raise ValueError("Use COUNT or UNTIL, not both")
+            for fmt in ("%Y%m%dT%H%M%S", "%Y%m%d"):
+                try:
+                    until = datetime.strptime(parts["UNTIL"], fmt)
+                    break
+                except ValueError:
+                    continue
+            else:
+                raise ValueError("UNTIL must be YYYYMMDD or YYYYMMDDTHHMMSS")
+            if len(parts["UNTIL"]) == 8:
+                until += timedelta(days=1, seconds=-1)  # A date means the whole day
+        return cls(freq, interval, byday, count, until)
+
+    def __str__(self):
+        parts = [f"FREQ={self.freq}"]
+        if self.interval != 1:
+            parts.append(f"INTERVAL={self.interval}")
+        if self.byday:
+            parts.append("BYDAY=" + ",".join(WEEKDAYS[day] for day in self.byday))
+        if self.count is not None:
+            parts.append(f"COUNT={self.count}")
+        if self.until is not None:
+            parts.append(f"UNTIL={self.until:%Y%m%dT%H%M%S}")
+        return ";".join(parts)
+
+    def _periods(self, dtstart, first_period):
+        # Yield every occurrence from period `first_period` on, in order
+        if self.freq == "DAILY":
+            period = first_period
+            while True:
+                yield dtstart + timedelta(days=period * self.interval)
+                period += 1
+        week_start = dtstart - timedelta(days=dtstart.weekday())
+        days = self.byday or (dtstart.weekday(),)
+        period = first_period
+        while True:
+            week = week_start + timedelta(weeks=period * self.interval)
+            for day in days:
+                occurrence = week + timedelta(days=day)
+                if occurrence >= dtstart:
+                    yield occurrence
+            period += 1
+
+    def between(self, dtstart, start, end):
+        """Yield occurrences of a series first starting at ``dtstart`` within [start, end)."""
+        first_period = 0
+        if self.count is None and start > dtstart:
+            # Skip whole periods before the window; COUNT needs them counted
+            period_days = self.interval * (1 if self.freq == "DAILY" else 7)
+            first_period = max(0, (start - dtstart).days // period_days - 1)
+        for n, occurrence in enumerate(self._periods(dtstart, first_period)):
+            if (self.count is not None and n >= self.count) or occurrence >= end \
+                    or (self.until is not None and occurrence > self.until):
+                return
+            if occurrence >= start:
+                yield occurrence
+
+    def includes(self, dtstart, when):
+        return any(True for _ in self.between(dtstart, when, when + timedelta(microseconds=1)))
+
+
+class Occurrence:
+    """A series game that has no ``Game`` row yet, shaped like one for listings.
+
+    ``id`` is ``None``; keyset pagination sorts these by
+    ``(time, -series_id)`` (see ``app.pagination.position``).
+    """
+
+    def __init__(self, series, time):
+        self.id = None
+        self.series_id = series.id
+        self.court_id = series.court_id
+        self.court = series.court
+        self.host_id = series.host_id
+        self.host = series.host
+        self.time = time
+        self.duration_minutes = series.duration_minutes
+        self.max_players = series.max_players
+        self.player_count = 0
+
+    @property
+    def current_players(self):
+        return self.player_count
+
+    @property
+    def spots_available(self):
+        return self.max_players - self.player_count
+
+    @property
+    def ends_at(self):
+        return self.time + timedelta(minutes=self.duration_minutes)
+
+    @property
+    def stamp(self):
+        return f"{self.time:{STAMP_FORMAT}}"
+
+
+def window_end():
+    # Occurrences are listed and materialized only up to this point
+    return datetime.now() + timedelta(days=current_app.config.get("SERIES_WINDOW_DAYS", 28))
+
+
+def expand_occurrences(start, end=None, court_ids=None, after=None):
+    """List series occurrences without a game row in [start, end).
+
+    ``start`` is raised to now and ``end`` (default: none) capped at the
+    rolling window.
+    ``court_ids`` restricts to those courts and ``after`` is a keyset
+    position (see ``app.pagination.position``) to continue from.
+    Occurrences whose slot has since been booked by a one-off game are
+    left out, as ``materialize`` would refuse them. Returns ``Occurrence``
+    objects in listing order.
+    """
+    from app.extensions import court_schedule
+
+    start, end = max(start, datetime.now()), window_end() if end is None else min(end, window_end())
+    if start >= end or (court_ids is not None and not court_ids):
+        return []
+
+    query = GameSeries.query.options(joinedload(GameSeries.court), joinedload(GameSeries.host)).filter(
+        GameSeries.starts_at < end
+    )
+    if court_ids is not None:
+        query = query.filter(GameSeries.court_id.in_(court_ids))
+    occurrences = [
+        Occurrence(series, time)
+        for series in query
+        for time in Recurrence.parse(series.rule).between(series.starts_at, start, end)
+    ]
+    if after is not None:
+        occurrences = [occurrence for occurrence in occurrences
+                       if (occurrence.time, -occurrence.series_id) > after]
+    if not occurrences:
+        return []
+
+    materialized = set(db.session.query(Game.series_id, Game.time).filter(
+        Game.series_id.in_({occurrence.series_id for occurrence in occurrences}),
+        Game.time >= start, Game.time < end,
+    ))
+    occurrences = [
+        occurrence for occurrence in occurrences
+        if (occurrence.series_id, occurrence.time) not in materialized
+        and not court_schedule.busy(occurrence.court_id, occurrence.time, occurrence.ends_at)
+    ]
+    occurrences.sort(key=lambda occurrence: (occurrence.time, -occurrence.series_id))
+    return occurrences
+
+
+def page_occurrences(rows, limit, start, end=None, court_ids=None, after=None, game_of=lambda row: row):
+    """Return the occurrences that may belong on one keyset page of games.
+
+    ``rows`` are the page's games, fetched with ``limit + 1`` as usual. When
+    that fills the page, nothing after its last game can make it onto the
+    page, so only that stretch of time is expanded.
+    """
+    if len(rows) > limit:
+        last = game_of(rows[-1]).time + timedelta(microseconds=1)
+        end = last if end is None else min(end, last)
+    return expand_occurrences(start, end, court_ids, after)
+
+
+def clash(court_id, times, minutes, exclude_series_id=None):
+    """Return the first booking at the court overlapping any of the slots, or None.
+
+    ``times`` are slot starts in order, each ``minutes`` long. Bookings are
+    games (read through ``court_schedule``, so call this holding the
+    court's row lock) and every occurrence of the court's other series,
+    materialized or not. Returns a ``(start, end)`` pair.
+    """
+    from app.extensions import court_schedule
+
+    if not times:
+        return None
+    first, last = times[0], times[-1] + timedelta(minutes=minutes)
+    booked = [(start, end) for start, end, _ in court_schedule.conflicts(
+        court_id, first, int((last - first).total_seconds() // 60)
+    )]
+    earliest = first - timedelta(minutes=court_schedule.max_minutes)
+    query = GameSeries.query.filter(GameSeries.court_id == court_id, GameSeries.starts_at < last)
+    if exclude_series_id is not None:
+        query = query.filter(GameSeries.id != exclude_series_id)
+    for series in query:
+        length = timedelta(minutes=series.duration_minutes)
+        booked.extend((time, time + length)
+                      for time in Recurrence.parse(series.rule).between(series.starts_at, earliest, last))
+    if not booked:
+        return None
+
+    # Same search as the court schedule: sorted starts plus a running max of ends
+    booked.sort()
+    starts = [start for start, _ in booked]
+    max_ends = list(accumulate((end for _, end in booked), max))
+    for time in times:
+        end = time + timedelta(minutes=minutes)
+        for booking in booked[bisect_right(max_ends, time):bisect_left(starts, end)]:
+            if booking[1] > time:
+                return booking
+    return None
+
+
+def materialize(series, time):
+    """Return the ``Game`` for one occurrence of ``series``, creating it if needed.
+
+    Returns ``None`` if ``time`` is not an occurrence inside the rolling
+    window, or if a one-off game has since taken its slot. Concurrent
+    calls for the same occurrence end up with the same row through
+    ``unique_series_occurrence``. The court row is locked like
+    ``create_game`` does. Commits the new row.
+    """
+    from app.extensions import court_schedule, game_index
+
+    if not datetime.now() <= time < window_end() or not Recurrence.parse(series.rule).includes(series.starts_at, time):
+        return None
+    game = Game.query.filter_by(series_id=series.id, time=time).first()
+    if game is not None:
+        return game
+
+    court = db.session.get(Court, series.court_id, with_for_update=True)
+    game = Game.query.filter_by(series_id=series.id, time=time).first()
+    if game is not None:
+        return game  # Materialized by another request while we waited for the lock
+    if court_schedule.conflicts(series.court_id, time, series.duration_minutes):
+        db.session.rollback()
+        return None
+    lat, lng = court.lat, court.lng
+    upsert(Game, [{
+        "court_id": series.court_id, "host_id": series.host_id, "time": time,
+        "duration_minutes": series.duration_minutes, "max_players": series.max_players,
+        "player_count": 0, "series_id": series.id, "created_at": datetime.now(),
+    }], ["series_id", "time"])
+    game = Game.query.filter_by(series_id=series.id, time=time).one()
+    db.session.commit()
+    court_schedule.add(game)
+    game_index.add(game, lat, lng)
+    return game
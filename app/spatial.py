@@ -0,0 +1,156 @@
+import math
+import time
+from threading import Lock
+
+from app.utils import CoordinateColumns, bounding_box, haversine_batch, nearest_k, np, within_radius
+
+
+def grid_cell(lat, lng, cell_deg):
+    # Key of the cell_deg x cell_deg grid cell holding (lat, lng)
+    return (math.floor(lat / cell_deg), math.floor(lng / cell_deg))
+
+
+def grid_cells_in_box(min_lat, max_lat, min_lng, max_lng, cell_deg):
+    """Yield the key of every grid cell overlapping a ``bounding_box``."""
+    lat_lo, lng_lo = grid_cell(min_lat, min_lng, cell_deg)
+    lat_hi, lng_hi = grid_cell(max_lat, max_lng, cell_deg)
+    wrap = math.floor(360 / cell_deg)
+    for i in range(lat_lo, lat_hi + 1):
+        for j in range(lng_lo, min(lng_hi, lng_lo + wrap - 1) + 1):
+            # Fold cells past the antimeridian back into [-180, 180)
+            yield (i, (j + wrap // 2) % wrap - wrap // 2)
+
+
+class _Cell:
+    # Courts in one grid cell, with batch-haversine columns built on demand
+    __slots__ = ("ids", "lats", "lngs", "_columns", "_id_array")
+
+    def __init__(self):
+        self.ids = []
+        self.lats = []
+        self.lngs = []
+        self._columns = None
+        self._id_array = None
+
+    def add(self, court_id, lat, lng):
+        self.ids.append(court_id)
+        self.lats.append(lat)
+        self.lngs.append(lng)
+        self._columns = self._id_array = None
+
+    @property
+    def columns(self):
+        columns = self._columns
+        if columns is None:
+            columns = self._columns = CoordinateColumns(self.lats, self.lngs)
+        return columns
+
+    @property
+    def id_array(self):
+        id_array = self._id_array
+        if id_array is None:
+            id_array = self._id_array = np.asarray(self.ids, dtype=np.int64)
+        return id_array
+
+
+class CourtIndex:
+    """In-process grid index over court coordinates.
+
+    Courts are bucketed into cells of ``cell_deg`` degrees so a radius query
+    only looks at the handful of cells overlapping its bounding box instead of
+    every court in the table. The index is filled lazily from the database and
+    topped up with any courts whose id is above the highest one seen, so
+    courts created by other workers show up within ``sync_interval`` seconds.
+
+    Each cell keeps radian/cosine columns for its courts, so distances for a
+    whole cell are computed in one ``haversine_batch`` call.
+    """
+
+    def __init__(self, cell_deg=0.1, sync_interval=5):
+        self.cell_deg = cell_deg
+        self.sync_interval = sync_interval
+        self._lock = Lock()
+        self._reset()
+
+    def init_app(self, app):
+        self.cell_deg = app.config.get("COURT_INDEX_CELL_DEG", self.cell_deg)
+        self.sync_interval = app.config.get("COURT_INDEX_SYNC_SECONDS", self.sync_interval)
+        self._reset()
+
+    def _reset(self):
+        self._cells = {}
+        self._max_id = 0
+        self._synced_at = None
+
+    def __len__(self):
+        return sum(len(cell.ids) for cell in self._cells.values())
+
+    def _cell(self, lat, lng):
+        return grid_cell(lat, lng, self.cell_deg)
+
+    def _add(self, court_id, lat, lng):
+        key = self._cell(lat, lng)
+        cell = self._cells.get(key)
+        if cell is None:
+            cell = self._cells[key] = _Cell()
+        cell.add(court_id, lat, lng)
+        self._max_id = max(self._max_id, court_id)
+
+    def add(self, court_id, lat, lng):
+        with self._lock:
+            self._add(court_id, lat, lng)
+
+    def sync(self, force=False):
+        # Pull in courts created since the last sync (by this or another worker)
+        now = time.monotonic()
+        if not force and self._synced_at is not None and now - self._synced_at < self.sync_interval:
+            return
+
+        from app.extensions import db
+        from app.models import Court
+
+        with self._lock:
+            rows = db.session.query(Court.id, Court.lat, Court.lng).filter(
+                Court.id > self._max_id
+            ).all()
+            for court_id, lat, lng in rows:
+                self._add(court_id, lat, lng)
+            self._synced_at = now
+
+    def _cells_in_box(self, min_lat, max_lat, min_lng, max_lng):
+        for key in grid_cells_in_box(min_lat, max_lat, min_lng, max_lng, self.cell_deg):
+            cell = self._cells.get(key)
+            if cell:
+                yield cell
+
+    def _search(self, lat, lng, radius_km):
+        # (court ids, distances) for every court within radius_km
+        self.sync()
+        ids, distances = [], []
+        for cell in self._cells_in_box(*bounding_box(lat, lng, radius_km)):
+            cell_distances = haversine_batch(lat, lng, cell.columns)
+            hits = within_radius(cell_distances, radius_km)
+            if np is not None:
+                ids.append(cell.id_array[hits])
+                distances.append(cell_distances[hits])
+            else:
+                ids.extend(cell.ids[i] for i in hits)
+                distances.extend(cell_distances[i] for i in hits)
+
+        if np is not None:
+            if not ids:
+                return np.empty(0, dtype=np.int64), np.empty(0)
+            return np.concatenate(ids), np.concatenate(distances)
+        return ids, distances
+
+    def within(self, lat, lng, radius_km):
+        """Return ``{court_id: distance_km}`` for courts within ``radius_km``."""
+        ids, distances = self._search(lat, lng, radius_km)
+        if np is not None:
+            ids, distances = ids.tolist(), distances.tolist()
+        return dict(zip(ids, distances))
+
+    def nearest(self, lat, lng, k, radius_km):
+        """Return up to ``k`` ``(court_id, distance_km)`` pairs within ``radius_km``, nearest first."""
+        ids, distances = self._search(lat, lng, radius_km)
+        return [(int(ids[i]), float(distances[i])) for i in nearest_k(distances, k)]
@@ -0,0 +1,180 @@
+from datetime import datetime
+
+from app.aggregates import record_ratings_many, record_stats, record_stats_many
+from app.extensions import db, events
+from app.leaderboards import schedule_leaderboard_refresh
+from app.models import Game, GamePlayer, PlayerRating, PlayerStats
+from app.upsert import upsert
+
+STAT_FIELDS = ("points", "rebounds", "assists")
+
+
+def parse_box_score(payload):
+    """Validate a ``{"stats": [{"user_id", "points", ...}]}`` body.
+
+    Returns a list of ``(user_id, points, rebounds, assists)`` tuples and
+    raises ``ValueError`` with a user-facing message on bad input. Missing
+    stat fields count as 0.
+    """
+    lines = payload.get("stats") if isinstance(payload, dict) else None
+    if not isinstance(lines, list) or not lines:
+        raise ValueError("Expected a non-empty 'stats' list")
+
+    parsed = []
+    seen = set()
+    for line in lines:
+        if not isinstance(line, dict):
+            raise ValueError("Each stats entry must be an object")
+        values = [line.get("user_id")] + [line.get(name, 0) for name in STAT_FIELDS]
+        if any(type(value) is not int or value < 0 for value in values):
+            raise ValueError("user_id and stats must be non-negative integers")
+        if values[0] in seen:
+            raise ValueError(f"Duplicate entry for user {values[0]}")
+        seen.add(values[0])
+        parsed.append(tuple(values))
+    return parsed
+
+
+def rostered_user_ids(game_id, user_ids):
+    # Which of user_ids are on the game's roster, in one query
+    return set(db.session.scalars(
+        db.select(GamePlayer.user_id).where(
+            GamePlayer.game_id == game_id,
+            GamePlayer.user_id.in_(user_ids)
+        )
+    ))
+
+
+def save_box_score(game_id, lines):
+    """Write box-score lines for a game with a single upsert.
+
+    ``lines`` are ``(user_id, points, rebounds, assists)`` tuples. The game
+    row is locked first so concurrent submissions for the same game apply
+    one after another and career totals see the right previous values.
+    The caller commits.
+    """
+    db.session.execute(db.select(Game.id).where(Game.id == game_id).with_for_update())
+
+    user_ids = [line[0] for line in lines]
+    previous = {
+        row.user_id: (row.points, row.rebounds, row.assists)
+        for row in db.session.execute(
+            db.select(PlayerStats.user_id, PlayerStats.points, PlayerStats.rebounds, PlayerStats.assists)
+            .where(PlayerStats.game_id == game_id, PlayerStats.user_id.in_(user_ids))
+        )
+    }
+
+    now = datetime.now()
+    upsert(
+        PlayerStats,
+        [
+            {"game_id": game_id, "user_id": user_id, "points": points, "rebounds": rebounds,
+             "assists": assists, "created_at": now, "updated_at": now}
+            for user_id, points, rebounds, assists in lines
+        ],
+        ["game_id", "user_id"],
+        update_columns=STAT_FIELDS + ("updated_at",)
+    )
+    record_stats_many((line[0], previous.get(line[0]), line[1:]) for line in lines)
+    schedule_leaderboard_refresh()
+    events.publish(game_id, "stats", {"lines": [
+        dict(zip(("user_id",) + STAT_FIELDS, line)) for line in lines
+    ]})
+    return len(lines)
+
+
+def remove_box_score_line(game_id, user_id):
+    """Delete a player's box-score line for a game, if there is one.
+
+    Takes the same game lock as ``save_box_score`` and backs the line out
+    of the player's career totals. Returns whether a line was removed; the
+    caller commits.
+    """
+    db.session.execute(db.select(Game.id).where(Game.id == game_id).with_for_update())
+
+    previous = db.session.execute(
+        db.select(PlayerStats.points, PlayerStats.rebounds, PlayerStats.assists)
+        .where(PlayerStats.game_id == game_id, PlayerStats.user_id == user_id)
+    ).first()
+    if previous is None:
+        return False
+
+    db.session.execute(
+        db.delete(PlayerStats).where(PlayerStats.game_id == game_id, PlayerStats.user_id == user_id)
+    )
+    record_stats(user_id, tuple(previous), None)
+    schedule_leaderboard_refresh()
+    return True
+
+
+def parse_ratings(payload, from_user_id):
+    """Validate a ``{"ratings": [{"to_user_id", "rating", "comment"}]}`` body.
+
+    Returns a list of ``(to_user_id, rating, comment)`` tuples and raises
+    ``ValueError`` with a user-facing message on bad input.
+    """
+    entries = payload.get("ratings") if isinstance(payload, dict) else None
+    if not isinstance(entries, list) or not entries:
+        raise ValueError("Expected a non-empty 'ratings' list")
+
+    parsed = []
+    seen = set()
+    for entry in entries:
+        if not isinstance(entry, dict):
+            raise ValueError("Each rating must be an object")
+        to_user_id, rating = entry.get("to_user_id"), entry.get("rating")
+        comment = entry.get("comment") or ""
+        if type(to_user_id) is not int or type(rating) is not int or not isinstance(comment, str):
+            raise ValueError("to_user_id and rating must be integers")
+        if to_user_id == from_user_id:
+            raise ValueError("You cannot rate yourself")
+        if not 1 <= rating <= 5:
+            raise ValueError("Rating must be between 1 and 5")
+        if to_user_id in seen:
+            raise ValueError(f"Duplicate rating for user {to_user_id}")
+        seen.add(to_user_id)
+        parsed.append((to_user_id, rating, comment.strip()))
+    return parsed
+
+
+def save_ratings(game_id, from_user_id, lines):
+    """Write one player's ratings for a game with a single upsert.
+
+    ``lines`` are ``(to_user_id, rating, comment)`` tuples, merged on
+    ``unique_game_user_rating``. The rater's roster row is locked first,
+    so overlapping submissions from the same player apply one after
+    another and career totals see the right previous values. The caller
+    checks roster membership and commits.
+    """
+    db.session.execute(
+        db.select(GamePlayer.user_id)
+        .where(GamePlayer.game_id == game_id, GamePlayer.user_id == from_user_id)
+        .with_for_update()
+    )
+
+    to_user_ids = [line[0] for line in lines]
+    previous = dict(db.session.execute(
+        db.select(PlayerRating.to_user_id, PlayerRating.rating).where(
+            PlayerRating.game_id == game_id,
+            PlayerRating.from_user_id == from_user_id,
+            PlayerRating.to_user_id.in_(to_user_ids)
+        )
+    ).all())
+
+    now = datetime.now()
+    upsert(
+        PlayerRating,
+        [
+            {"game_id": game_id, "from_user_id": from_user_id, "to_user_id": to_user_id,
+             "rating": rating, "comment": comment, "created_at": now}
+            for to_user_id, rating, comment in lines
+        ],
+        ["from_user_id", "to_user_id", "game_id"],
+        update_columns=("rating", "comment")
+    )
+    record_ratings_many((to_user_id, previous.get(to_user_id), rating) for to_user_id, rating, _ in lines)
+    schedule_leaderboard_refresh()
+    events.publish(game_id, "ratings", {"from_user_id": from_user_id, "ratings": [
+        {"to_user_id": to_user_id, "rating": rating} for to_user_id, rating, _ in lines
+    ]})
+    return len(lines)
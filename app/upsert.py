@@ -0,0 +1,38 @@
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from app.extensions import db
+
+
+def upsert(model, rows, index_elements, update_columns=(), increment_columns=()):
+    """Insert ``rows`` into ``model``'s table in one statement, merging conflicts.
+
+    Rows that collide with an existing row on the unique key
+    ``index_elements`` overwrite ``update_columns`` with the new values and
+    add the new values onto ``increment_columns``. Emits
+    ``INSERT ... ON CONFLICT DO UPDATE`` on Postgres and SQLite and
+    ``INSERT ... ON DUPLICATE KEY UPDATE`` on MySQL.
+    """
+    table = model.__table__
+    dialect = db.session.get_bind(mapper=model.__mapper__).dialect.name
+
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(table).values(rows)
+        new = stmt.excluded
+        values = {name: new[name] for name in update_columns}
+        values.update({name: table.c[name] + new[name] for name in increment_columns})
+        if not values:
+            return db.session.execute(stmt.on_conflict_do_nothing(index_elements=index_elements))
+        return db.session.execute(stmt.on_conflict_do_update(index_elements=index_elements, set_=values))
+
+    if dialect in ("mysql", "mariadb"):
+        stmt = mysql.insert(table).values(rows)
+        new = stmt.inserted
+        values = {name: new[name] for name in update_columns}
+        values.update({name: table.c[name] + new[name] for name in increment_columns})
+        if not values:
+            # MySQL has no DO NOTHING; a self-assignment of the key is the idiom
+            values = {index_elements[0]: table.c[index_elements[0]]}
+        return db.session.execute(stmt.on_duplicate_key_update(values))
+
+    raise NotImplementedError(f"upsert is not supported on {dialect}")
@@ -1,5 +1,13 @@
+import heapq
 import math
 
+try:
+    import numpy as np
+except ImportError:  # fall back to the pure-Python batch functions below
+    np = None
+
+EARTH_RADIUS_KM = 6371
+
 def haversine_distance(lat1, lng1, lat2, lng2):
     # Convert decimal degrees to radians
     lat1, lng1, lat2, lng2 = map(math.radians, [lat1, lng1, lat2, lng2])
@@ -10,5 +18,72 @@ def haversine_distance(lat1, lng1, lat2, lng2):
     a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlng/2)**2
     c = 2 * math.asin(math.sqrt(a))
 
-    r = 6371  # Earth radius in kilometers
+    r = EARTH_RADIUS_KM  # Earth radius in kilometers
     return c * r
+
+def bounding_box(lat, lng, radius_km):
+    # Smallest lat/lng box containing every point within radius_km of (lat, lng).
+    # Returns (min_lat, max_lat, min_lng, max_lng); longitudes may fall outside
+    # [-180, 180] when the box crosses the antimeridian.
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = lat - dlat, lat + dlat
+    if min_lat <= -90 or max_lat >= 90:
+        # Box touches a pole, so every longitude is in range
+        return max(min_lat, -90), min(max_lat, 90), -180.0, 180.0
+
+    dlng = math.degrees(math.asin(min(1.0, math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(lat)))))
+    return min_lat, max_lat, lng - dlng, lng + dlng
+
+class CoordinateColumns:
+    """Coordinates pre-converted for batch haversine.
+
+    Stores latitude and longitude in radians plus cos(latitude), so a query
+    only pays for the trigonometry that depends on its origin. Columns are
+    NumPy arrays when NumPy is installed and plain lists otherwise.
+    """
+    __slots__ = ("lat", "lng", "cos_lat")
+
+    def __init__(self, lats, lngs):
+        if np is not None:
+            self.lat = np.radians(np.asarray(lats, dtype=float))
+            self.lng = np.radians(np.asarray(lngs, dtype=float))
+            self.cos_lat = np.cos(self.lat)
+        else:
+            self.lat = [math.radians(v) for v in lats]
+            self.lng = [math.radians(v) for v in lngs]
+            self.cos_lat = [math.cos(v) for v in self.lat]
+
+    def __len__(self):
+        return len(self.lat)
+
+def haversine_batch(lat, lng, columns):
+    # Distances in km from one origin to every point in a CoordinateColumns
+    lat0, lng0 = math.radians(lat), math.radians(lng)
+    cos0 = math.cos(lat0)
+    if np is not None:
+        a = np.sin((columns.lat - lat0) / 2)**2 + cos0 * columns.cos_lat * np.sin((columns.lng - lng0) / 2)**2
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    distances = []
+    for lat2, lng2, cos2 in zip(columns.lat, columns.lng, columns.cos_lat):
+        a = math.sin((lat2 - lat0) / 2)**2 + cos0 * cos2 * math.sin((lng2 - lng0) / 2)**2
+        distances.append(2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0))))
+    return distances
+
+def within_radius(distances, radius_km):
+    # Positions of the distances that fall inside radius_km
+    if np is not None and isinstance(distances, np.ndarray):
+        return np.flatnonzero(distances <= radius_km)
+    return [i for i, d in enumerate(distances) if d <= radius_km]
+
+def nearest_k(distances, k):
+    # Positions of the k smallest distances, nearest first
+    n = len(distances)
+    if np is not None and isinstance(distances, np.ndarray):
+        if k < n:
+            # Partial selection is O(n); only the k winners get fully sorted
+            idx = np.argpartition(distances, k - 1)[:k]
+        else:
+            idx = np.arange(n)
+        return idx[np.argsort(distances[idx], kind="stable")]
+    return heapq.nsmallest(k, range(n), key=distances.__getitem__)
@@ -1,6 +1,68 @@
 import os
 
+
+def _int_env(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
 class DevelopmentConfig:
     SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key")
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+
+class ProductionConfig(DevelopmentConfig):
+    # Every setting below can be overridden from the environment
+    SECRET_KEY = os.getenv("SECRET_KEY")
+
+    # Pool sizes are per worker process: workers * (size + overflow) must
+    # stay under the server's max_connections
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": _int_env("DB_POOL_SIZE", 10),
+        "max_overflow": _int_env("DB_MAX_OVERFLOW", 5),
+        "pool_timeout": _int_env("DB_POOL_TIMEOUT", 5),
+        "pool_recycle": _int_env("DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": True,
+        # Server-side ceiling for any statement; routes tighten it further
+        "connect_args": {"options": f"-c statement_timeout={_int_env('DB_STATEMENT_TIMEOUT_MS', 15000)}"},
+    }
+
+    # Reads from @read_replica routes go here when DATABASE_REPLICA_URL is set
+    SQLALCHEMY_BINDS = {"replica": os.getenv("DATABASE_REPLICA_URL")} if os.getenv("DATABASE_REPLICA_URL") else {}
+    REPLICA_STICKY_SECONDS = _int_env("REPLICA_STICKY_SECONDS", 5)
+
+    # LISTEN/NOTIFY carries game events between worker processes
+    EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "postgres")
+
+    SERVER_TIMING = False
+    # /metrics answers 404 until this is set; scrapers send it as a bearer token
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+    SLOW_QUERY_MS = _int_env("SLOW_QUERY_MS", 500)
+    SLOW_REQUEST_MS = _int_env("SLOW_REQUEST_MS", 1000)
+
+
+class TestingConfig(DevelopmentConfig):
+    # Used by tests/: a private in-memory database and cheap, inline hashing
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.getenv("TEST_DATABASE_URL", "sqlite://")
+    PASSWORD_HASH_WORKERS = 0
+    PASSWORD_HASH_METHOD = "pbkdf2:sha256:1000"
+    # The in-memory database is one connection; keep index refreshes on the test's thread
+    GAME_INDEX_BACKGROUND_REFRESH = False
+
+
+CONFIGS = {
+    "development": DevelopmentConfig,
+    "production": ProductionConfig,
+    "testing": TestingConfig,
+}
+
+
+def get_config(name=None):
+    # APP_CONFIG=production selects ProductionConfig; defaults to development
+    name = name or os.getenv("APP_CONFIG", "development")
+    try:
+        return CONFIGS[name]
+    except KeyError:
+        raise ValueError(f"Unknown APP_CONFIG {name!r}; expected one of {', '.join(CONFIGS)}") from None
@@ -0,0 +1,32 @@
+"""Add denormalized player_count to games
+
+Revision ID: 5b9e2f4c7a1d
+Revises: 37e8162690e7
+Create Date: 2026-10-16 09:12:31.204118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b9e2f4c7a1d'
+down_revision = '37e8162690e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('player_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill from the existing rosters
+    op.execute(
+        "UPDATE games SET player_count = "
+        "(SELECT COUNT(*) FROM game_players WHERE game_players.game_id = games.id)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.drop_column('player_count')
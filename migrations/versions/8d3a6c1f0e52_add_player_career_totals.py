@@ -0,0 +1,61 @@
+"""Add player_career_totals summary table
+
+Revision ID: 8d3a6c1f0e52
+Revises: 5b9e2f4c7a1d
+Create Date: 2026-10-17 10:02:44.618305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d3a6c1f0e52'
+down_revision = '5b9e2f4c7a1d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('player_career_totals',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('games_played', sa.Integer(), nullable=False),
+    sa.Column('total_points', sa.Integer(), nullable=False),
+    sa.Column('total_rebounds', sa.Integer(), nullable=False),
+    sa.Column('total_assists', sa.Integer(), nullable=False),
+    sa.Column('total_ratings', sa.Integer(), nullable=False),
+    sa.Column('rating_sum', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+    # Backfill from existing stats and ratings; `flask rebuild-career-totals`
+    # performs the same computation on demand
+    op.execute("""
+        INSERT INTO player_career_totals
+            (user_id, games_played, total_points, total_rebounds, total_assists,
+             total_ratings, rating_sum, updated_at)
+        SELECT users.id,
+               COALESCE(s.games_played, 0), COALESCE(s.total_points, 0),
+               COALESCE(s.total_rebounds, 0), COALESCE(s.total_assists, 0),
+               COALESCE(r.total_ratings, 0), COALESCE(r.rating_sum, 0),
+               CURRENT_TIMESTAMP
+        FROM users
+        LEFT JOIN (
+            SELECT user_id, COUNT(*) AS games_played,
+                   SUM(COALESCE(points, 0)) AS total_points,
+                   SUM(COALESCE(rebounds, 0)) AS total_rebounds,
+                   SUM(COALESCE(assists, 0)) AS total_assists
+            FROM player_stats GROUP BY user_id
+        ) s ON s.user_id = users.id
+        LEFT JOIN (
+            SELECT to_user_id, COUNT(*) AS total_ratings, SUM(rating) AS rating_sum
+            FROM player_ratings GROUP BY to_user_id
+        ) r ON r.to_user_id = users.id
+        WHERE s.user_id IS NOT NULL OR r.to_user_id IS NOT NULL
+    """)
+
+
+def downgrade():
+    op.drop_table('player_career_totals')
@@ -0,0 +1,31 @@
+"""Add seed_runs table marking synthetic data
+
+Revision ID: 9e4b7c2a6f18
+Revises: d5e8a3c61f07
+Create Date: 2026-10-17 21:04:12.318406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e4b7c2a6f18'
+down_revision = 'd5e8a3c61f07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('seed_runs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('users', sa.Integer(), nullable=False),
+    sa.Column('courts', sa.Integer(), nullable=False),
+    sa.Column('games', sa.Integer(), nullable=False),
+    sa.Column('seeded_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('seed_runs')
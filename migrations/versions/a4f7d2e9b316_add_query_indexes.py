@@ -0,0 +1,48 @@
+"""Add composite indexes for route query shapes
+
+Revision ID: a4f7d2e9b316
+Revises: 8d3a6c1f0e52
+Create Date: 2026-10-17 14:37:09.551820
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4f7d2e9b316'
+down_revision = '8d3a6c1f0e52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.create_index('ix_games_time_id', ['time', 'id'], unique=False)
+        batch_op.create_index('ix_games_court_id_time_id', ['court_id', 'time', 'id'], unique=False)
+
+    with op.batch_alter_table('game_players', schema=None) as batch_op:
+        batch_op.create_index('ix_game_players_user_id_game_id', ['user_id', 'game_id'], unique=False)
+
+    with op.batch_alter_table('player_stats', schema=None) as batch_op:
+        batch_op.create_index('ix_player_stats_user_id_game_id', ['user_id', 'game_id'], unique=False)
+
+    with op.batch_alter_table('player_ratings', schema=None) as batch_op:
+        batch_op.create_index('ix_player_ratings_to_user_id_created_at', ['to_user_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_player_ratings_game_id_from_user_id', ['game_id', 'from_user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('player_ratings', schema=None) as batch_op:
+        batch_op.drop_index('ix_player_ratings_game_id_from_user_id')
+        batch_op.drop_index('ix_player_ratings_to_user_id_created_at')
+
+    with op.batch_alter_table('player_stats', schema=None) as batch_op:
+        batch_op.drop_index('ix_player_stats_user_id_game_id')
+
+    with op.batch_alter_table('game_players', schema=None) as batch_op:
+        batch_op.drop_index('ix_game_players_user_id_game_id')
+
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.drop_index('ix_games_court_id_time_id')
+        batch_op.drop_index('ix_games_time_id')
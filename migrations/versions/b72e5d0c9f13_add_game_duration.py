@@ -0,0 +1,27 @@
+"""Add duration_minutes to games
+
+Revision ID: b72e5d0c9f13
+Revises: f3c82a5b91d4
+Create Date: 2026-10-17 18:40:11.602713
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b72e5d0c9f13'
+down_revision = 'f3c82a5b91d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing games get the default length
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('duration_minutes', sa.Integer(), server_default='90', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.drop_column('duration_minutes')
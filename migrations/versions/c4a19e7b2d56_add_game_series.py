@@ -0,0 +1,51 @@
+"""Add game_series and games.series_id
+
+Revision ID: c4a19e7b2d56
+Revises: b72e5d0c9f13
+Create Date: 2026-10-17 21:05:37.218904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a19e7b2d56'
+down_revision = 'b72e5d0c9f13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('game_series',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('court_id', sa.Integer(), nullable=False),
+    sa.Column('host_id', sa.Integer(), nullable=False),
+    sa.Column('starts_at', sa.DateTime(), nullable=False),
+    sa.Column('rule', sa.String(length=200), nullable=False),
+    sa.Column('duration_minutes', sa.Integer(), nullable=False),
+    sa.Column('max_players', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['court_id'], ['courts.id'], ),
+    sa.ForeignKeyConstraint(['host_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('game_series', schema=None) as batch_op:
+        batch_op.create_index('ix_game_series_court_id', ['court_id'], unique=False)
+
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('series_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_games_series_id_game_series', 'game_series', ['series_id'], ['id'])
+        batch_op.create_unique_constraint('unique_series_occurrence', ['series_id', 'time'])
+
+
+def downgrade():
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.drop_constraint('unique_series_occurrence', type_='unique')
+        batch_op.drop_constraint('fk_games_series_id_game_series', type_='foreignkey')
+        batch_op.drop_column('series_id')
+
+    with op.batch_alter_table('game_series', schema=None) as batch_op:
+        batch_op.drop_index('ix_game_series_court_id')
+
+    op.drop_table('game_series')
@@ -0,0 +1,114 @@
+"""Add archive tables for finished games
+
+Revision ID: d5e8a3c61f07
+Revises: c4a19e7b2d56
+Create Date: 2026-10-17 23:12:48.530167
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5e8a3c61f07'
+down_revision = 'c4a19e7b2d56'
+branch_labels = None
+depends_on = None
+
+# On Postgres each table is range-partitioned by year; `flask archive-games`
+# creates the yearly partitions as it needs them
+PARTITIONING = {'postgresql_partition_by': 'RANGE (game_time)'}
+
+
+def upgrade():
+    op.create_table('games_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('game_time', sa.DateTime(), nullable=False),
+    sa.Column('court_id', sa.Integer(), nullable=False),
+    sa.Column('host_id', sa.Integer(), nullable=False),
+    sa.Column('duration_minutes', sa.Integer(), nullable=False),
+    sa.Column('max_players', sa.Integer(), nullable=True),
+    sa.Column('player_count', sa.Integer(), nullable=False),
+    sa.Column('series_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['court_id'], ['courts.id'], ),
+    sa.ForeignKeyConstraint(['host_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['series_id'], ['game_series.id'], ),
+    sa.PrimaryKeyConstraint('id', 'game_time'),
+    **PARTITIONING
+    )
+    op.create_table('game_players_archive',
+    sa.Column('game_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('game_time', sa.DateTime(), nullable=False),
+    sa.Column('joined_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('game_id', 'user_id', 'game_time'),
+    **PARTITIONING
+    )
+    op.create_table('player_stats_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('game_time', sa.DateTime(), nullable=False),
+    sa.Column('game_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('points', sa.Integer(), nullable=True),
+    sa.Column('rebounds', sa.Integer(), nullable=True),
+    sa.Column('assists', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id', 'game_time'),
+    **PARTITIONING
+    )
+    with op.batch_alter_table('player_stats_archive', schema=None) as batch_op:
+        batch_op.create_index('ix_player_stats_archive_user_id_game_time', ['user_id', 'game_time'], unique=False)
+
+    op.create_table('player_ratings_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('game_time', sa.DateTime(), nullable=False),
+    sa.Column('game_id', sa.Integer(), nullable=False),
+    sa.Column('from_user_id', sa.Integer(), nullable=False),
+    sa.Column('to_user_id', sa.Integer(), nullable=False),
+    sa.Column('rating', sa.Integer(), nullable=False),
+    sa.Column('comment', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['from_user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['to_user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id', 'game_time'),
+    **PARTITIONING
+    )
+    with op.batch_alter_table('player_ratings_archive', schema=None) as batch_op:
+        batch_op.create_index('ix_player_ratings_archive_to_user_id_created_at', ['to_user_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    # Put archived games back in the hot tables before dropping the archive
+    op.execute(
+        "INSERT INTO games (id, court_id, host_id, time, duration_minutes, max_players, player_count, series_id, created_at) "
+        "SELECT id, court_id, host_id, game_time, duration_minutes, max_players, player_count, series_id, created_at "
+        "FROM games_archive"
+    )
+    op.execute(
+        "INSERT INTO game_players (game_id, user_id, joined_at) "
+        "SELECT game_id, user_id, joined_at FROM game_players_archive"
+    )
+    op.execute(
+        "INSERT INTO player_stats (id, game_id, user_id, points, rebounds, assists, created_at, updated_at) "
+        "SELECT id, game_id, user_id, points, rebounds, assists, created_at, updated_at FROM player_stats_archive"
+    )
+    op.execute(
+        "INSERT INTO player_ratings (id, from_user_id, to_user_id, game_id, rating, comment, created_at) "
+        "SELECT id, from_user_id, to_user_id, game_id, rating, comment, created_at FROM player_ratings_archive"
+    )
+
+    with op.batch_alter_table('player_ratings_archive', schema=None) as batch_op:
+        batch_op.drop_index('ix_player_ratings_archive_to_user_id_created_at')
+
+    op.drop_table('player_ratings_archive')
+    with op.batch_alter_table('player_stats_archive', schema=None) as batch_op:
+        batch_op.drop_index('ix_player_stats_archive_user_id_game_time')
+
+    op.drop_table('player_stats_archive')
+    op.drop_table('game_players_archive')
+    op.drop_table('games_archive')
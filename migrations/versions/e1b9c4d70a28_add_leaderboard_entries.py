@@ -0,0 +1,39 @@
+"""Add leaderboard_entries table
+
+Revision ID: e1b9c4d70a28
+Revises: a4f7d2e9b316
+Create Date: 2026-10-17 13:41:09.217554
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1b9c4d70a28'
+down_revision = 'a4f7d2e9b316'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Filled by `flask refresh-leaderboards`
+    op.create_table('leaderboard_entries',
+    sa.Column('board', sa.String(length=64), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('rank', sa.Integer(), nullable=False),
+    sa.Column('value', sa.Float(), nullable=False),
+    sa.Column('sample_size', sa.Integer(), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('board', 'user_id')
+    )
+    with op.batch_alter_table('leaderboard_entries', schema=None) as batch_op:
+        batch_op.create_index('ix_leaderboard_entries_board_rank', ['board', 'rank'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('leaderboard_entries', schema=None) as batch_op:
+        batch_op.drop_index('ix_leaderboard_entries_board_rank')
+
+    op.drop_table('leaderboard_entries')
@@ -0,0 +1,77 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import count
+
+import pytest
+from flask import g
+from sqlalchemy import event
+
+from app import create_app
+from app.extensions import db
+from app.models import Court, Game, GamePlayer, User
+
+_ids = count(1)
+
+
+@pytest.fixture
+def app():
+    app = create_app("testing")
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def make_user(username=None):
+    # Password hashing is skipped; tests log in through the session instead
+    n = next(_ids)
+    user = User(username=username or f"player{n}", email=f"player{n}@example.com", password_hash="unused")
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def make_court(creator, name=None, lat=40.0, lng=-74.0):
+    court = Court(name=name or f"Court {next(_ids)}", address="1 Main St", lat=lat, lng=lng, created_by=creator.id)
+    db.session.add(court)
+    db.session.commit()
+    return court
+
+
+def make_game(court, host, time=None, players=(), max_players=10):
+    game = Game(court_id=court.id, host_id=host.id, max_players=max_players,
+                time=time or datetime.now() + timedelta(days=1), player_count=len(players))
+    db.session.add(game)
+    db.session.flush()
+    db.session.add_all(GamePlayer(game_id=game.id, user_id=player.id) for player in players)
+    db.session.commit()
+    return game
+
+
+def login(client, user):
+    # Requests share the fixture's app context, so drop Flask-Login's cached user too
+    g.pop("_login_user", None)
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(user.id)
+        sess["_fresh"] = True
+
+
+@contextmanager
+def count_queries():
+    # Collects every SQL statement sent while the block runs
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
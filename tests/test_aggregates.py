@@ -0,0 +1,71 @@
+import random
+from datetime import datetime, timedelta
+
+from app.aggregates import TOTALS_COLUMNS, rebuild_career_totals
+from app.archive import archive_games
+from app.extensions import db
+from app.models import PlayerCareerTotals, PlayerStats
+from tests.conftest import login, make_court, make_game, make_user
+
+
+def career_totals():
+    # Players whose history nets out to nothing may keep an all-zero row
+    db.session.expire_all()
+    rows = {row.user_id: tuple(getattr(row, name) for name in TOTALS_COLUMNS) for row in PlayerCareerTotals.query}
+    return {user_id: values for user_id, values in rows.items() if any(values)}
+
+
+def assert_matches_rebuild():
+    incremental = career_totals()
+    rebuild_career_totals()
+    assert career_totals() == incremental
+
+
+def test_incremental_totals_match_rebuild(app, client):
+    rng = random.Random(11)
+    players = [make_user() for _ in range(6)]
+    court = make_court(players[0])
+    start = datetime.now() - timedelta(days=400)
+    games = [make_game(court, players[0], start + timedelta(days=30 * i), players) for i in range(8)]
+
+    def box_score(game, who):
+        login(client, players[0])
+        lines = [{"user_id": player.id, "points": rng.randint(0, 30), "rebounds": rng.randint(0, 12),
+                  "assists": rng.randint(0, 10)} for player in who]
+        assert client.post(f"/games/{game.id}/stats/bulk", json={"stats": lines}).status_code == 200
+
+    def ratings(game, rater):
+        login(client, rater)
+        lines = [{"to_user_id": player.id, "rating": rng.randint(1, 5)} for player in players if player is not rater]
+        assert client.post(f"/games/{game.id}/rate/bulk", json={"ratings": lines}).status_code == 200
+
+    for game in games:
+        box_score(game, rng.sample(players, 4))
+        ratings(game, rng.choice(players))
+    assert_matches_rebuild()
+
+    # Edits: resubmitted lines and ratings replace the old values
+    for game in games:
+        box_score(game, rng.sample(players, 3))
+        ratings(game, rng.choice(players))
+    client.post(f"/games/{games[0].id}/stats", data={"user_id": players[1].id, "points": 40})
+    assert_matches_rebuild()
+
+    # Deletes: leaving a game takes the player's line with it
+    for game in games[:4]:
+        leaver = next(player for player in players[1:]
+                      if PlayerStats.query.filter_by(game_id=game.id, user_id=player.id).count())
+        login(client, leaver)
+        assert client.post(f"/games/{game.id}/leave").status_code == 302
+        assert PlayerStats.query.filter_by(game_id=game.id, user_id=leaver.id).count() == 0
+    assert_matches_rebuild()
+
+    # Archiving moves rows out of the hot tables without touching totals
+    before = career_totals()
+    assert archive_games(start + timedelta(days=100), batch_size=2)
+    assert career_totals() == before
+    assert_matches_rebuild()
+
+    # And later edits to the games still hot keep adding up
+    box_score(games[-1], players)
+    assert_matches_rebuild()
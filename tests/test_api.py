@@ -0,0 +1,76 @@
+import gzip
+import importlib
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from tests.conftest import login, make_court, make_game, make_user
+
+# `app.api` the attribute is the blueprint, so fetch the module itself
+api_module = importlib.import_module("app.api")
+
+
+@pytest.fixture
+def viewer(app, client):
+    user = make_user()
+    court = make_court(user)
+    start = datetime.now() + timedelta(days=1)
+    for i in range(20):
+        make_game(court, user, start + timedelta(hours=i), [user])
+    login(client, user)
+    return user
+
+
+def test_fields_limits_the_serialized_keys(viewer, client):
+    body = client.get("/api/v1/games?fields=id,%20court_name,time").get_json()
+    assert body["count"] == 20
+    assert all(game.keys() == {"id", "court_name", "time"} for game in body["games"])
+
+    body = client.get(f"/api/v1/users/{viewer.id}?fields=username").get_json()
+    assert body == {"username": viewer.username}
+
+
+def test_unknown_field_is_400(viewer, client):
+    for url in ("/api/v1/games?fields=id,password_hash", f"/api/v1/users/{viewer.id}?fields=email"):
+        response = client.get(url)
+        assert response.status_code == 400
+        assert "Unknown field" in response.get_json()["error"]
+
+
+def test_gzip_when_accepted_and_large_enough(viewer, client):
+    plain = client.get("/api/v1/games")
+    assert plain.content_encoding is None
+
+    response = client.get("/api/v1/games", headers={"Accept-Encoding": "gzip"})
+    assert response.content_encoding == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert json.loads(gzip.decompress(response.get_data())) == plain.get_json()
+
+    # Small bodies go out as they are
+    response = client.get("/api/v1/games?limit=1&fields=id", headers={"Accept-Encoding": "gzip"})
+    assert response.content_encoding is None
+
+
+def test_brotli_preferred_when_installed(viewer, client):
+    brotli = pytest.importorskip("brotli")
+    response = client.get("/api/v1/games", headers={"Accept-Encoding": "gzip, br"})
+    assert response.content_encoding == "br"
+    assert json.loads(brotli.decompress(response.get_data()))["count"] == 20
+
+
+def test_brotli_only_client_without_brotli_gets_identity(viewer, client, monkeypatch):
+    monkeypatch.setattr(api_module, "brotli", None)
+    response = client.get("/api/v1/games", headers={"Accept-Encoding": "br"})
+    assert response.content_encoding is None
+    assert response.get_json()["count"] == 20
+
+
+def test_unknown_game_is_404(viewer, client):
+    game_id = make_game(make_court(viewer), viewer).id
+    assert client.get(f"/api/v1/games/{game_id}/roster").get_json() == {"players": [], "count": 0}
+    assert client.get(f"/api/v1/games/{game_id}/stats").get_json() == {"stats": [], "count": 0}
+    for path in ("", "/roster", "/stats"):
+        response = client.get(f"/api/v1/games/{game_id + 1}{path}")
+        assert response.status_code == 404
+        assert response.get_json() == {"error": "Not found"}
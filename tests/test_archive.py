@@ -0,0 +1,21 @@
+from datetime import datetime, timedelta
+
+from app.archive import archive_games
+from app.extensions import db
+from app.models import ArchivedGame, Game, PlayerStats
+from tests.conftest import make_court, make_game, make_user
+
+
+def test_archive_moves_old_games_without_any_ratings(app):
+    host = make_user()
+    court = make_court(host)
+    start = datetime.now() - timedelta(days=400)
+    games = [make_game(court, host, start + timedelta(days=i), [host]) for i in range(10)]
+    db.session.add(PlayerStats(game_id=games[0].id, user_id=host.id, points=12, rebounds=0, assists=0))
+    db.session.commit()
+
+    # SQLite keeps the games holding the highest game and stats ids hot
+    kept = {games[0].id, games[-1].id} if db.engine.dialect.name == "sqlite" else set()
+    assert archive_games(datetime.now() - timedelta(days=30), batch_size=4) == 10 - len(kept)
+    assert {game.id for game in Game.query} == kept
+    assert ArchivedGame.query.count() == 10 - len(kept)
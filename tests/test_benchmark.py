@@ -0,0 +1,20 @@
+import pytest
+
+from app.benchmark import build_scenarios, prepare_database
+from app.seed import seed_database
+from tests.conftest import make_user
+
+
+def test_benchmark_refuses_data_it_did_not_seed(app):
+    make_user()
+    with pytest.raises(RuntimeError):
+        prepare_database("small")
+    with pytest.raises(RuntimeError):
+        build_scenarios()
+
+
+def test_benchmark_runs_on_seeded_data(app):
+    seed_database(users=40, courts=5, games=200)
+    assert prepare_database("small") is False
+    user_id, scenarios = build_scenarios()
+    assert user_id and scenarios
@@ -0,0 +1,63 @@
+from app.models import PlayerCareerTotals, PlayerStats
+from tests.conftest import login, make_court, make_game, make_user
+
+
+def box_score(game, lines):
+    return {"stats": [{"user_id": user.id, "points": points, "rebounds": rebounds, "assists": assists}
+                      for user, points, rebounds, assists in lines]}
+
+
+def test_bulk_box_score_inserts_then_updates(app, client):
+    host, guard, center = make_user(), make_user(), make_user()
+    game = make_game(make_court(host), host, players=[host, guard, center])
+    login(client, host)
+
+    response = client.post(f"/games/{game.id}/stats/bulk",
+                           json=box_score(game, [(guard, 10, 2, 5), (center, 4, 12, 1)]))
+    assert response.status_code == 200
+    assert response.get_json() == {"updated": 2}
+
+    # Resubmitting replaces the lines instead of adding rows
+    response = client.post(f"/games/{game.id}/stats/bulk",
+                           json=box_score(game, [(guard, 14, 3, 6)]))
+    assert response.status_code == 200
+    assert PlayerStats.query.filter_by(game_id=game.id).count() == 2
+
+    totals = PlayerCareerTotals.for_user(guard.id)
+    assert (totals.games_played, totals.total_points, totals.total_rebounds, totals.total_assists) == (1, 14, 3, 6)
+    totals = PlayerCareerTotals.for_user(center.id)
+    assert (totals.games_played, totals.total_points) == (1, 4)
+
+
+def test_bulk_box_score_rejects_players_off_the_roster(app, client):
+    host, outsider = make_user(), make_user()
+    game = make_game(make_court(host), host, players=[host])
+
+    login(client, host)
+    response = client.post(f"/games/{game.id}/stats/bulk", json=box_score(game, [(outsider, 1, 1, 1)]))
+    assert response.status_code == 400
+    assert response.get_json()["user_ids"] == [outsider.id]
+
+    login(client, outsider)
+    response = client.post(f"/games/{game.id}/stats/bulk", json=box_score(game, [(host, 1, 1, 1)]))
+    assert response.status_code == 403
+    assert PlayerStats.query.count() == 0
+
+
+def test_form_stats_only_for_rostered_players(app, client):
+    host, guard, outsider = make_user(), make_user(), make_user()
+    game = make_game(make_court(host), host, players=[host, guard])
+
+    login(client, host)
+    for user_id in (outsider.id, 9999):
+        response = client.post(f"/games/{game.id}/stats", data={"user_id": user_id, "points": 3})
+        assert response.status_code == 302
+    login(client, outsider)
+    response = client.post(f"/games/{game.id}/stats", data={"user_id": guard.id, "points": 3})
+    assert response.status_code == 302
+    assert PlayerStats.query.count() == 0
+
+    login(client, host)
+    client.post(f"/games/{game.id}/stats", data={"user_id": guard.id, "points": 7})
+    assert [(row.user_id, row.points) for row in PlayerStats.query] == [(guard.id, 7)]
+    assert PlayerCareerTotals.for_user(guard.id).total_points == 7
@@ -0,0 +1,34 @@
+import os
+
+import pytest
+from flask import Flask
+
+from app.cache import Cache, FileCache
+
+
+def test_file_cache_round_trips_json_values(tmp_path):
+    cache = FileCache(str(tmp_path / "cache"))
+    assert os.stat(cache.directory).st_mode & 0o777 == 0o700
+
+    catalog = [{"id": 1, "name": "Rucker Park", "lat": 40.83, "lng": -73.94}]
+    cache.set("courts", catalog)
+    assert cache.get("courts") == catalog
+    cache.set("expired", 1, ttl=-1)
+    assert cache.get("expired", "missing") == "missing"
+
+    with open(cache._path("courts"), "w") as f:
+        f.write("not json")
+    assert cache.get("courts") is None
+
+
+def test_file_cache_refuses_shared_directories(tmp_path):
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    shared.chmod(0o777)
+    with pytest.raises(ValueError):
+        FileCache(str(shared))
+
+    app = Flask(__name__)
+    app.config["CACHE_BACKEND"] = "filesystem"
+    with pytest.raises(ValueError):
+        Cache().init_app(app)
@@ -0,0 +1,61 @@
+from app.extensions import db, events
+from app.events import LocalBus
+from tests.conftest import login, make_court, make_game, make_user
+
+
+def drain(subscription):
+    messages = []
+    while not subscription.queue.empty():
+        messages.append(subscription.queue.get_nowait())
+    return messages
+
+
+def test_local_bus_delivers_on_commit_and_drops_on_rollback(app):
+    assert isinstance(events.bus, LocalBus)
+    subscription = events.bus.subscribe(7)
+    other = events.bus.subscribe(8)
+
+    events.publish(7, "stats", {"n": 1})
+    assert drain(subscription) == []
+    db.session.commit()
+    assert drain(subscription) == [{"game_id": 7, "event": "stats", "data": {"n": 1}}]
+
+    events.publish(7, "stats", {"n": 2})
+    db.session.rollback()
+    db.session.commit()
+    assert drain(subscription) == []
+    assert drain(other) == []
+
+    events.bus.unsubscribe(7, subscription)
+    events.publish(7, "stats", {"n": 3})
+    db.session.commit()
+    assert drain(subscription) == []
+
+
+def test_join_reaches_open_streams(app, client, monkeypatch):
+    host, guest = make_user(), make_user()
+    game = make_game(make_court(host), host, players=[host])
+    monkeypatch.setattr(events, "heartbeat", 0.01)
+    with app.test_request_context():
+        body = iter(events.stream(game.id).response)
+    assert next(body).startswith("retry:")
+
+    login(client, guest)
+    assert client.post(f"/games/{game.id}/join").status_code == 302
+    assert next(body) == ('event: roster\ndata: {"user_id":%d,"username":"%s","joined":true,"player_count":2}\n\n'
+                          % (guest.id, guest.username))
+    assert next(body) == ": keep-alive\n\n"
+    body.close()
+    assert events.bus._subscribers.get(game.id) is None
+
+
+def test_full_queue_tells_the_stream_to_resync(app, monkeypatch):
+    monkeypatch.setattr(events, "bus", LocalBus(queue_size=2))
+    with app.test_request_context():
+        body = iter(events.stream(1).response)
+    next(body)
+    for n in range(3):
+        events.publish(1, "stats", {"n": n})
+    db.session.commit()
+    assert next(body) == "event: resync\ndata: {}\n\n"
+    assert list(body) == []
@@ -0,0 +1,44 @@
+from tests.conftest import login, make_court, make_game, make_user
+
+
+def test_game_detail_answers_304_until_the_game_changes(app, client):
+    host, guard = make_user(), make_user()
+    game = make_game(make_court(host), host, players=[host, guard])
+    login(client, host)
+
+    first = client.get(f"/games/{game.id}")
+    assert first.status_code == 200
+    assert first.headers["ETag"]
+    assert "private" in first.headers["Cache-Control"]
+
+    repeat = client.get(f"/games/{game.id}", headers={"If-None-Match": first.headers["ETag"]})
+    assert repeat.status_code == 304
+    assert repeat.data == b""
+    assert repeat.headers["ETag"] == first.headers["ETag"]
+
+    response = client.post(f"/games/{game.id}/stats/bulk",
+                           json={"stats": [{"user_id": guard.id, "points": 8, "rebounds": 1, "assists": 2}]})
+    assert response.status_code == 200
+    changed = client.get(f"/games/{game.id}", headers={"If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != first.headers["ETag"]
+
+
+def test_roster_fragment_is_cached_once_and_follows_stats(app, client, monkeypatch):
+    from app.extensions import cache, fragments
+
+    monkeypatch.setattr(fragments, "enabled", True)
+    host, guard, center = make_user(), make_user(), make_user()
+    game = make_game(make_court(host), host, players=[host, guard, center])
+    login(client, host)
+
+    html = client.get(f"/games/{game.id}").get_data(as_text=True)
+    assert html.count('data-stat="points">0<') == 3
+    roster_keys = [key for key in cache.backend._data if key.startswith("fragment:game-roster")]
+    assert len(roster_keys) == 1
+
+    client.post(f"/games/{game.id}/stats", data={"user_id": guard.id, "points": 17})
+    html = client.get(f"/games/{game.id}").get_data(as_text=True)
+    row = html.split(f'data-player-id="{guard.id}"', 1)[1].split("</tr>", 1)[0]
+    assert 'data-stat="points">17<' in row
+    assert "Rate Player" in row and "data-rating" in row
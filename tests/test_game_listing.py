@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+
+from app.extensions import fragments
+from tests.conftest import count_queries, login, make_court, make_game, make_user
+
+
+def seed_games(n, courts, players):
+    start = datetime.now() + timedelta(days=1)
+    for i in range(n):
+        court = courts[i % len(courts)]
+        roster = [players[(i + k) % len(players)] for k in range(3)]
+        make_game(court, roster[0], start + timedelta(hours=3 * i), roster)
+
+
+def listing_statements(client):
+    response = client.get("/games?limit=200")
+    assert response.status_code == 200
+    with count_queries() as statements:
+        response = client.get("/games?limit=200")
+    assert response.status_code == 200
+    return statements, response.get_data(as_text=True)
+
+
+def test_games_listing_statement_count_does_not_grow_with_rows(app, client, monkeypatch):
+    # Rendered rows would otherwise come from the fragment cache and hide lazy loads
+    monkeypatch.setattr(fragments, "enabled", False)
+    players = [make_user() for _ in range(12)]
+    courts = [make_court(players[0]) for _ in range(4)]
+    viewer = players[0]
+    login(client, viewer)
+
+    n = 10
+    seed_games(n, courts, players)
+    small, html = listing_statements(client)
+    assert html.count("View Details") == n
+
+    seed_games(9 * n, courts, players)
+    large, html = listing_statements(client)
+    assert html.count("View Details") == 10 * n
+
+    assert len(large) == len(small), large
@@ -0,0 +1,53 @@
+import os
+import time
+
+import pytest
+from flask import Flask
+from werkzeug.security import generate_password_hash
+
+from app.extensions import db, hasher as default_hasher
+from app.hashing import HashingBusy, PasswordHasher
+from app.models import User
+
+
+@pytest.fixture
+def hasher():
+    app = Flask(__name__)
+    app.config.update(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_QUEUE_DEPTH=0, PASSWORD_HASH_TIMEOUT=0.2,
+                      PASSWORD_HASH_METHOD="pbkdf2:sha256:1000")
+    hasher = PasswordHasher()
+    hasher.init_app(app)
+    yield hasher
+    if hasher._pool is not None:
+        hasher._pool.shutdown(cancel_futures=True)
+
+
+def test_timed_out_jobs_hold_their_slot_until_they_finish(hasher):
+    with pytest.raises(HashingBusy, match="timed out"):
+        hasher._run(time.sleep, 1)
+    with pytest.raises(HashingBusy, match="Too many"):
+        hasher.hash("password")
+
+    time.sleep(1.5)
+    assert hasher.verify(hasher.hash("password"), "password")
+
+
+def test_crashed_pool_is_replaced(hasher):
+    with pytest.raises(HashingBusy, match="crashed"):
+        hasher._run(os._exit, 1)
+    assert hasher.verify(hasher.hash("password"), "password")
+
+
+
+def test_login_succeeds_when_the_rehash_is_busy(app, client, monkeypatch):
+    old_hash = generate_password_hash("password", "pbkdf2:sha256:500")
+    db.session.add(User(username="veteran", email="veteran@example.com", password_hash=old_hash))
+    db.session.commit()
+
+    def busy(password):
+        raise HashingBusy("Too many password hashes in flight")
+
+    monkeypatch.setattr(default_hasher, "hash", busy)
+    response = client.post("/login", data={"username": "veteran", "password": "password"})
+    assert response.status_code == 302
+    assert User.query.filter_by(username="veteran").one().password_hash == old_hash
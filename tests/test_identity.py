@@ -0,0 +1,40 @@
+from app.extensions import db, identity_cache
+from app.models import User
+from tests.conftest import login, make_user
+
+
+def cached_snapshot(client, user):
+    # A request runs the user_loader, which leaves the snapshot in the cache
+    login(client, user)
+    assert client.get("/courts").status_code == 200
+    snapshot = identity_cache.load(user.id)
+    assert identity_cache.load(user.id) is snapshot
+    return snapshot
+
+
+def test_snapshot_dropped_once_user_update_commits(app, client):
+    user = make_user()
+    snapshot = cached_snapshot(client, user)
+
+    db.session.get(User, user.id).username = "renamed"
+    db.session.flush()
+    assert identity_cache.load(user.id) is snapshot
+
+    db.session.rollback()
+    assert identity_cache.load(user.id) is snapshot
+
+    db.session.get(User, user.id).username = "renamed"
+    db.session.commit()
+    fresh = identity_cache.load(user.id)
+    assert fresh is not snapshot and fresh.username == "renamed"
+
+
+def test_snapshot_dropped_on_logout(app, client):
+    user, other = make_user(), make_user()
+    snapshot = cached_snapshot(client, user)
+    other_snapshot = cached_snapshot(client, other)
+
+    login(client, user)
+    assert client.get("/logout").status_code == 302
+    assert identity_cache.load(user.id) is not snapshot
+    assert identity_cache.load(other.id) is other_snapshot
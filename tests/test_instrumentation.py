@@ -0,0 +1,24 @@
+import pytest
+from sqlalchemy.exc import DBAPIError
+
+from app.extensions import db
+
+
+def test_metrics_needs_a_token_outside_debug_and_testing(app, client):
+    assert client.get("/metrics").status_code == 200
+
+    app.testing = False
+    assert client.get("/metrics").status_code == 404
+
+    app.config["METRICS_TOKEN"] = "secret"
+    assert client.get("/metrics").status_code == 403
+    response = client.get("/metrics", headers={"Authorization": "Bearer secret"})
+    assert response.status_code == 200
+    assert "http_requests_total" in response.get_data(as_text=True)
+
+
+def test_failed_statements_leave_no_start_time_behind(app):
+    conn = db.session.connection()
+    with pytest.raises(DBAPIError):
+        conn.exec_driver_sql("SELECT * FROM no_such_table")
+    assert conn.info.get("query_started") == []
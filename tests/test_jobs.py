@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.extensions import db, jobs
+from app.models import Job
+
+
+@pytest.fixture
+def handlers(monkeypatch):
+    # Handlers registered by a test are dropped afterwards
+    monkeypatch.setattr(jobs, "handlers", dict(jobs.handlers))
+    return jobs.handlers
+
+
+def test_jobs_with_the_same_key_coalesce_until_claimed(app, handlers):
+    jobs.handler("noop")(lambda payload: None)
+    for _ in range(3):
+        jobs.enqueue("noop", key="noop:1")
+    db.session.commit()
+    assert Job.query.count() == 1
+
+    (job,) = jobs.claim("worker-1", 10)
+    assert job.dedupe_key is None
+    # The claimed job may have read stale state, so a new enqueue gets its own row
+    jobs.enqueue("noop", key="noop:1")
+    db.session.commit()
+    assert Job.query.count() == 2
+
+
+def test_batch_handler_gets_every_claimed_payload_at_once(app, handlers):
+    calls = []
+    jobs.handler("collect", batch=True)(calls.append)
+    for n in range(3):
+        jobs.enqueue("collect", {"n": n})
+    db.session.commit()
+
+    assert jobs.run_pending("worker-1") == 3
+    assert [sorted(payload["n"] for payload in call) for call in calls] == [[0, 1, 2]]
+    assert Job.query.count() == 0
+
+
+def test_failing_job_backs_off_then_fails(app, handlers):
+    def explode(payload):
+        raise RuntimeError("boom")
+
+    jobs.handler("explode")(explode)
+    jobs.enqueue("explode", max_attempts=2)
+    db.session.commit()
+
+    before = datetime.now()
+    jobs.run_pending("worker-1")
+    job = Job.query.one()
+    assert (job.status, job.attempts, job.locked_by) == ("queued", 1, None)
+    assert job.run_at >= before + timedelta(seconds=jobs.retry_base)
+    assert "boom" in job.last_error
+    assert jobs.run_pending("worker-1") == 0  # Not due yet
+
+    job.run_at = datetime.now() - timedelta(seconds=1)
+    db.session.commit()
+    jobs.run_pending("worker-1")
+    job = Job.query.one()
+    assert (job.status, job.attempts) == ("failed", 2)
+    assert jobs.run_pending("worker-1") == 0
+
+
+def test_jobs_locked_by_a_dead_worker_are_reclaimed(app, handlers):
+    now = datetime.now()
+    db.session.add_all([
+        Job(name="noop", payload={}, status="running", attempts=1, run_at=now,
+            locked_at=now - timedelta(seconds=jobs.lock_timeout + 1), locked_by="dead"),
+        Job(name="noop", payload={}, status="running", attempts=1, run_at=now,
+            locked_at=now, locked_by="alive"),
+    ])
+    db.session.commit()
+
+    (job,) = jobs.claim("worker-2", 10)
+    assert (job.locked_by, job.attempts) == ("worker-2", 2)
+
+
+def test_submissions_queue_one_leaderboard_refresh(app, client):
+    from tests.conftest import login, make_court, make_game, make_user
+
+    host, guard = make_user(), make_user()
+    game = make_game(make_court(host), host, players=[host, guard])
+    login(client, host)
+    for points in (4, 9):
+        client.post(f"/games/{game.id}/stats/bulk",
+                    json={"stats": [{"user_id": guard.id, "points": points, "rebounds": 0, "assists": 0}]})
+    client.post(f"/games/{game.id}/rate/bulk", json={"ratings": [{"to_user_id": guard.id, "rating": 4}]})
+
+    assert [(job.name, job.status) for job in Job.query] == [("refresh_leaderboards", "queued")]
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.leaderboards import refresh_leaderboards
+from app.models import PlayerStats
+from tests.conftest import login, make_court, make_game, make_user
+
+
+def seed_points(points_by_user, court, when):
+    users = list(points_by_user)
+    game = make_game(court, users[0], when, users)
+    db.session.add_all(PlayerStats(game_id=game.id, user_id=user.id, points=points, rebounds=0, assists=0)
+                       for user, points in points_by_user.items())
+    db.session.commit()
+
+
+def test_leaderboard_top_entries_and_my_rank(app, client):
+    users = [make_user() for _ in range(5)]
+    court = make_court(users[0])
+    seed_points({user: points for user, points in zip(users, (30, 20, 20, 10, 5))},
+                court, datetime.now() - timedelta(days=1))
+    seed_points({users[4]: 100}, court, datetime.now() - timedelta(days=60))
+    refresh_leaderboards()
+    login(client, users[3])
+
+    body = client.get("/leaderboards/points?limit=3").get_json()
+    assert body["board"] == "points:30d:global"
+    assert [(entry["rank"], entry["user_id"], entry["value"]) for entry in body["entries"]] == [
+        (1, users[0].id, 30), (2, users[1].id, 20), (2, users[2].id, 20),
+    ]
+    assert (body["me"]["rank"], body["me"]["value"]) == (4, 10)
+
+    # The older game only counts on the all-time board
+    body = client.get(f"/leaderboards/points?window=all&court_id={court.id}&limit=1").get_json()
+    assert body["board"] == f"points:all:court:{court.id}"
+    assert [(entry["user_id"], entry["value"], entry["sample_size"]) for entry in body["entries"]] == [
+        (users[4].id, 105, 2),
+    ]
+
+    assert client.get("/leaderboards/steals").status_code == 404
+    assert client.get("/leaderboards/points?window=7d").status_code == 400
+
+
+def test_leaderboard_limit_is_clamped(app, client):
+    users = [make_user() for _ in range(3)]
+    seed_points({user: 10 * (i + 1) for i, user in enumerate(users)},
+                make_court(users[0]), datetime.now() - timedelta(days=1))
+    refresh_leaderboards()
+    login(client, users[0])
+
+    for limit, expected in (("-1", 1), ("0", 1), ("2", 2), ("1000", 3)):
+        body = client.get(f"/leaderboards/points?limit={limit}").get_json()
+        assert len(body["entries"]) == expected, limit
@@ -0,0 +1,67 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.pagination import decode_cursor, encode_cursor
+from tests.conftest import login, make_court, make_game, make_user
+
+
+@pytest.fixture
+def games(app, client):
+    # Eight games sharing one start time, then four more an hour apart
+    host = make_user()
+    courts = [make_court(host, lat=40.70, lng=-73.90), make_court(host, lat=40.71, lng=-73.90)]
+    start = (datetime.now() + timedelta(days=1)).replace(microsecond=0)
+    made = [make_game(courts[i % 2], host, start) for i in range(8)]
+    made += [make_game(courts[i % 2], host, start + timedelta(hours=i + 1)) for i in range(4)]
+    login(client, host)
+    return sorted(made, key=lambda game: (game.time, game.id))
+
+
+def walk(client, url, limit):
+    # Follow next_cursor until it runs out; returns the ids in order
+    ids, cursor = [], None
+    while True:
+        body = client.get(f"{url}&limit={limit}" + (f"&cursor={cursor}" if cursor else "")).get_json()
+        assert len(body["games"]) <= limit
+        ids += [game["id"] for game in body["games"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+def test_cursor_round_trip(games):
+    game = games[3]
+    assert decode_cursor(encode_cursor(game)) == (game.time, game.id)
+
+
+@pytest.mark.parametrize("limit", [1, 3, 5, 12])
+def test_pages_split_inside_shared_timestamps(games, client, limit):
+    expected = [game.id for game in games]
+    assert walk(client, "/games/nearby?lat=40.70&lng=-73.90", limit) == expected
+    assert walk(client, "/api/v1/games?", limit) == expected
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "%%%", "MjAyNXxhYmM", "MjAyNS0wMS0wMQ"])
+def test_bad_cursor_is_400(games, client, cursor):
+    assert client.get(f"/games?cursor={cursor}").status_code == 400
+    response = client.get(f"/games/nearby?lat=40.70&lng=-73.90&cursor={cursor}")
+    assert response.status_code == 400 and response.get_json() == {"error": "Invalid cursor"}
+    response = client.get(f"/api/v1/games?cursor={cursor}")
+    assert response.status_code == 400 and response.get_json() == {"error": "Invalid cursor"}
+
+
+def test_stream_page_matches_buffered_page(games, client):
+    url = "/games/nearby?lat=40.70&lng=-73.90&limit=5"
+    buffered = client.get(url).get_json()
+    streamed = client.get(url + "&stream=1")
+    assert streamed.mimetype == "application/json"
+    assert json.loads(streamed.get_data(as_text=True)) == buffered
+    assert buffered["count"] == 5 and buffered["next_cursor"] == encode_cursor(games[4])
+
+    rest = json.loads(client.get(f"{url}&stream=1&cursor={buffered['next_cursor']}").get_data(as_text=True))
+    assert [game["id"] for game in rest["games"]] == [game.id for game in games[5:10]]
+
+    everything = json.loads(client.get("/games/nearby?lat=40.70&lng=-73.90&stream=1").get_data(as_text=True))
+    assert everything["count"] == len(games) and everything["next_cursor"] is None
@@ -0,0 +1,21 @@
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.leaderboards import refresh_leaderboards
+from app.models import Game, GameSeries
+from app.query_plans import check_query_plans
+from app.seed import seed_database
+
+
+def test_read_routes_use_indexes(app):
+    seed_database(users=60, courts=8, games=400)
+    refresh_leaderboards()
+    game = Game.query.filter(Game.time > datetime.now()).order_by(Game.id).first()
+    start = (datetime.now() + timedelta(days=2)).replace(hour=6, minute=0, second=0, microsecond=0)
+    db.session.add(GameSeries(court_id=game.court_id, host_id=game.host_id, starts_at=start,
+                              rule="FREQ=WEEKLY;COUNT=4", duration_minutes=60, max_players=10))
+    db.session.commit()
+
+    failures = check_query_plans(app)
+    assert failures == [], "\n".join(f"{url} {table}: {' '.join(statement.split())}"
+                                     for url, table, statement in failures)
@@ -0,0 +1,44 @@
+from app.models import PlayerCareerTotals, PlayerRating
+from tests.conftest import login, make_court, make_game, make_user
+
+
+def test_rating_resubmission_updates_the_existing_row(app, client):
+    rater, rated = make_user(), make_user()
+    game = make_game(make_court(rater), rater, players=[rater, rated])
+    login(client, rater)
+
+    for rating in (2, 5):
+        response = client.post(f"/games/{game.id}/rate", data={"to_user_id": rated.id, "rating": rating})
+        assert response.status_code == 302
+
+    ratings = PlayerRating.query.filter_by(game_id=game.id).all()
+    assert [(row.from_user_id, row.to_user_id, row.rating) for row in ratings] == [(rater.id, rated.id, 5)]
+    totals = PlayerCareerTotals.for_user(rated.id)
+    assert (totals.total_ratings, totals.rating_sum) == (1, 5)
+
+
+def test_bulk_ratings(app, client):
+    rater, forward, guard, outsider = make_user(), make_user(), make_user(), make_user()
+    game = make_game(make_court(rater), rater, players=[rater, forward, guard])
+    login(client, rater)
+
+    response = client.post(f"/games/{game.id}/rate/bulk", json={"ratings": [
+        {"to_user_id": forward.id, "rating": 4},
+        {"to_user_id": guard.id, "rating": 3, "comment": "Good passer"},
+    ]})
+    assert response.status_code == 200
+    assert response.get_json() == {"updated": 2}
+    response = client.post(f"/games/{game.id}/rate/bulk", json={"ratings": [{"to_user_id": forward.id, "rating": 1}]})
+    assert response.status_code == 200
+    assert {row.to_user_id: row.rating for row in PlayerRating.query} == {forward.id: 1, guard.id: 3}
+
+    response = client.post(f"/games/{game.id}/rate/bulk", json={"ratings": [{"to_user_id": outsider.id, "rating": 4}]})
+    assert response.status_code == 400
+    assert response.get_json()["user_ids"] == [outsider.id]
+    response = client.post(f"/games/{game.id}/rate/bulk", json={"ratings": [{"to_user_id": rater.id, "rating": 4}]})
+    assert response.status_code == 400
+
+    login(client, outsider)
+    response = client.post(f"/games/{game.id}/rate/bulk", json={"ratings": [{"to_user_id": guard.id, "rating": 5}]})
+    assert response.status_code == 403
+    assert PlayerRating.query.count() == 2
@@ -0,0 +1,35 @@
+from app.extensions import db
+from app.models import Game, GamePlayer
+from tests.conftest import login, make_court, make_game, make_user
+
+
+def test_join_stops_at_max_players(app, client):
+    host = make_user()
+    game = make_game(make_court(host), host, max_players=3)
+    players = [make_user() for _ in range(4)]
+
+    for player in players[:3]:
+        login(client, player)
+        assert client.post(f"/games/{game.id}/join").status_code == 302
+    login(client, players[3])
+    client.post(f"/games/{game.id}/join")
+
+    db.session.expire_all()
+    assert db.session.get(Game, game.id).player_count == 3
+    assert {row.user_id for row in GamePlayer.query.filter_by(game_id=game.id)} == {p.id for p in players[:3]}
+
+
+def test_double_join_keeps_the_count_and_the_callers_transaction(app):
+    host, player = make_user(), make_user()
+    court = make_court(host)
+    game = make_game(court, host, players=[player], max_players=4)
+
+    court.name = "Renamed"  # Pending work of the caller
+    assert game.add_player(player.id) is False
+    assert game.add_player(host.id) is True
+    db.session.commit()
+
+    db.session.expire_all()
+    assert court.name == "Renamed"
+    assert db.session.get(Game, game.id).player_count == 2
+    assert GamePlayer.query.filter_by(game_id=game.id).count() == 2
@@ -0,0 +1,115 @@
+import shutil
+import time
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app import create_app
+from app.extensions import db
+from app.models import Court, Game
+from app.routing import QUERY_CANCELED, REPLICA_BIND, statement_timeout, use_replica
+from config import TestingConfig
+from tests.conftest import login, make_court, make_game, make_user
+
+
+@pytest.fixture
+def replicated(tmp_path, monkeypatch):
+    # Two SQLite files stand in for a primary and a lagging replica
+    primary, replica = tmp_path / "primary.db", tmp_path / "replica.db"
+    monkeypatch.setattr(TestingConfig, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{primary}")
+    monkeypatch.setattr(TestingConfig, "SQLALCHEMY_BINDS", {REPLICA_BIND: f"sqlite:///{replica}"}, raising=False)
+    # init_app registers a metadata per bind on the shared db; keep it out of later tests
+    monkeypatch.setattr(db, "metadatas", dict(db.metadatas))
+    app = create_app("testing")
+    with app.app_context():
+        db.create_all()
+        host = make_user()
+        game_id = make_game(make_court(host), host, players=[host]).id
+        db.session.remove()
+        shutil.copyfile(primary, replica)
+
+        # A write the replica hasn't caught up with yet
+        db.session.get(Game, game_id).max_players = 12
+        db.session.commit()
+        client = app.test_client()
+        login(client, make_user())
+    # Requests get their own app context, and so their own g, as in production
+    return app, client, game_id
+
+
+def player_count(engine, game_id):
+    with engine.connect() as connection:
+        return connection.execute(text("SELECT player_count FROM games WHERE id = :id"), {"id": game_id}).scalar()
+
+
+def api_game(client, game_id):
+    body = client.get(f"/api/v1/games/{game_id}").get_json()
+    return body["max_players"], body["player_count"]
+
+
+def test_replica_views_read_the_replica_until_the_client_writes(replicated):
+    app, client, game_id = replicated
+    assert api_game(client, game_id) == (10, 1)
+
+    # The join reads and writes the primary
+    assert client.post(f"/games/{game_id}/join").status_code == 302
+    with app.app_context():
+        assert player_count(db.engine, game_id) == 2
+        assert player_count(db.engines[REPLICA_BIND], game_id) == 1
+
+    # Having written, the client reads its own writes from the primary...
+    assert api_game(client, game_id) == (12, 2)
+
+    # ...until the sticky window runs out
+    with client.session_transaction() as sess:
+        assert sess["_primary_until"] > time.time()
+        sess["_primary_until"] = time.time() - 1
+    assert api_game(client, game_id) == (10, 1)
+
+
+def test_flushes_from_replica_views_go_to_the_primary(replicated):
+    app, _, _ = replicated
+    with app.test_request_context():
+        use_replica()
+        assert db.session.get_bind() is db.engines[REPLICA_BIND]
+        court = Court(name="Written in a replica view", address="", lat=1.0, lng=1.0,
+                      created_by=db.session.scalar(db.select(Game.host_id)))
+        db.session.add(court)
+        db.session.commit()
+        # Reading it back in the same request mustn't race replication
+        assert db.session.get_bind() is db.engine
+        court_id = court.id
+
+    with app.app_context():
+        with db.engine.connect() as primary, db.engines[REPLICA_BIND].connect() as replica:
+            query = text("SELECT count(*) FROM courts WHERE id = :id")
+            assert primary.execute(query, {"id": court_id}).scalar() == 1
+            assert replica.execute(query, {"id": court_id}).scalar() == 0
+
+
+class Canceled(Exception):
+    sqlstate = QUERY_CANCELED
+
+
+def test_cancelled_statement_is_503(app, client):
+    @app.route("/slow")
+    @statement_timeout(50)
+    def slow():
+        if db.engine.dialect.name == "postgresql":
+            db.session.execute(text("SELECT pg_sleep(1)"))
+            return "finished"
+        # SQLite has no statement_timeout; raise what psycopg would
+        raise OperationalError("SELECT pg_sleep(1)", {}, Canceled())
+
+    @app.route("/broken")
+    def broken():
+        raise OperationalError("SELECT 1", {}, Exception("disk I/O error"))
+
+    response = client.get("/slow")
+    assert response.status_code == 503
+    assert "busy" in response.get_data(as_text=True)
+
+    # Other operational errors are not mistaken for a timeout
+    with pytest.raises(OperationalError):
+        client.get("/broken")
@@ -0,0 +1,23 @@
+from datetime import datetime, timedelta
+
+from app.extensions import court_schedule
+from tests.conftest import make_court, make_game, make_user
+
+
+def test_conflicts_see_games_whose_ids_are_out_of_time_order(app):
+    host = make_user()
+    court = make_court(host)
+    day = (datetime.now() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    late = make_game(court, host, day.replace(hour=15))
+    early = make_game(court, host, day.replace(hour=10))
+    assert late.id < early.id
+
+    assert [game_id for _, _, game_id in court_schedule.conflicts(court.id, day.replace(hour=15, minute=30), 30)] == [late.id]
+    assert court_schedule.busy(court.id, day, day + timedelta(days=1)) == [
+        [day.replace(hour=10), early.ends_at], [day.replace(hour=15), late.ends_at],
+    ]
+
+    # A game recorded locally and then fetched by the next top-up is listed once
+    later = make_game(court, host, day.replace(hour=8))
+    court_schedule.add(later)
+    assert len(court_schedule.conflicts(court.id, day, 24 * 60)) == 3
@@ -0,0 +1,41 @@
+from datetime import date, datetime, timedelta
+
+from app.extensions import game_index
+from tests.conftest import login, make_court, make_game, make_user
+
+
+def test_search_only_accepts_windows_inside_the_index_horizon(app, client):
+    host = make_user()
+    tomorrow = date.today() + timedelta(days=1)
+    game = make_game(make_court(host), host, datetime.combine(tomorrow, datetime.min.time()).replace(hour=18))
+    login(client, host)
+
+    response = client.get(f"/games/search?date={tomorrow}&days=1")
+    assert response.status_code == 200
+    assert [found["id"] for found in response.get_json()["games"]] == [game.id]
+
+    beyond = date.today() + timedelta(days=game_index.horizon_days + 1)
+    for query in (f"date={beyond}", f"date={tomorrow}&days={game_index.horizon_days}",
+                  f"date={date.today() - timedelta(days=2)}&days=1"):
+        response = client.get(f"/games/search?{query}")
+        assert response.status_code == 400, query
+
+
+def test_searches_only_read_memory_once_the_refresher_runs(app, monkeypatch):
+    from tests.conftest import count_queries
+
+    host = make_user()
+    game = make_game(make_court(host), host, datetime.now() + timedelta(hours=5))
+    monkeypatch.setattr(game_index, "background", True)
+    window = (datetime.now(), datetime.now() + timedelta(days=1))
+
+    assert [entry.id for entry, _ in game_index.search(*window)] == [game.id]
+    pid, thread = game_index._refresher
+    assert thread.is_alive()
+    try:
+        monkeypatch.setattr(game_index, "_refreshed_at", 0)  # A reload is long overdue
+        with count_queries() as statements:
+            assert [entry.id for entry, _ in game_index.search(*window)] == [game.id]
+        assert statements == []
+    finally:
+        game_index._refresher = None
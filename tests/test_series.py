@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.extensions import db
+from app.models import Game, GameSeries
+from app.series import Recurrence, materialize
+from tests.conftest import login, make_court, make_game, make_user
+
+
+def test_recurrence_parse_round_trips_and_rejects_bad_rules():
+    rule = Recurrence.parse("freq=weekly;interval=2;byday=TU,TH;count=5")
+    assert str(rule) == "FREQ=WEEKLY;INTERVAL=2;BYDAY=TU,TH;COUNT=5"
+    assert Recurrence.parse("FREQ=DAILY;UNTIL=20261231").until == datetime(2026, 12, 31, 23, 59, 59)
+
+    for text in ("FREQ=MONTHLY", "FREQ=DAILY;BYDAY=MO", "FREQ=WEEKLY;BYDAY=XX", "FREQ=DAILY;COUNT=0",
+                 "FREQ=DAILY;COUNT=2;UNTIL=20261231", "FREQ=DAILY;FREQ=DAILY", "FREQ=DAILY;WKST=MO"):
+        with pytest.raises(ValueError):
+            Recurrence.parse(text)
+
+
+def test_recurrence_between():
+    start = datetime(2026, 1, 6, 19, 0)  # A Tuesday
+    weekly = Recurrence.parse("FREQ=WEEKLY;BYDAY=TU,TH;COUNT=5")
+    assert [d.day for d in weekly.between(start, start, start + timedelta(days=60))] == [6, 8, 13, 15, 20]
+    # COUNT keeps counting occurrences before the window
+    assert [d.day for d in weekly.between(start, datetime(2026, 1, 14), datetime(2026, 3, 1))] == [15, 20]
+
+    daily = Recurrence.parse("FREQ=DAILY;INTERVAL=3;UNTIL=20260115")
+    assert [d.day for d in daily.between(start, datetime(2026, 1, 8), datetime(2026, 2, 1))] == [9, 12, 15]
+    assert daily.includes(start, datetime(2026, 1, 12, 19, 0))
+    assert not daily.includes(start, datetime(2026, 1, 12, 18, 0))
+
+
+def add_series(court, host, starts_at, rule="FREQ=DAILY;COUNT=10"):
+    series = GameSeries(court_id=court.id, host_id=host.id, starts_at=starts_at, rule=rule,
+                        duration_minutes=60, max_players=10)
+    db.session.add(series)
+    db.session.commit()
+    return series
+
+
+def tomorrow_at(hour):
+    return (datetime.now() + timedelta(days=1)).replace(hour=hour, minute=0, second=0, microsecond=0)
+
+
+def test_materialize_is_idempotent(app):
+    host = make_user()
+    series = add_series(make_court(host), host, tomorrow_at(18))
+
+    first = materialize(series, series.starts_at)
+    assert first is not None and first.series_id == series.id
+    assert materialize(series, series.starts_at).id == first.id
+    assert Game.query.filter_by(series_id=series.id).count() == 1
+    # Not an occurrence of the rule
+    assert materialize(series, series.starts_at + timedelta(minutes=30)) is None
+
+
+def test_listing_pages_through_games_and_occurrences(app, client):
+    host = make_user()
+    court = make_court(host)
+    series = add_series(court, host, tomorrow_at(18), "FREQ=DAILY;COUNT=4")
+    # One-off games on the same days, so pages cut across both kinds of row
+    games = [make_game(court, host, tomorrow_at(10) + timedelta(days=day)) for day in range(4)]
+    login(client, host)
+
+    seen, cursor = [], None
+    while True:
+        body = client.get(f"/games/nearby?lat={court.lat}&lng={court.lng}&limit=3"
+                          + (f"&cursor={cursor}" if cursor else "")).get_json()
+        seen.extend((entry["id"], entry["series_id"], entry["time"]) for entry in body["games"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(seen) == 8 and len(set(seen)) == 8
+    assert [time for _, _, time in seen] == sorted(time for _, _, time in seen)
+    assert {game_id for game_id, _, _ in seen if game_id is not None} == {game.id for game in games}
+    assert sum(1 for game_id, series_id, _ in seen if game_id is None and series_id == series.id) == 4
+
+
+def test_search_includes_occurrences(app, client):
+    host = make_user()
+    court = make_court(host)
+    series = add_series(court, host, tomorrow_at(18), "FREQ=DAILY;COUNT=3")
+    game = make_game(court, host, tomorrow_at(12))
+    login(client, host)
+
+    body = client.get(f"/games/search?lat={court.lat}&lng={court.lng}&days=7").get_json()
+    assert [(entry["id"], entry["series_id"]) for entry in body["games"]] == [
+        (game.id, None), (None, series.id), (None, series.id), (None, series.id),
+    ]
+    assert all("distance_km" in entry for entry in body["games"])
+
+    body = client.get(f"/games/search?court_id={court.id}&start_hour=17&end_hour=20&limit=2").get_json()
+    assert [entry["series_id"] for entry in body["games"]] == [series.id, series.id]
+    body = client.get(f"/games/search?court_id={court.id}&start_hour=17&end_hour=20&limit=2"
+                      f"&cursor={body['next_cursor']}").get_json()
+    assert [entry["series_id"] for entry in body["games"]] == [series.id]
+    assert body["next_cursor"] is None
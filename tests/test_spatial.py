@@ -0,0 +1,42 @@
+import random
+
+from app.extensions import court_index
+from app.utils import haversine_distance
+from tests.conftest import login, make_court, make_user
+
+
+def test_court_index_matches_brute_force(app):
+    rng = random.Random(7)
+    owner = make_user()
+    # Spread across cell edges, plus a cluster straddling the antimeridian
+    points = [(40.7 + rng.uniform(-0.6, 0.6), -73.9 + rng.uniform(-0.6, 0.6)) for _ in range(150)]
+    points += [(rng.uniform(-0.3, 0.3), rng.choice((-1, 1)) * rng.uniform(179.8, 180.0)) for _ in range(30)]
+    courts = [make_court(owner, lat=lat, lng=lng) for lat, lng in points]
+
+    origins = [(40.7, -73.9), (41.0, -73.5), (0.0, 179.95), (0.1, -179.99)]
+    for lat, lng in origins:
+        for radius in (0.5, 5, 25, 60):
+            brute = {court.id: haversine_distance(lat, lng, court.lat, court.lng) for court in courts}
+            brute = {court_id: distance for court_id, distance in brute.items() if distance <= radius}
+            found = court_index.within(lat, lng, radius)
+            assert found.keys() == brute.keys(), (lat, lng, radius)
+            assert all(abs(found[court_id] - brute[court_id]) < 1e-6 for court_id in brute)
+
+            for k in (1, 5, 500):
+                nearest = court_index.nearest(lat, lng, k, radius)
+                expected = sorted(brute.items(), key=lambda item: item[1])[:k]
+                assert [round(d, 6) for _, d in nearest] == [round(d, 6) for _, d in expected]
+                assert {court_id for court_id, _ in nearest} <= brute.keys()
+
+
+def test_nearest_courts_route(app, client):
+    owner = make_user()
+    far = make_court(owner, lat=40.80, lng=-73.90)
+    near = make_court(owner, lat=40.71, lng=-73.90)
+    make_court(owner, lat=45.0, lng=-73.90)
+    login(client, owner)
+
+    body = client.get("/courts/nearest?lat=40.70&lng=-73.90&k=2").get_json()
+    assert [court["id"] for court in body["courts"]] == [near.id, far.id]
+    assert body["courts"][0]["name"] == near.name and body["courts"][0]["distance_km"] < 2
+    assert client.get("/courts/nearest?lat=40.70").status_code == 400